@@ -0,0 +1,6 @@
+"""
+In-process benchmarks: drive the FastAPI app through httpx's ASGI transport
+against the in-memory database backend and a fake Stripe.
+
+    cd backend && python -m benchmarks.run --help
+"""
@@ -0,0 +1,109 @@
+"""
+In-process stand-in for the parts of the Stripe SDK that checkout_routes uses.
+
+`install()` swaps it in for the lazily imported `stripe` module of
+routes/checkout_routes.py, so checkout and webhook flows run with no network.
+Sessions are kept in memory; webhooks are verified with Stripe's real scheme
+(`Stripe-Signature: t=<unix time>,v1=<HMAC-SHA256(secret, "<t>.<payload>")>`),
+so the handler's signature check is exercised as in production.
+
+`latency_s` makes each API call block for that long, like the synchronous SDK
+does, to see how checkout behaves when Stripe is slow.
+"""
+
+import hashlib
+import hmac
+import json
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+SIGNATURE_TOLERANCE_S = 300
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: Optional[int] = None) -> str:
+    """Stripe-Signature header value for `payload`."""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signature = hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+def verify_signature(payload: bytes, header: Optional[str], secret: str, tolerance: int = SIGNATURE_TOLERANCE_S) -> bool:
+    if not header:
+        return False
+    items = [part.split("=", 1) for part in header.split(",") if "=" in part]
+    timestamps = [value for key, value in items if key == "t"]
+    signatures = [value for key, value in items if key == "v1"]
+    if not timestamps or not signatures or not timestamps[0].isdigit():
+        return False
+    if abs(time.time() - int(timestamps[0])) > tolerance:
+        return False
+    expected = hmac.new(secret.encode(), f"{timestamps[0]}.".encode() + payload, hashlib.sha256).hexdigest()
+    return any(hmac.compare_digest(expected, signature) for signature in signatures)
+
+
+class SignatureVerificationError(Exception):
+    def __init__(self, message, sig_header=None):
+        super().__init__(message)
+        self.sig_header = sig_header
+
+
+class FakeStripe:
+    def __init__(self, latency_s: float = 0.0):
+        self.api_key = None
+        self.latency_s = latency_s
+        self.sessions: Dict[str, SimpleNamespace] = {}
+        self.error = SimpleNamespace(SignatureVerificationError=SignatureVerificationError)
+        self.checkout = SimpleNamespace(Session=SimpleNamespace(create=self._create, retrieve=self._retrieve))
+        self.Webhook = SimpleNamespace(construct_event=self._construct_event)
+
+    def _call(self):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+
+    def _create(self, line_items, metadata=None, **_params):
+        self._call()
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        price = line_items[0]["price_data"]
+        session = SimpleNamespace(
+            id=session_id,
+            url=f"https://checkout.stripe.test/c/pay/{session_id}",
+            metadata=dict(metadata or {}),
+            status="open",
+            payment_status="unpaid",
+            amount_total=price["unit_amount"] * line_items[0].get("quantity", 1),
+            currency=price["currency"],
+        )
+        self.sessions[session_id] = session
+        return session
+
+    def _retrieve(self, session_id):
+        self._call()
+        return self.sessions[session_id]
+
+    def complete(self, session_id: str) -> dict:
+        """Mark a session paid and return its `checkout.session.completed` event."""
+        session = self.sessions[session_id]
+        session.status, session.payment_status = "complete", "paid"
+        return {
+            "id": f"evt_{uuid.uuid4().hex}",
+            "type": "checkout.session.completed",
+            "data": {"object": {"id": session.id, "metadata": session.metadata, "payment_status": "paid"}},
+        }
+
+    def _construct_event(self, payload, sig_header, secret):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        event = json.loads(payload)  # ValueError on an invalid payload, like the SDK
+        if not verify_signature(payload, sig_header, secret):
+            raise SignatureVerificationError("No signatures found matching the expected signature", sig_header)
+        return event
+
+
+def install(latency_s: float = 0.0) -> FakeStripe:
+    from routes import checkout_routes
+
+    fake = FakeStripe(latency_s)
+    checkout_routes.stripe = fake
+    return fake
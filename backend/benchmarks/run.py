@@ -0,0 +1,201 @@
+"""
+Run the in-process benchmarks and compare them with stored baselines.
+
+The app's lifespan runs as in production (index build, admin seeding, background
+tasks); requests go through httpx's ASGITransport, so the whole middleware stack
+is measured without sockets. The database is the in-memory backend and Stripe is
+benchmarks/fake_stripe.py. Rate limiting is off so the numbers measure the
+handlers, not the 429 path.
+
+    python -m benchmarks.run                               # all scenarios, compare with baselines
+    python -m benchmarks.run -s catalog -s slug_lookup -n 2000 -c 32
+    python -m benchmarks.run --save-baseline               # record the current numbers
+
+Exits with status 1 when a scenario's throughput drops, or its p95 latency
+rises, by more than --tolerance relative to its baseline. Baselines are machine
+specific: record them on the machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# Same development configuration as the test suite, applied by main() before the app is imported
+BENCH_ENVIRONMENT = {
+    "ENVIRONMENT": "development",
+    "DB_BACKEND": "memory",
+    "MONGO_URL": "mongodb://localhost:27017",
+    "DB_NAME": "arar_bench",
+    "STRIPE_SECRET_KEY": "sk_test_benchmark",
+    "STRIPE_WEBHOOK_SECRET": "whsec_benchmark",
+    "CLOUDINARY_CLOUD_NAME": "benchmark",
+    "CLOUDINARY_API_KEY": "benchmark",
+    "CLOUDINARY_API_SECRET": "benchmark",
+    "JWT_SECRET_KEY": "benchmark-secret-key",
+    "RATE_LIMIT_ENABLED": "0",
+    "LOG_LEVEL": "WARNING",
+    "LOOP_WATCHDOG_ENABLED": "0",
+}
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+
+from benchmarks import fake_stripe  # noqa: E402
+from benchmarks.scenarios import SCENARIOS, BenchContext, seed  # noqa: E402
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+async def _measure(ctx: BenchContext, step, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors: List[str] = []
+    next_index = iter(range(requests))
+
+    async def worker():
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                await step(ctx, i)
+            except Exception as e:
+                errors.append(str(e))
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def run_benchmarks(
+    names: List[str],
+    requests: int = 500,
+    concurrency: int = 10,
+    warmup: int = 20,
+    products: int = 200,
+    orders: int = 1000,
+    stripe_latency_s: float = 0.0,
+) -> Dict[str, dict]:
+    from routes import checkout_routes
+    from server import app
+
+    stripe = fake_stripe.install(stripe_latency_s)
+    # Seeded image URLs point at no files; the metadata task's warnings are expected
+    logging.getLogger("services.image_metadata").setLevel(logging.ERROR)
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            ctx = BenchContext(client, stripe, checkout_routes.STRIPE_WEBHOOK_SECRET)
+            await seed(ctx, products, orders)
+            for name in names:
+                step = SCENARIOS[name]
+                for i in range(warmup):
+                    await step(ctx, i)
+                results[name] = await _measure(ctx, step, requests, concurrency)
+    return results
+
+
+def compare(results: Dict[str, dict], baselines: Dict[str, dict], tolerance: float) -> List[str]:
+    """Human-readable regressions of `results` against `baselines`."""
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            continue
+        if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {result['throughput_rps']} rps < baseline {baseline['throughput_rps']} rps"
+            )
+        if result["p95_ms"] > baseline["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms > baseline {baseline['p95_ms']} ms")
+        if result["errors"]:
+            regressions.append(f"{name}: {result['errors']} error(s), first: {result['first_error']}")
+    return regressions
+
+
+def format_table(results: Dict[str, dict], baselines: Dict[str, dict]) -> str:
+    lines = [f"{'scenario':<18} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}  vs baseline"]
+    for name, r in results.items():
+        baseline = baselines.get(name)
+        delta = ""
+        if baseline and baseline["throughput_rps"]:
+            delta = (f"{(r['throughput_rps'] / baseline['throughput_rps'] - 1) * 100:+.1f}% rps, "
+                     f"{(r['p95_ms'] / baseline['p95_ms'] - 1) * 100 if baseline['p95_ms'] else 0:+.1f}% p95")
+        lines.append(
+            f"{name:<18} {r['throughput_rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9} "
+            f"{r['errors']:>7}  {delta}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="In-process API benchmarks")
+    parser.add_argument("-s", "--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="Timed operations per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed operations per scenario")
+    parser.add_argument("--products", type=int, default=200, help="Products in the seeded catalog")
+    parser.add_argument("--orders", type=int, default=1000, help="Orders in the seeded history")
+    parser.add_argument("--stripe-latency-ms", type=float, default=0.0, help="Blocking latency of fake Stripe calls")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baselines JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative throughput drop / p95 increase (default 0.25)")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+    args = parser.parse_args(argv)
+
+    for name, value in BENCH_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+
+    names = args.scenario or list(SCENARIOS)
+    results = asyncio.run(run_benchmarks(
+        names, args.requests, args.concurrency, args.warmup, args.products, args.orders,
+        args.stripe_latency_ms / 1000,
+    ))
+
+    baselines = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    print(json.dumps(results, indent=2) if args.json else format_table(results, baselines))
+
+    if args.save_baseline:
+        baselines.update({name: {k: v for k, v in r.items() if k != "first_error"} for name, r in results.items()})
+        args.baseline.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+        print(f"Baselines written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baselines, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Benchmark scenarios.
+
+A scenario's `step(ctx, i)` is one timed operation, which may span several
+requests (e.g. checkout followed by its webhook). Steps raise on an unexpected
+status so a broken route shows up as errors, not as a fast benchmark.
+"""
+
+import json
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from benchmarks.fake_stripe import FakeStripe, sign_payload
+
+ADMIN_EMAIL = "admin@arar-perfume.com"
+ADMIN_PASSWORD = "ArarAdmin2024!"
+
+
+@dataclass
+class BenchContext:
+    client: httpx.AsyncClient
+    stripe: FakeStripe
+    webhook_secret: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    slugs: List[str] = field(default_factory=list)
+
+
+def _expect(response: httpx.Response, status: int = 200) -> httpx.Response:
+    if response.status_code != status:
+        raise AssertionError(f"{response.request.method} {response.request.url.path}: "
+                             f"{response.status_code} {response.text[:200]}")
+    return response
+
+
+def _product(i: int, prefix: str = "bench") -> dict:
+    now = datetime.now(timezone.utc).isoformat()
+    return {
+        "id": f"{prefix}-{i}",
+        "name": f"BENCH {i}",
+        "slug": f"{prefix}-{i}",
+        "short_description": "A benchmark fragrance.",
+        "long_description": "A benchmark fragrance with a longer description. " * 4,
+        "price": f"${120 + i % 50}",
+        "price_amount": (120 + i % 50) * 100,
+        "currency": "USD",
+        "stock_quantity": 1_000_000,
+        "status": "published",
+        "hero_image_url": f"/uploads/products/{prefix}-{i}.jpg",
+        "gallery_images": [f"/uploads/products/{prefix}-{i}-{n}.jpg" for n in range(3)],
+        "notes_top": ["Bergamot", "Saffron"],
+        "notes_heart": ["Rose", "Incense"],
+        "notes_base": ["Oud", "Amber", "Musk"],
+        "identity": "", "ritual": "", "craft": "",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+async def seed(ctx: BenchContext, products: int, orders: int):
+    """Insert the benchmark catalog and order history and log in as the admin."""
+    from config.database import orders_collection, products_collection
+
+    await products_collection.delete_many({"id": {"$regex": "^bench-"}})
+    await products_collection.insert_many([_product(i) for i in range(products)])
+    ctx.slugs = [f"bench-{i}" for i in range(products)]
+
+    statuses = ["pending", "completed", "delivered", "cancelled"]
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    await orders_collection.delete_many({"id": {"$regex": "^bench-"}})
+    await orders_collection.insert_many([
+        {
+            "id": f"bench-order-{n}",
+            "session_id": f"cs_bench_{n}",
+            "product_id": f"bench-{n % max(products, 1)}",
+            "amount": 150.0,
+            "amount_cents": 15000,
+            "currency": "USD",
+            "payment_status": "paid",
+            "status": statuses[n % len(statuses)],
+            "created_at": (start + timedelta(minutes=n)).isoformat(),
+            "updated_at": (start + timedelta(minutes=n)).isoformat(),
+        }
+        for n in range(orders)
+    ])
+
+    login = _expect(await ctx.client.post(
+        "/api/admin/login", json={"email": ADMIN_EMAIL, "password": ADMIN_PASSWORD}
+    ))
+    ctx.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+
+async def catalog(ctx: BenchContext, i: int):
+    _expect(await ctx.client.get("/api/fragrances"))
+
+
+async def slug_lookup(ctx: BenchContext, i: int):
+    slug = ctx.slugs[random.randrange(len(ctx.slugs))]
+    _expect(await ctx.client.get(f"/api/fragrances/{slug}"))
+
+
+async def admin_crud(ctx: BenchContext, i: int):
+    product = _product(i, prefix=f"crud-{uuid.uuid4().hex[:8]}")
+    for key in ("id", "created_at", "updated_at"):
+        product.pop(key)
+    created = _expect(await ctx.client.post("/api/admin/products", json=product, headers=ctx.headers)).json()
+    path = f"/api/admin/products/{created['id']}"
+    _expect(await ctx.client.get(path, headers=ctx.headers))
+    _expect(await ctx.client.put(path, json={"stock_quantity": 7, "price_amount": 9900}, headers=ctx.headers))
+    _expect(await ctx.client.delete(path, headers=ctx.headers))
+
+
+async def order_listing(ctx: BenchContext, i: int):
+    params = {"status": "completed"} if i % 2 else None
+    _expect(await ctx.client.get("/api/admin/orders", params=params, headers=ctx.headers))
+
+
+async def checkout_webhook(ctx: BenchContext, i: int):
+    slug = ctx.slugs[i % len(ctx.slugs)]
+    session = _expect(await ctx.client.post(
+        "/api/create-checkout-session",
+        json={"fragrance_slug": slug, "origin_url": "https://shop.example"},
+    )).json()
+    payload = json.dumps(ctx.stripe.complete(session["sessionId"])).encode()
+    _expect(await ctx.client.post(
+        "/api/webhook",
+        content=payload,
+        headers={"Stripe-Signature": sign_payload(payload, ctx.webhook_secret), "Content-Type": "application/json"},
+    ))
+
+
+SCENARIOS: Dict[str, Callable[[BenchContext, int], Awaitable[None]]] = {
+    "catalog": catalog,
+    "slug_lookup": slug_lookup,
+    "admin_crud": admin_crud,
+    "order_listing": order_listing,
+    "checkout_webhook": checkout_webhook,
+}
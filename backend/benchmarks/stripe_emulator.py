@@ -0,0 +1,309 @@
+"""
+Local Stripe stand-in for load testing checkout and webhooks.
+
+Emulates the slice of the Stripe API that routes/checkout_routes.py uses:
+
+    POST /v1/checkout/sessions              create a Checkout Session (form-encoded, as the SDK sends it)
+    GET  /v1/checkout/sessions/{id}         retrieve it
+
+plus control endpoints for the load driver:
+
+    POST /_emulator/sessions/{id}/complete  mark the session paid and deliver a signed
+                                            checkout.session.completed webhook
+    GET  /_emulator/config                  current latency / failure settings
+    PUT  /_emulator/config                  change them while a test runs
+
+Webhooks are signed exactly like Stripe's (`Stripe-Signature: t=...,v1=...`),
+so the backend verifies them with its normal STRIPE_WEBHOOK_SECRET. Each API
+call can be delayed (`latency_ms` +/- `jitter_ms`) and can fail with
+`failure_status` at `failure_rate`; failed webhook deliveries are retried up to
+`delivery_retries` times.
+
+Point a running backend at it with STRIPE_API_BASE:
+
+    python -m benchmarks.stripe_emulator --port 12111 \\
+        --webhook-url http://localhost:8001/api/webhook --webhook-secret "$STRIPE_WEBHOOK_SECRET"
+    STRIPE_API_BASE=http://localhost:12111 uvicorn server:app --port 8001
+
+benchmarks/webhook_storm.py drives it, or runs both apps in-process.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, Optional
+
+import httpx
+from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.fake_stripe import FakeStripe, sign_payload
+
+_KEY_TOKEN = re.compile(r"[^\[\]]+")
+
+
+@dataclass
+class EmulatorConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+    failure_status: int = 500
+    webhook_url: Optional[str] = None
+    webhook_secret: str = "whsec_emulator"
+    delivery_retries: int = 3
+    delivery_backoff_s: float = 0.05
+
+
+class EmulatedFailure(Exception):
+    def __init__(self, status: int):
+        super().__init__(f"Injected Stripe failure ({status})")
+        self.status = status
+
+
+def parse_form(items) -> dict:
+    """Decode Stripe's bracketed form encoding (`line_items[0][quantity]=1`) into nested data."""
+    root: dict = {}
+    for key, value in items:
+        tokens = _KEY_TOKEN.findall(key)
+        node = root
+        for token in tokens[:-1]:
+            node = node.setdefault(token, {})
+        node[tokens[-1]] = value
+
+    def listify(node):
+        if not isinstance(node, dict):
+            return node
+        node = {k: listify(v) for k, v in node.items()}
+        if node and all(k.isdigit() for k in node):
+            return [node[k] for k in sorted(node, key=int)]
+        return node
+
+    return listify(root)
+
+
+class StripeEmulator:
+    def __init__(self, config: Optional[EmulatorConfig] = None, webhook_client: Optional[httpx.AsyncClient] = None):
+        self.config = config or EmulatorConfig()
+        self.sessions: Dict[str, dict] = {}
+        self._webhook_client = webhook_client
+        self.stats = {"api_calls": 0, "api_failures": 0, "webhooks_delivered": 0, "webhook_failures": 0}
+
+    # -- API behaviour -------------------------------------------------------
+
+    def _delay_s(self) -> float:
+        latency = self.config.latency_ms + random.uniform(-1, 1) * self.config.jitter_ms
+        return max(0.0, latency) / 1000
+
+    def _maybe_fail(self):
+        self.stats["api_calls"] += 1
+        if self.config.failure_rate and random.random() < self.config.failure_rate:
+            self.stats["api_failures"] += 1
+            raise EmulatedFailure(self.config.failure_status)
+
+    def create_session(self, params: dict) -> dict:
+        self._maybe_fail()
+        session_id = f"cs_test_{uuid.uuid4().hex}"
+        line_items = params.get("line_items") or []
+        amount_total = sum(
+            int(item["price_data"]["unit_amount"]) * int(item.get("quantity", 1)) for item in line_items
+        )
+        session = {
+            "id": session_id,
+            "object": "checkout.session",
+            "url": f"https://checkout.stripe.test/c/pay/{session_id}",
+            "mode": params.get("mode", "payment"),
+            "status": "open",
+            "payment_status": "unpaid",
+            "amount_total": amount_total,
+            "currency": (line_items[0]["price_data"]["currency"] if line_items else "usd"),
+            "metadata": dict(params.get("metadata") or {}),
+            "success_url": params.get("success_url"),
+            "cancel_url": params.get("cancel_url"),
+            "created": int(time.time()),
+        }
+        self.sessions[session_id] = session
+        return session
+
+    def retrieve_session(self, session_id: str) -> dict:
+        self._maybe_fail()
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise KeyError(f"No such checkout.session: '{session_id}'")
+
+    def complete_session(self, session_id: str) -> dict:
+        """Mark the session paid and return its checkout.session.completed event."""
+        session = self.sessions[session_id]
+        session["status"], session["payment_status"] = "complete", "paid"
+        return {
+            "id": f"evt_{uuid.uuid4().hex}",
+            "object": "event",
+            "type": "checkout.session.completed",
+            "created": int(time.time()),
+            "data": {"object": session},
+        }
+
+    # -- webhooks ------------------------------------------------------------
+
+    @property
+    def webhook_client(self) -> httpx.AsyncClient:
+        if self._webhook_client is None:
+            self._webhook_client = httpx.AsyncClient(timeout=10)
+        return self._webhook_client
+
+    async def deliver(self, event: dict) -> dict:
+        """
+        POST `event` to the webhook URL, signed, retrying on errors like Stripe does
+        (with a short backoff instead of hours). Returns the last attempt's outcome.
+        """
+        payload = json.dumps(event).encode()
+        attempts = 0
+        status, error = None, None
+        started = time.perf_counter()
+        while attempts <= self.config.delivery_retries:
+            attempts += 1
+            try:
+                response = await self.webhook_client.post(
+                    self.config.webhook_url,
+                    content=payload,
+                    headers={
+                        "Content-Type": "application/json",
+                        "Stripe-Signature": sign_payload(payload, self.config.webhook_secret),
+                    },
+                )
+                status, error = response.status_code, None
+                if status < 300:
+                    break
+            except httpx.HTTPError as e:
+                status, error = None, str(e)
+            if attempts <= self.config.delivery_retries:
+                await asyncio.sleep(self.config.delivery_backoff_s * 2 ** (attempts - 1))
+        ok = status is not None and status < 300
+        self.stats["webhooks_delivered" if ok else "webhook_failures"] += 1
+        return {
+            "event_id": event["id"],
+            "status": status,
+            "error": error,
+            "attempts": attempts,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    async def close(self):
+        if self._webhook_client is not None:
+            await self._webhook_client.aclose()
+
+
+def _stripe_error(status: int, message: str, error_type: str = "api_error") -> JSONResponse:
+    return JSONResponse({"error": {"type": error_type, "message": message}}, status_code=status)
+
+
+def create_app(emulator: StripeEmulator) -> FastAPI:
+    api = APIRouter()
+
+    @api.post("/v1/checkout/sessions")
+    async def create_checkout_session(request: Request):
+        await asyncio.sleep(emulator._delay_s())
+        params = parse_form((await request.form()).multi_items())
+        try:
+            return emulator.create_session(params)
+        except EmulatedFailure as e:
+            return _stripe_error(e.status, str(e))
+        except (KeyError, ValueError) as e:
+            return _stripe_error(400, f"Invalid request: {e}", "invalid_request_error")
+
+    @api.get("/v1/checkout/sessions/{session_id}")
+    async def retrieve_checkout_session(session_id: str):
+        await asyncio.sleep(emulator._delay_s())
+        try:
+            return emulator.retrieve_session(session_id)
+        except EmulatedFailure as e:
+            return _stripe_error(e.status, str(e))
+        except KeyError as e:
+            return _stripe_error(404, str(e), "invalid_request_error")
+
+    @api.post("/_emulator/sessions/{session_id}/complete")
+    async def complete_checkout_session(session_id: str, deliver: bool = True):
+        if session_id not in emulator.sessions:
+            raise HTTPException(status_code=404, detail="Unknown session")
+        event = emulator.complete_session(session_id)
+        if not deliver or not emulator.config.webhook_url:
+            return {"event": event, "delivery": None}
+        return {"event_id": event["id"], "delivery": await emulator.deliver(event)}
+
+    @api.get("/_emulator/config")
+    async def get_config():
+        return {**asdict(emulator.config), "stats": emulator.stats}
+
+    @api.put("/_emulator/config")
+    async def update_config(changes: dict):
+        known = {f.name for f in fields(EmulatorConfig)}
+        unknown = set(changes) - known
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown settings: {sorted(unknown)}")
+        for name, value in changes.items():
+            setattr(emulator.config, name, value)
+        return asdict(emulator.config)
+
+    app = FastAPI(title="Stripe emulator")
+    app.include_router(api)
+    app.state.emulator = emulator
+    return app
+
+
+class EmulatorSDK(FakeStripe):
+    """
+    Stripe SDK stand-in backed by a StripeEmulator, for running the backend and
+    the emulator in one process. Latency blocks the caller like the real SDK.
+    """
+
+    def __init__(self, emulator: StripeEmulator):
+        super().__init__()
+        self.emulator = emulator
+
+    def _create(self, **params):
+        time.sleep(self.emulator._delay_s())
+        return _StripeObject(self.emulator.create_session(params))
+
+    def _retrieve(self, session_id):
+        time.sleep(self.emulator._delay_s())
+        return _StripeObject(self.emulator.retrieve_session(session_id))
+
+
+class _StripeObject(dict):
+    """Dict with attribute access, like a StripeObject."""
+
+    __getattr__ = dict.get
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Stripe emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--webhook-url", help="Where checkout.session.completed events are delivered")
+    parser.add_argument("--webhook-secret", default=EmulatorConfig.webhook_secret)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-status", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    emulator = StripeEmulator(EmulatorConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        webhook_url=args.webhook_url,
+        webhook_secret=args.webhook_secret,
+    ))
+    uvicorn.run(create_app(emulator), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Webhook storm: measure end-to-end order finalization throughput.
+
+1. Creates --sessions checkout sessions through the backend's
+   /api/create-checkout-session (the backend calls the Stripe emulator).
+2. Completes them at --rate events per second through the emulator, which
+   delivers signed checkout.session.completed webhooks to the backend, with a
+   --duplicates fraction delivered twice, as Stripe's at-least-once delivery does.
+3. Counts the orders that reached "completed" and reports delivery latency
+   percentiles and finalized orders per second.
+
+By default the backend, the emulator and the database all run in this process
+(in-memory backend, ASGI transports, no sockets). Against deployed services:
+
+    python -m benchmarks.stripe_emulator --webhook-url http://localhost:8001/api/webhook \\
+        --webhook-secret "$STRIPE_WEBHOOK_SECRET" &
+    RATE_LIMIT_ENABLED=0 STRIPE_API_BASE=http://localhost:12111 uvicorn server:app --port 8001 &
+    python -m benchmarks.webhook_storm --backend-url http://localhost:8001 \\
+        --emulator-url http://localhost:12111 --sessions 1000 --rate 200
+
+Remote runs need published products, admin credentials (--admin-email,
+--admin-password) and the backend's rate limits off (checkout allows 20
+sessions per minute per IP). Orders are counted from the admin listing, which
+returns at most 1000 orders, so keep --sessions at or below that for exact
+counts.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from contextlib import AsyncExitStack
+from typing import List, Optional
+
+import httpx
+
+from benchmarks.run import BENCH_ENVIRONMENT, percentile
+from benchmarks.scenarios import ADMIN_EMAIL, ADMIN_PASSWORD
+
+
+async def _create_sessions(backend: httpx.AsyncClient, slugs: List[str], count: int, concurrency: int):
+    session_ids, failures = [], 0
+    indexes = iter(range(count))
+
+    async def worker():
+        nonlocal failures
+        for i in indexes:
+            response = await backend.post(
+                "/api/create-checkout-session",
+                json={"fragrance_slug": slugs[i % len(slugs)], "origin_url": "https://shop.example"},
+            )
+            if response.status_code == 200:
+                session_ids.append(response.json()["sessionId"])
+            else:
+                failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return session_ids, failures
+
+
+async def _storm(emulator: httpx.AsyncClient, session_ids: List[str], rate: float, duplicates: float,
+                 concurrency: int) -> dict:
+    deliveries = list(session_ids) + random.sample(session_ids, int(len(session_ids) * duplicates))
+    random.shuffle(deliveries)
+    results, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fire(session_id: str, due: float):
+        nonlocal errors
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        async with semaphore:
+            response = await emulator.post(f"/_emulator/sessions/{session_id}/complete")
+        delivery = response.json().get("delivery") if response.status_code == 200 else None
+        if delivery is None:
+            errors += 1
+        else:
+            results.append(delivery)
+
+    started = time.perf_counter()
+    interval = 1 / rate if rate > 0 else 0
+    await asyncio.gather(*(fire(sid, started + n * interval) for n, sid in enumerate(deliveries)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(d["duration_ms"] for d in results)
+    failed = [d for d in results if not d["status"] or d["status"] >= 300]
+    return {
+        "events": len(deliveries),
+        "elapsed_s": round(elapsed, 3),
+        "event_rate": round(len(deliveries) / elapsed, 1) if elapsed else 0.0,
+        "delivery_failures": len(failed) + errors,
+        "retried_deliveries": sum(1 for d in results if d["attempts"] > 1),
+        "delivery_p50_ms": percentile(latencies, 0.50),
+        "delivery_p95_ms": percentile(latencies, 0.95),
+        "delivery_p99_ms": percentile(latencies, 0.99),
+    }
+
+
+async def _finalized(backend: httpx.AsyncClient, headers: dict, session_ids: List[str]) -> int:
+    response = await backend.get("/api/admin/orders", params={"status": "completed"}, headers=headers)
+    response.raise_for_status()
+    wanted = set(session_ids)
+    return sum(1 for order in response.json() if order.get("session_id") in wanted)
+
+
+async def run_storm(
+    sessions: int = 500,
+    rate: float = 200.0,
+    duplicates: float = 0.1,
+    concurrency: int = 32,
+    latency_ms: float = 0.0,
+    failure_rate: float = 0.0,
+    backend_url: Optional[str] = None,
+    emulator_url: Optional[str] = None,
+    admin_email: str = ADMIN_EMAIL,
+    admin_password: str = ADMIN_PASSWORD,
+) -> dict:
+    async with AsyncExitStack() as stack:
+        if backend_url:
+            backend = await stack.enter_async_context(httpx.AsyncClient(base_url=backend_url, timeout=30))
+            emulator = await stack.enter_async_context(httpx.AsyncClient(base_url=emulator_url, timeout=60))
+            slugs = [p["slug"] for p in (await backend.get("/api/fragrances")).json() if p.get("stock_quantity")]
+            if not slugs:
+                raise SystemExit("The backend has no published products in stock")
+        else:
+            from routes import checkout_routes
+            from server import app
+            from benchmarks.scenarios import BenchContext, seed
+            from benchmarks.stripe_emulator import EmulatorConfig, EmulatorSDK, StripeEmulator, create_app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            backend = await stack.enter_async_context(
+                httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://backend")
+            )
+            core = StripeEmulator(
+                EmulatorConfig(webhook_url="http://backend/api/webhook",
+                               webhook_secret=checkout_routes.STRIPE_WEBHOOK_SECRET),
+                webhook_client=backend,
+            )
+            checkout_routes.stripe = EmulatorSDK(core)
+            emulator = await stack.enter_async_context(
+                httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(core)), base_url="http://stripe")
+            )
+            ctx = BenchContext(backend, checkout_routes.stripe, checkout_routes.STRIPE_WEBHOOK_SECRET)
+            await seed(ctx, products=50, orders=0)
+            slugs = ctx.slugs
+
+        # Injected latency and failures apply to the Stripe API calls made by checkout
+        await emulator.put("/_emulator/config", json={"latency_ms": latency_ms, "failure_rate": failure_rate})
+        session_ids, create_failures = await _create_sessions(backend, slugs, sessions, concurrency)
+
+        storm = await _storm(emulator, session_ids, rate, duplicates, concurrency)
+
+        login = await backend.post("/api/admin/login", json={"email": admin_email, "password": admin_password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        finalized = await _finalized(backend, headers, session_ids)
+
+    return {
+        "sessions": len(session_ids),
+        "session_failures": create_failures,
+        **storm,
+        "orders_finalized": finalized,
+        "finalized_per_s": round(finalized / storm["elapsed_s"], 1) if storm["elapsed_s"] else 0.0,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay checkout.session.completed webhook storms")
+    parser.add_argument("--sessions", type=int, default=500, help="Checkout sessions to create and complete")
+    parser.add_argument("--rate", type=float, default=200.0, help="Webhook events per second (0: as fast as possible)")
+    parser.add_argument("--duplicates", type=float, default=0.1, help="Fraction of events delivered twice")
+    parser.add_argument("-c", "--concurrency", type=int, default=32, help="Deliveries in flight")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Emulated Stripe API latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Injected Stripe API failure rate")
+    parser.add_argument("--backend-url", help="Running backend (default: in-process)")
+    parser.add_argument("--emulator-url", default="http://127.0.0.1:12111", help="Running emulator, with --backend-url")
+    parser.add_argument("--admin-email", default=ADMIN_EMAIL)
+    parser.add_argument("--admin-password", default=ADMIN_PASSWORD)
+    args = parser.parse_args(argv)
+
+    if not args.backend_url:
+        for name, value in BENCH_ENVIRONMENT.items():
+            os.environ.setdefault(name, value)
+
+    report = asyncio.run(run_storm(
+        args.sessions, args.rate, args.duplicates, args.concurrency, args.latency_ms, args.failure_rate,
+        args.backend_url, args.emulator_url, args.admin_email, args.admin_password,
+    ))
+    width = max(len(key) for key in report)
+    for key, value in report.items():
+        print(f"{key:<{width}}  {value}")
+    return 0 if report["orders_finalized"] == report["sessions"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
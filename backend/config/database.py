@@ -1,12 +1,33 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from config.indexes import INDEX_MANIFEST
+from config.query_monitor import QueryMonitor
+from config.settings import DatabaseSettings
+import asyncio
+import logging
 
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-db_name = os.environ.get('DB_NAME', 'test_database')
+logger = logging.getLogger(__name__)
 
-client = AsyncIOMotorClient(mongo_url)
+settings = DatabaseSettings.from_env()
+mongo_url = settings.mongo_url
+db_name = settings.db_name
+
+# Per-command latency, document counts and slow-query log, attributed to routes
+query_monitor = QueryMonitor.from_env()
+
+if settings.backend == "memory":
+    # In-process stand-in for hermetic tests and benchmarks
+    from config.memory_backend import MemoryClient
+    client = MemoryClient()
+else:
+    client = AsyncIOMotorClient(mongo_url, event_listeners=[query_monitor], **settings.client_options())
 db = client[db_name]
 
+# Capabilities of the selected backend. The in-memory one lives inside a single
+# process: nothing stored in it is seen by other workers, and it has no capped
+# collections or tailable cursors.
+shared_across_workers = settings.backend != "memory"
+supports_tailable_cursors = settings.backend != "memory"
+
 # Collections
 products_collection = db.products
 collections_collection = db.collections
@@ -14,32 +35,75 @@ orders_collection = db.orders
 admin_users_collection = db.admin_users
 newsletter_collection = db.newsletter
 contact_inquiries_collection = db.contact_inquiries
+image_assets_collection = db.image_assets
+
+# Read-only catalog view: storefront reads may be served by secondaries.
+# Writes and stock-sensitive reads (checkout) must keep using products_collection.
+catalog_products_collection = db.get_collection(
+    "products", read_preference=settings.catalog_read_preference_object
+)
+
+
+async def _ensure_indexes(collection_name: str, index_models: list) -> list:
+    """
+    Create the manifest indexes of one collection that do not exist yet.
+    Returns the names of the indexes that were built.
+    """
+    collection = db[collection_name]
+    existing = await collection.index_information()
+    missing = [model for model in index_models if model.document["name"] not in existing]
+    if not missing:
+        return []
+    return await collection.create_indexes(missing)
 
 
 async def initialize_database():
     """
-    Initializes the database by creating necessary indexes.
+    Initializes the database by building the index manifest.
+    Collections are processed concurrently and indexes that already exist are skipped.
     """
-    print("Starting database initialization...")
-    # Products indexes
-    print("Creating index: products.id")
-    await products_collection.create_index("id", unique=True)
-    print("Creating index: products.slug")
-    await products_collection.create_index("slug", unique=True)
-    
-    # Orders indexes
-    print("Creating index: orders.id")
-    await orders_collection.create_index("id", unique=True)
-    print("Creating index: orders.session_id")
-    await orders_collection.create_index("session_id", unique=True)
-    print("Creating index: orders.created_at")
-    await orders_collection.create_index("created_at")
-    
-    # Newsletter unique index
-    print("Creating index: newsletter.email")
-    await newsletter_collection.create_index("email", unique=True)
-    
-    print("Database initialization complete: Indexes created.")
+    names = list(INDEX_MANIFEST)
+    results = await asyncio.gather(
+        *(_ensure_indexes(name, INDEX_MANIFEST[name]) for name in names),
+        return_exceptions=True
+    )
+
+    created = 0
+    for name, result in zip(names, results):
+        if isinstance(result, Exception):
+            logger.error("Index build failed for %s: %s", name, result)
+        elif result:
+            created += len(result)
+            logger.info("Created indexes on %s: %s", name, ", ".join(result))
+
+    logger.info("Database initialization complete: %d index(es) created", created)
+
+
+async def warm_connection_pool():
+    """
+    Open `min_pool_size` connections up front by issuing that many concurrent pings,
+    so the first requests after a deploy don't pay TCP/TLS/auth setup.
+    The catalog read preference is pinged as well so secondaries get warmed too.
+    """
+    if settings.backend == "memory" or not settings.warm_pool or settings.min_pool_size <= 0:
+        return
+
+    read_preferences = [client.read_preference]
+    catalog_preference = settings.catalog_read_preference_object
+    if catalog_preference.mode != client.read_preference.mode:
+        read_preferences.append(catalog_preference)
+
+    pings = [
+        db.command("ping", read_preference=preference)
+        for preference in read_preferences
+        for _ in range(settings.min_pool_size)
+    ]
+    results = await asyncio.gather(*pings, return_exceptions=True)
+    failures = [r for r in results if isinstance(r, Exception)]
+    if failures:
+        logger.warning("Connection pool warm-up: %d of %d pings failed (%s)", len(failures), len(pings), failures[0])
+    else:
+        logger.info("Connection pool warmed with %d connection(s)", len(pings))
 
 
 async def get_database():
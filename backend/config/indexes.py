@@ -0,0 +1,45 @@
+"""
+Declarative index manifest.
+
+Every index the application relies on is declared here, grouped by collection.
+`initialize_database` builds the manifest on startup; `utils.query_plan_checker`
+verifies that the query shapes issued by the routes are actually served by it.
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDEX_MANIFEST = {
+    "products": [
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+        IndexModel([("slug", ASCENDING)], name="slug_1", unique=True),
+        IndexModel([("status", ASCENDING)], name="status_1"),
+    ],
+    "collections": [
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+    "orders": [
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+        IndexModel([("session_id", ASCENDING)], name="session_id_1", unique=True),
+        IndexModel([("created_at", ASCENDING)], name="created_at_1"),
+        # Serves the admin order list: filter by status, newest first
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_1_created_at_-1"),
+    ],
+    "admin_users": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+    ],
+    "image_assets": [
+        # Content hash -> stored asset, for upload deduplication
+        IndexModel([("sha256", ASCENDING)], name="sha256_1", unique=True),
+        IndexModel([("public_id", ASCENDING)], name="public_id_1"),
+    ],
+    "newsletter": [
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+    ],
+    "rate_limits": [
+        # Shared rate-limit windows (services/rate_limiter.py) expire at expires_at
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_1", expireAfterSeconds=0),
+    ],
+    "contact_inquiries": [
+        IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    ],
+}
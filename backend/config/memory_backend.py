@@ -0,0 +1,780 @@
+"""
+In-memory MongoDB stand-in.
+
+An in-process, async drop-in for the subset of the Motor API used by the
+application, so the app can be tested, benchmarked and load-tested without a
+MongoDB server. Select it with `DB_BACKEND=memory`.
+
+Supported:
+    find (filter, projection, sort, skip, limit, to_list, async iteration),
+    find_one, find_one_and_update, count_documents,
+    insert_one, insert_many (ordered / unordered),
+    update_one, update_many ($set, $inc, $unset, $setOnInsert, $push, upsert),
+    replace_one, delete_one, delete_many, bulk_write,
+    create_index / create_indexes (unique), index_information, drop
+
+Filters support equality on (dotted) fields, list membership, and the
+operators $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin, $exists, $regex,
+$type, $not, $and, $or and $nor.
+
+Every operation runs synchronously inside its coroutine, so each one is atomic
+with respect to other tasks on the event loop. Equality lookups on single-field
+indexes use a hash index rather than a scan.
+"""
+
+import copy
+import re
+from collections import deque
+from datetime import datetime
+from functools import cmp_to_key
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.operations import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+_MISSING = object()
+
+
+# -- document helpers --------------------------------------------------------
+
+def _get_path(document: Any, path: str) -> Any:
+    """Resolve a dotted path, returning _MISSING when any segment is absent."""
+    current = document
+    for part in path.split("."):
+        if isinstance(current, dict):
+            current = current.get(part, _MISSING)
+        elif isinstance(current, list) and part.isdigit() and int(part) < len(current):
+            current = current[int(part)]
+        else:
+            return _MISSING
+        if current is _MISSING:
+            return _MISSING
+    return current
+
+
+def _set_path(document: dict, path: str, value: Any):
+    parts = path.split(".")
+    current = document
+    for part in parts[:-1]:
+        current = current.setdefault(part, {})
+    current[parts[-1]] = value
+
+
+def _unset_path(document: dict, path: str):
+    parts = path.split(".")
+    current = document
+    for part in parts[:-1]:
+        current = current.get(part)
+        if not isinstance(current, dict):
+            return
+    current.pop(parts[-1], None)
+
+
+# BSON comparison order: null < numbers < strings < objects < arrays < ObjectId < booleans < dates
+def _type_rank(value: Any) -> int:
+    if value is None or value is _MISSING:
+        return 1
+    if isinstance(value, bool):
+        return 8
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, dict):
+        return 4
+    if isinstance(value, list):
+        return 5
+    if isinstance(value, ObjectId):
+        return 7
+    return 9
+
+
+def _compare(a: Any, b: Any) -> int:
+    rank_a, rank_b = _type_rank(a), _type_rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a == 1:
+        return 0
+    try:
+        return (a > b) - (a < b)
+    except TypeError:
+        return (str(a) > str(b)) - (str(a) < str(b))
+
+
+_TYPE_ALIASES = {
+    "double": (float,),
+    "string": (str,),
+    "object": (dict,),
+    "array": (list,),
+    "objectId": (ObjectId,),
+    "bool": (bool,),
+    "date": (datetime,),
+    "null": (type(None),),
+    "int": (int,),
+    "long": (int,),
+    "number": (int, float),
+}
+
+
+def _has_type(value: Any, alias: str) -> bool:
+    if value is _MISSING:
+        return False
+    types = _TYPE_ALIASES.get(alias)
+    if types is None:
+        raise OperationFailure(f"Unsupported $type in memory backend: {alias!r}")
+    if isinstance(value, bool) and alias != "bool":
+        return False
+    return isinstance(value, types)
+
+
+def _values_equal(actual: Any, expected: Any) -> bool:
+    if actual is _MISSING:
+        return expected is None
+    if isinstance(actual, list) and not isinstance(expected, list):
+        return any(_values_equal(item, expected) for item in actual)
+    return _type_rank(actual) == _type_rank(expected) and actual == expected
+
+
+def _match_operator(actual: Any, operator: str, operand: Any) -> bool:
+    if operator == "$eq":
+        return _values_equal(actual, operand)
+    if operator == "$ne":
+        return not _values_equal(actual, operand)
+    if operator == "$in":
+        return any(_values_equal(actual, item) for item in operand)
+    if operator == "$nin":
+        return not any(_values_equal(actual, item) for item in operand)
+    if operator == "$exists":
+        return (actual is not _MISSING) == bool(operand)
+    if operator in ("$gt", "$gte", "$lt", "$lte"):
+        if actual is _MISSING:
+            return False
+        candidates = actual if isinstance(actual, list) else [actual]
+        for candidate in candidates:
+            if _type_rank(candidate) != _type_rank(operand):
+                continue
+            result = _compare(candidate, operand)
+            if (operator == "$gt" and result > 0 or operator == "$gte" and result >= 0
+                    or operator == "$lt" and result < 0 or operator == "$lte" and result <= 0):
+                return True
+        return False
+    if operator == "$regex":
+        pattern = operand if hasattr(operand, "search") else re.compile(operand)
+        candidates = actual if isinstance(actual, list) else [actual]
+        return any(isinstance(c, str) and pattern.search(c) for c in candidates)
+    if operator == "$type":
+        aliases = operand if isinstance(operand, list) else [operand]
+        candidates = actual if isinstance(actual, list) and "array" not in aliases else [actual]
+        return any(_has_type(c, alias) for c in candidates for alias in aliases)
+    if operator == "$not":
+        if isinstance(operand, dict):
+            return not all(_match_operator(actual, op, value) for op, value in operand.items())
+        return not _match_operator(actual, "$regex", operand)
+    if operator == "$options":
+        return True
+    raise OperationFailure(f"Unsupported query operator in memory backend: {operator}")
+
+
+def matches(document: dict, query: Optional[dict]) -> bool:
+    """True when `document` satisfies the Mongo `query`."""
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, sub) for sub in condition):
+                return False
+        else:
+            actual = _get_path(document, key)
+            if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+                if "$regex" in condition and "$options" in condition:
+                    flags = re.IGNORECASE if "i" in condition["$options"] else 0
+                    condition = dict(condition, **{"$regex": re.compile(condition["$regex"], flags)})
+                if not all(_match_operator(actual, op, operand) for op, operand in condition.items()):
+                    return False
+            elif isinstance(condition, re.Pattern):
+                if not _match_operator(actual, "$regex", condition):
+                    return False
+            elif not _values_equal(actual, condition):
+                return False
+    return True
+
+
+def _apply_projection(document: dict, projection: Optional[dict]) -> dict:
+    result = copy.deepcopy(document)
+    if not projection:
+        return result
+    include_id = projection.get("_id", 1)
+    fields = {k: v for k, v in projection.items() if k != "_id"}
+    if fields and all(fields.values()):
+        projected = {}
+        for path in fields:
+            value = _get_path(result, path)
+            if value is not _MISSING:
+                _set_path(projected, path, value)
+        if include_id and "_id" in result:
+            projected["_id"] = result["_id"]
+        return projected
+    for path, flag in fields.items():
+        if not flag:
+            _unset_path(result, path)
+    if not include_id:
+        result.pop("_id", None)
+    return result
+
+
+def _normalize_sort(key_or_list, direction=None) -> List[tuple]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction if direction is not None else 1)]
+    if isinstance(key_or_list, dict):
+        return list(key_or_list.items())
+    return [tuple(item) for item in key_or_list]
+
+
+def _sort_documents(documents: List[dict], sort_spec: List[tuple]) -> List[dict]:
+    def comparator(a, b):
+        for path, direction in sort_spec:
+            result = _compare(_get_path(a, path), _get_path(b, path))
+            if result:
+                return result if direction >= 0 else -result
+        return 0
+    return sorted(documents, key=cmp_to_key(comparator))
+
+
+def _apply_update(document: dict, update: dict, inserting: bool = False) -> bool:
+    """Apply an update document in place. Returns True when the document changed."""
+    if not update or not all(key.startswith("$") for key in update):
+        raise OperationFailure("Update document requires atomic operators")
+    before = copy.deepcopy(document)
+    for operator, fields in update.items():
+        if operator == "$set":
+            for path, value in fields.items():
+                _set_path(document, path, copy.deepcopy(value))
+        elif operator == "$setOnInsert":
+            if inserting:
+                for path, value in fields.items():
+                    _set_path(document, path, copy.deepcopy(value))
+        elif operator == "$inc":
+            for path, amount in fields.items():
+                current = _get_path(document, path)
+                _set_path(document, path, (0 if current is _MISSING else current) + amount)
+        elif operator == "$unset":
+            for path in fields:
+                _unset_path(document, path)
+        elif operator == "$push":
+            for path, value in fields.items():
+                current = _get_path(document, path)
+                items = [] if current is _MISSING else list(current)
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                else:
+                    items.append(copy.deepcopy(value))
+                _set_path(document, path, items)
+        else:
+            raise OperationFailure(f"Unsupported update operator in memory backend: {operator}")
+    return document != before
+
+
+def _upsert_seed(query: dict) -> dict:
+    """Equality fields of a query become the base of an upserted document."""
+    seed = {}
+    for key, condition in (query or {}).items():
+        if key.startswith("$"):
+            continue
+        if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+            if "$eq" in condition:
+                _set_path(seed, key, copy.deepcopy(condition["$eq"]))
+            continue
+        _set_path(seed, key, copy.deepcopy(condition))
+    return seed
+
+
+def _hashable(value: Any):
+    if isinstance(value, (str, int, float, bool, ObjectId)) or value is None:
+        return (_type_rank(value), value)
+    return _MISSING
+
+
+# -- indexes -----------------------------------------------------------------
+
+class _MemoryIndex:
+    def __init__(self, name: str, keys: List[tuple], unique: bool = False):
+        self.name = name
+        self.keys = keys
+        self.unique = unique
+        # Single-field indexes keep a hash map for equality lookups
+        self.hashed: Optional[Dict[Any, set]] = {} if len(keys) == 1 else None
+        self.unhashable: set = set()
+
+    @property
+    def field(self) -> str:
+        return self.keys[0][0]
+
+    def key_of(self, document: dict) -> tuple:
+        values = []
+        for path, _direction in self.keys:
+            value = _get_path(document, path)
+            values.append(None if value is _MISSING else value)
+        return tuple(values)
+
+    def add(self, doc_id, document: dict):
+        if self.hashed is None:
+            return
+        value = _get_path(document, self.field)
+        entries = value if isinstance(value, list) and value else [None if value is _MISSING else value]
+        for entry in entries:
+            key = _hashable(entry)
+            if key is _MISSING:
+                self.unhashable.add(doc_id)
+            else:
+                self.hashed.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id, document: dict):
+        if self.hashed is None:
+            return
+        self.unhashable.discard(doc_id)
+        value = _get_path(document, self.field)
+        entries = value if isinstance(value, list) and value else [None if value is _MISSING else value]
+        for entry in entries:
+            key = _hashable(entry)
+            if key is not _MISSING and key in self.hashed:
+                self.hashed[key].discard(doc_id)
+                if not self.hashed[key]:
+                    del self.hashed[key]
+
+    def info(self) -> dict:
+        info = {"v": 2, "key": list(self.keys)}
+        if self.unique:
+            info["unique"] = True
+        return info
+
+
+def _index_name(keys: List[tuple]) -> str:
+    return "_".join(f"{path}_{direction}" for path, direction in keys)
+
+
+# -- cursor ------------------------------------------------------------------
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", query: Optional[dict], projection: Optional[dict]):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort: List[tuple] = []
+        self._skip = 0
+        self._limit = 0
+        self._buffer: Optional[deque] = None
+
+    def sort(self, key_or_list, direction=None) -> "MemoryCursor":
+        self._sort.extend(_normalize_sort(key_or_list, direction))
+        return self
+
+    def skip(self, count: int) -> "MemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, _size: int) -> "MemoryCursor":
+        return self
+
+    def _materialize(self) -> deque:
+        documents = self._collection._select(self._query)
+        if self._sort:
+            documents = _sort_documents(documents, self._sort)
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        # A deque, so iteration and batched to_list() pop from the front in O(1)
+        return deque(_apply_projection(doc, self._projection) for doc in documents)
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        if self._buffer is None:
+            self._buffer = self._materialize()
+        if length is None or length >= len(self._buffer):
+            result, self._buffer = list(self._buffer), deque()
+        else:
+            result = [self._buffer.popleft() for _ in range(length)]
+        return result
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        if self._buffer is None:
+            self._buffer = self._materialize()
+        if not self._buffer:
+            raise StopAsyncIteration
+        return self._buffer.popleft()
+
+    async def explain(self) -> dict:
+        return {"queryPlanner": {"winningPlan": {"stage": self._collection._plan_stage(self._query)}}}
+
+
+# -- collection / database / client ------------------------------------------
+
+class MemoryCollection:
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._documents: Dict[Any, dict] = {}
+        self._sequence: Dict[Any, int] = {}
+        self._next_sequence = 0
+        self._indexes: Dict[str, _MemoryIndex] = {"_id_": _MemoryIndex("_id_", [("_id", 1)], unique=True)}
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.database.name}.{self.name}"
+
+    def with_options(self, **_options) -> "MemoryCollection":
+        return self
+
+    # internal helpers
+
+    def _candidate_ids(self, query: dict) -> Optional[Iterable]:
+        """Use a single-field hash index for a top-level equality condition, if one applies."""
+        for key, condition in query.items():
+            if key.startswith("$"):
+                continue
+            if isinstance(condition, dict) and any(k.startswith("$") for k in condition):
+                if set(condition) != {"$eq"}:
+                    continue
+                condition = condition["$eq"]
+            hashed_key = _hashable(condition)
+            if hashed_key is _MISSING:
+                continue
+            for index in self._indexes.values():
+                if index.hashed is not None and index.field == key:
+                    return list(index.hashed.get(hashed_key, ())) + list(index.unhashable)
+        return None
+
+    def _plan_stage(self, query: dict) -> str:
+        return "COLLSCAN" if self._candidate_ids(query or {}) is None else "IXSCAN"
+
+    def _select(self, query: Optional[dict], limit: int = 0) -> List[dict]:
+        query = query or {}
+        candidate_ids = self._candidate_ids(query)
+        if candidate_ids is None:
+            candidates = self._documents.values()
+        else:
+            # Keep natural (insertion) order, as a collection scan would
+            ordered_ids = sorted(set(candidate_ids), key=lambda doc_id: self._sequence.get(doc_id, -1))
+            candidates = [self._documents[doc_id] for doc_id in ordered_ids if doc_id in self._documents]
+        selected = []
+        for document in candidates:
+            if matches(document, query):
+                selected.append(document)
+                if limit and len(selected) >= limit:
+                    break
+        return selected
+
+    def _check_unique(self, document: dict, ignore_id=None):
+        for index in self._indexes.values():
+            if not index.unique:
+                continue
+            key = index.key_of(document)
+            if index.hashed is not None:
+                hashed_key = _hashable(key[0])
+                if hashed_key is not _MISSING:
+                    owners = index.hashed.get(hashed_key, set()) - {ignore_id}
+                    if owners:
+                        self._raise_duplicate(index, key)
+                    continue
+            for doc_id, other in self._documents.items():
+                if doc_id != ignore_id and index.key_of(other) == key:
+                    self._raise_duplicate(index, key)
+
+    def _raise_duplicate(self, index: _MemoryIndex, key: tuple):
+        key_desc = dict(zip((path for path, _ in index.keys), key))
+        message = f"E11000 duplicate key error collection: {self.full_name} index: {index.name} dup key: {key_desc}"
+        raise DuplicateKeyError(message, 11000, {"code": 11000, "errmsg": message, "keyValue": key_desc})
+
+    def _store(self, document: dict):
+        doc_id = document["_id"]
+        if doc_id not in self._sequence:
+            self._sequence[doc_id] = self._next_sequence
+            self._next_sequence += 1
+        self._documents[doc_id] = document
+        for index in self._indexes.values():
+            index.add(doc_id, document)
+
+    def _unstore(self, document: dict, keep_position: bool = False):
+        doc_id = document["_id"]
+        for index in self._indexes.values():
+            index.remove(doc_id, document)
+        if keep_position:
+            return
+        del self._documents[doc_id]
+        del self._sequence[doc_id]
+
+    def _insert(self, document: dict) -> Any:
+        if "_id" not in document:
+            # Like pymongo, the caller's document receives the generated _id
+            document["_id"] = ObjectId()
+        stored = copy.deepcopy(document)
+        self._check_unique(stored)
+        self._store(stored)
+        return stored["_id"]
+
+    def _update_document(self, document: dict, update: dict, inserting: bool = False) -> bool:
+        updated = copy.deepcopy(document)
+        changed = _apply_update(updated, update, inserting=inserting)
+        if not changed:
+            return False
+        if updated.get("_id") != document["_id"]:
+            raise OperationFailure("Performing an update on the path '_id' would modify the immutable field '_id'")
+        self._check_unique(updated, ignore_id=document["_id"])
+        self._unstore(document, keep_position=True)
+        self._store(updated)
+        return True
+
+    def _update(self, query: dict, update: dict, upsert: bool, many: bool) -> UpdateResult:
+        targets = self._select(query, limit=0 if many else 1)
+        if not targets and upsert:
+            document = _upsert_seed(query)
+            _apply_update(document, update, inserting=True)
+            upserted_id = self._insert(document)
+            return UpdateResult({"n": 1, "nModified": 0, "upserted": upserted_id}, True)
+        modified = sum(1 for document in targets if self._update_document(document, update))
+        return UpdateResult({"n": len(targets), "nModified": modified}, True)
+
+    def _replace(self, query: dict, replacement: dict, upsert: bool) -> UpdateResult:
+        targets = self._select(query, limit=1)
+        if not targets:
+            if upsert:
+                document = copy.deepcopy(replacement)
+                upserted_id = self._insert(document)
+                return UpdateResult({"n": 1, "nModified": 0, "upserted": upserted_id}, True)
+            return UpdateResult({"n": 0, "nModified": 0}, True)
+        existing = targets[0]
+        document = copy.deepcopy(replacement)
+        document["_id"] = existing["_id"]
+        self._check_unique(document, ignore_id=existing["_id"])
+        self._unstore(existing, keep_position=True)
+        self._store(document)
+        return UpdateResult({"n": 1, "nModified": int(document != existing)}, True)
+
+    def _delete(self, query: dict, many: bool) -> int:
+        targets = self._select(query, limit=0 if many else 1)
+        for document in targets:
+            self._unstore(document)
+        return len(targets)
+
+    # public async API
+
+    def find(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> MemoryCursor:
+        cursor = MemoryCursor(self, filter, projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        if kwargs.get("skip"):
+            cursor.skip(kwargs["skip"])
+        if kwargs.get("limit"):
+            cursor.limit(kwargs["limit"])
+        return cursor
+
+    async def find_one(self, filter: Optional[dict] = None, projection: Optional[dict] = None, **kwargs) -> Optional[dict]:
+        if kwargs.get("sort"):
+            documents = await self.find(filter, projection, sort=kwargs["sort"]).limit(1).to_list(1)
+            return documents[0] if documents else None
+        documents = self._select(filter, limit=1)
+        return _apply_projection(documents[0], projection) if documents else None
+
+    async def find_one_and_update(self, filter: dict, update: dict, projection: Optional[dict] = None,
+                                  upsert: bool = False, return_document=ReturnDocument.BEFORE, **_kwargs) -> Optional[dict]:
+        targets = self._select(filter, limit=1)
+        if not targets:
+            if not upsert:
+                return None
+            document = _upsert_seed(filter)
+            _apply_update(document, update, inserting=True)
+            self._insert(document)
+            if return_document == ReturnDocument.AFTER:
+                return _apply_projection(self._documents[document["_id"]], projection)
+            return None
+        before = copy.deepcopy(targets[0])
+        self._update_document(targets[0], update)
+        if return_document == ReturnDocument.AFTER:
+            return _apply_projection(self._documents[before["_id"]], projection)
+        return _apply_projection(before, projection)
+
+    async def find_one_and_delete(self, filter: dict, projection: Optional[dict] = None, **_kwargs) -> Optional[dict]:
+        targets = self._select(filter, limit=1)
+        if not targets:
+            return None
+        self._unstore(targets[0])
+        return _apply_projection(targets[0], projection)
+
+    async def count_documents(self, filter: Optional[dict] = None, **_kwargs) -> int:
+        return len(self._select(filter))
+
+    async def estimated_document_count(self, **_kwargs) -> int:
+        return len(self._documents)
+
+    async def insert_one(self, document: dict, **_kwargs) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True, **_kwargs) -> InsertManyResult:
+        inserted_ids, write_errors = [], []
+        for position, document in enumerate(documents):
+            try:
+                inserted_ids.append(self._insert(document))
+            except DuplicateKeyError as exc:
+                write_errors.append({"index": position, "code": 11000, "errmsg": str(exc), "op": document})
+                if ordered:
+                    break
+        if write_errors:
+            raise BulkWriteError({
+                "writeErrors": write_errors, "writeConcernErrors": [], "nInserted": len(inserted_ids),
+                "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "upserted": [],
+            })
+        return InsertManyResult(inserted_ids, True)
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **_kwargs) -> UpdateResult:
+        return self._update(filter, update, upsert, many=False)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, **_kwargs) -> UpdateResult:
+        return self._update(filter, update, upsert, many=True)
+
+    async def replace_one(self, filter: dict, replacement: dict, upsert: bool = False, **_kwargs) -> UpdateResult:
+        return self._replace(filter, replacement, upsert)
+
+    async def delete_one(self, filter: dict, **_kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, many=False)}, True)
+
+    async def delete_many(self, filter: dict, **_kwargs) -> DeleteResult:
+        return DeleteResult({"n": self._delete(filter, many=True)}, True)
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True, **_kwargs) -> BulkWriteResult:
+        totals = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0,
+                  "upserted": [], "writeErrors": [], "writeConcernErrors": []}
+        for position, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    totals["nInserted"] += 1
+                    continue
+                if isinstance(request, (UpdateOne, UpdateMany)):
+                    result = self._update(request._filter, request._doc, bool(request._upsert),
+                                          many=isinstance(request, UpdateMany))
+                elif isinstance(request, ReplaceOne):
+                    result = self._replace(request._filter, request._doc, bool(request._upsert))
+                elif isinstance(request, (DeleteOne, DeleteMany)):
+                    totals["nRemoved"] += self._delete(request._filter, many=isinstance(request, DeleteMany))
+                    continue
+                else:
+                    raise OperationFailure(f"Unsupported bulk operation: {type(request).__name__}")
+                if result.upserted_id is not None:
+                    totals["nUpserted"] += 1
+                    totals["upserted"].append({"index": position, "_id": result.upserted_id})
+                else:
+                    totals["nMatched"] += result.matched_count
+                    totals["nModified"] += result.modified_count
+            except DuplicateKeyError as exc:
+                totals["writeErrors"].append({"index": position, "code": 11000, "errmsg": str(exc), "op": request})
+                if ordered:
+                    break
+        if totals["writeErrors"]:
+            raise BulkWriteError(totals)
+        return BulkWriteResult(totals, True)
+
+    async def create_index(self, keys, unique: bool = False, name: Optional[str] = None, **_kwargs) -> str:
+        key_list = _normalize_sort(keys, 1)
+        index_name = name or _index_name(key_list)
+        if index_name in self._indexes:
+            return index_name
+        index = _MemoryIndex(index_name, key_list, unique=unique)
+        seen = set()
+        for doc_id, document in self._documents.items():
+            if unique:
+                key = repr(index.key_of(document))
+                if key in seen:
+                    self._raise_duplicate(index, index.key_of(document))
+                seen.add(key)
+            index.add(doc_id, document)
+        self._indexes[index_name] = index
+        return index_name
+
+    async def create_indexes(self, indexes: List[IndexModel], **_kwargs) -> List[str]:
+        names = []
+        for model in indexes:
+            spec = model.document
+            names.append(await self.create_index(list(spec["key"].items()), unique=spec.get("unique", False),
+                                                 name=spec.get("name")))
+        return names
+
+    async def index_information(self) -> dict:
+        return {name: index.info() for name, index in self._indexes.items()}
+
+    async def drop_index(self, name: str):
+        self._indexes.pop(name, None)
+
+    async def drop(self):
+        self._documents.clear()
+        self._sequence.clear()
+        self._indexes = {"_id_": _MemoryIndex("_id_", [("_id", 1)], unique=True)}
+
+
+class MemoryDatabase:
+    def __init__(self, client: "MemoryClient", name: str):
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self._collections:
+            self._collections[name] = MemoryCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def get_collection(self, name: str, **_options) -> MemoryCollection:
+        # Read preferences and write concerns have no meaning in-process
+        return self[name]
+
+    async def list_collection_names(self, **_kwargs) -> List[str]:
+        return list(self._collections)
+
+    async def drop_collection(self, name: str):
+        self._collections.pop(name, None)
+
+    async def command(self, command, value: Any = 1, **_kwargs) -> dict:
+        name = command if isinstance(command, str) else next(iter(command))
+        if name == "ping":
+            return {"ok": 1.0}
+        raise OperationFailure(f"Unsupported command in memory backend: {name}")
+
+
+class MemoryClient:
+    """Stand-in for AsyncIOMotorClient."""
+
+    def __init__(self, *_args, **_kwargs):
+        self._databases: Dict[str, MemoryDatabase] = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self._databases:
+            self._databases[name] = MemoryDatabase(self, name)
+        return self._databases[name]
+
+    def get_database(self, name: str, **_options) -> MemoryDatabase:
+        return self[name]
+
+    @property
+    def admin(self) -> MemoryDatabase:
+        return self["admin"]
+
+    async def drop_database(self, name: str):
+        self._databases.pop(name, None)
+
+    def close(self):
+        pass
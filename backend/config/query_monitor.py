@@ -0,0 +1,213 @@
+"""
+MongoDB command monitoring.
+
+`QueryMonitor` is a pymongo `CommandListener` registered on the application
+client. For every command it records:
+  - latency histograms per (collection, command)
+  - documents returned/affected per (collection, command)
+  - per-route latency, attributed through `middleware.request_context`
+  - a bounded slow-query log with normalized query shapes
+  - a `db` span on the issuing request's trace (see services/tracing.py)
+
+Configuration:
+    MONGO_SLOW_QUERY_MS    Threshold for the slow-query log (default 100)
+    MONGO_SLOW_QUERY_LOG   Number of slow queries kept in memory (default 200)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from pymongo import monitoring
+
+from middleware.request_context import current_route
+from services.metrics import CounterFamily, HistogramFamily, DEFAULT_COUNT_BUCKETS
+from services.tracing import current_trace
+
+logger = logging.getLogger(__name__)
+
+# Handshake, auth and topology chatter: not application queries
+IGNORED_COMMANDS = frozenset({
+    "hello", "ismaster", "isMaster", "ping", "buildinfo", "buildInfo",
+    "saslStart", "saslContinue", "authenticate", "getnonce", "endSessions",
+    "killCursors", "listIndexes",
+})
+
+# Command name -> key of the command document holding the filter
+_FILTER_KEYS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "delete": "deletes",
+    "update": "updates",
+}
+
+_MAX_SHAPE_DEPTH = 6
+
+
+def normalize_shape(value, depth: int = 0):
+    """
+    Replace literal values by "?" while keeping field names and operators, so that
+    {"slug": "iron-silk", "status": "published"} and {"slug": "x", "status": "draft"}
+    share the shape {"slug": "?", "status": "?"}. Lists of operands collapse to one entry.
+    """
+    if depth > _MAX_SHAPE_DEPTH:
+        return "..."
+    if isinstance(value, dict):
+        return {key: normalize_shape(sub, depth + 1) for key, sub in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return []
+        return [normalize_shape(value[0], depth + 1)]
+    return "?"
+
+
+def _collection_of(command_name: str, command: dict) -> str:
+    if command_name == "getMore":
+        return str(command.get("collection", "?"))
+    target = command.get(command_name)
+    return target if isinstance(target, str) else "?"
+
+
+def _query_shape(command_name: str, command: dict) -> Optional[dict]:
+    if command_name == "aggregate":
+        return {"pipeline": normalize_shape(command.get("pipeline", []))}
+    key = _FILTER_KEYS.get(command_name)
+    if key is None:
+        return None
+    if command_name in ("update", "delete"):
+        statements = command.get(key) or [{}]
+        return {"filter": normalize_shape(statements[0].get("q", {}))}
+    shape = {"filter": normalize_shape(command.get(key, {}))}
+    if command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+
+def _documents_in_reply(command_name: str, reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+class QueryMonitor(monitoring.CommandListener):
+    def __init__(self, slow_query_ms: float = 100.0, slow_log_size: int = 200, registry=None):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.slow_queries = deque(maxlen=slow_log_size)
+
+        self.latency = HistogramFamily(
+            "mongo_command_duration_seconds",
+            "MongoDB command latency by collection and command",
+            ("collection", "command"),
+            registry=registry,
+        )
+        self.route_latency = HistogramFamily(
+            "mongo_route_command_duration_seconds",
+            "MongoDB command latency by issuing route",
+            ("route", "collection", "command"),
+            registry=registry,
+        )
+        self.documents = HistogramFamily(
+            "mongo_command_documents",
+            "Documents returned or affected per MongoDB command",
+            ("collection", "command"),
+            buckets=DEFAULT_COUNT_BUCKETS,
+            registry=registry,
+        )
+        self.failures = CounterFamily(
+            "mongo_command_failures_total",
+            "Failed MongoDB commands by collection and command",
+            ("collection", "command"),
+            registry=registry,
+        )
+
+    @classmethod
+    def from_env(cls) -> "QueryMonitor":
+        return cls(
+            slow_query_ms=float(os.environ.get("MONGO_SLOW_QUERY_MS", "100")),
+            slow_log_size=int(os.environ.get("MONGO_SLOW_QUERY_LOG", "200")),
+        )
+
+    # -- pymongo callbacks (run on Motor's executor threads) -----------------
+
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        key = (event.connection_id, event.request_id)
+        with self._lock:
+            self._pending[key] = (
+                _collection_of(event.command_name, event.command),
+                _query_shape(event.command_name, event.command),
+                current_route(),
+                current_trace.get(),
+            )
+
+    def succeeded(self, event):
+        pending = self._pop(event)
+        if pending is None:
+            return
+        collection, shape, route, trace = pending
+        command = event.command_name
+        seconds = event.duration_micros / 1_000_000
+        documents = _documents_in_reply(command, event.reply)
+        if trace is not None:
+            trace.add(f"mongo.{collection}.{command}", "db", time.perf_counter() - seconds, seconds,
+                      {"documents": documents})
+
+        self.latency.observe(seconds, collection, command)
+        self.route_latency.observe(seconds, route, collection, command)
+        self.documents.observe(documents, collection, command)
+
+        duration_ms = seconds * 1000
+        if duration_ms >= self.slow_query_ms:
+            entry = {
+                "at": time.time(),
+                "route": route,
+                "collection": collection,
+                "command": command,
+                "duration_ms": round(duration_ms, 2),
+                "documents": documents,
+                "shape": shape,
+            }
+            self.slow_queries.append(entry)
+            logger.warning("Slow query %.1fms on %s.%s from %s: %s", duration_ms, collection, command, route, shape)
+
+    def failed(self, event):
+        pending = self._pop(event)
+        if pending is None:
+            return
+        collection, _shape, _route, trace = pending
+        self.failures.inc(collection, event.command_name)
+        if trace is not None:
+            seconds = event.duration_micros / 1_000_000
+            trace.add(f"mongo.{collection}.{event.command_name}", "db", time.perf_counter() - seconds, seconds,
+                      {"failed": True})
+
+    def _pop(self, event):
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), None)
+
+    # -- reporting -----------------------------------------------------------
+
+    def snapshot(self) -> dict:
+        routes = {}
+        for (route, collection, command), stats in self.route_latency.snapshot().items():
+            routes.setdefault(route, {})[f"{collection}.{command}"] = stats
+        return {
+            "commands": {f"{c}.{cmd}": stats for (c, cmd), stats in self.latency.snapshot().items()},
+            "routes": routes,
+            "documents": {f"{c}.{cmd}": stats for (c, cmd), stats in self.documents.snapshot().items()},
+            "failures": {f"{c}.{cmd}": value for (c, cmd), value in self.failures.items()},
+            "slow_query_ms": self.slow_query_ms,
+            "slow_queries": list(self.slow_queries),
+        }
@@ -0,0 +1,176 @@
+"""
+Typed database settings.
+
+All MongoDB client tuning is read from the environment once, validated here and
+handed to `AsyncIOMotorClient` by `config.database`.
+
+Environment variables (all optional except the connection string):
+    MONGO_URL / DATABASE_URL             Connection string
+    DB_NAME                              Database name
+    MONGO_MAX_POOL_SIZE                  Max connections per server (default 100)
+    MONGO_MIN_POOL_SIZE                  Connections kept open and warmed at startup (default 10)
+    MONGO_MAX_IDLE_TIME_MS               Close pooled connections idle for longer (default 300000)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS          Max wait for a free pooled connection (default 5000)
+    MONGO_SERVER_SELECTION_TIMEOUT_MS    Max wait for a suitable server (default 5000)
+    MONGO_CONNECT_TIMEOUT_MS             TCP connect timeout (default 5000)
+    MONGO_SOCKET_TIMEOUT_MS              Per-operation socket timeout, 0 = none (default 0)
+    MONGO_COMPRESSORS                    Wire compressors in preference order (default "zstd,zlib")
+    MONGO_ZLIB_COMPRESSION_LEVEL         -1..9 (default 6)
+    MONGO_CATALOG_READ_PREFERENCE        Read preference for catalog reads (default "primaryPreferred")
+    MONGO_CATALOG_MAX_STALENESS_S        Max secondary staleness for catalog reads, >= 90 (default unset)
+    MONGO_WARM_POOL                      Open MIN_POOL_SIZE connections at startup (default true)
+    DB_BACKEND                           "mongo" (default) or "memory" for the in-process stand-in
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_PREFERENCE_MODES = {
+    "primary": Primary,
+    "primarypreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondarypreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+# Compressor name -> module that must be importable for pymongo to use it
+_COMPRESSOR_MODULES = {
+    "zstd": "zstandard",
+    "snappy": "snappy",
+    "zlib": "zlib",
+}
+
+
+def _env_int(name: str, default: Optional[int]) -> Optional[int]:
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer, got '{raw}'")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    raw = os.environ.get(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _available_compressors(requested: List[str]) -> List[str]:
+    """Drop compressors whose support library is not installed."""
+    available = []
+    for name in requested:
+        module = _COMPRESSOR_MODULES.get(name)
+        if module is None:
+            raise ValueError(f"Unsupported MongoDB compressor: '{name}'")
+        try:
+            __import__(module)
+        except ImportError:
+            logger.warning("MongoDB compressor '%s' requested but '%s' is not installed; skipping", name, module)
+            continue
+        available.append(name)
+    return available
+
+
+def build_read_preference(mode: str, max_staleness_s: Optional[int] = None):
+    """Build a pymongo read preference object from its mode name."""
+    pref_class = READ_PREFERENCE_MODES.get(mode.replace("_", "").lower())
+    if pref_class is None:
+        raise ValueError(f"Unknown read preference '{mode}'. Use one of: {', '.join(READ_PREFERENCE_MODES)}")
+    if pref_class is Primary:
+        return Primary()
+    return pref_class(max_staleness=max_staleness_s if max_staleness_s is not None else -1)
+
+
+DB_BACKENDS = ("mongo", "memory")
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    backend: str = "mongo"
+    mongo_url: str = "mongodb://localhost:27017"
+    db_name: str = "test_database"
+    max_pool_size: int = 100
+    min_pool_size: int = 10
+    max_idle_time_ms: int = 300000
+    wait_queue_timeout_ms: int = 5000
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 5000
+    socket_timeout_ms: int = 0
+    compressors: List[str] = field(default_factory=lambda: ["zstd", "zlib"])
+    zlib_compression_level: int = 6
+    catalog_read_preference: str = "primaryPreferred"
+    catalog_max_staleness_s: Optional[int] = None
+    warm_pool: bool = True
+
+    def __post_init__(self):
+        if self.backend not in DB_BACKENDS:
+            raise ValueError(f"DB_BACKEND must be one of: {', '.join(DB_BACKENDS)}")
+        if self.min_pool_size > self.max_pool_size:
+            raise ValueError("MONGO_MIN_POOL_SIZE cannot exceed MONGO_MAX_POOL_SIZE")
+        if not -1 <= self.zlib_compression_level <= 9:
+            raise ValueError("MONGO_ZLIB_COMPRESSION_LEVEL must be between -1 and 9")
+        if self.catalog_max_staleness_s is not None and self.catalog_max_staleness_s < 90:
+            raise ValueError("MONGO_CATALOG_MAX_STALENESS_S must be at least 90 seconds")
+        # Fail fast on typos rather than at first catalog query
+        build_read_preference(self.catalog_read_preference, self.catalog_max_staleness_s)
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        compressors = [
+            c.strip().lower()
+            for c in os.environ.get("MONGO_COMPRESSORS", "zstd,zlib").split(",")
+            if c.strip()
+        ]
+        return cls(
+            backend=os.environ.get("DB_BACKEND", "mongo").strip().lower(),
+            mongo_url=os.environ.get("MONGO_URL", os.environ.get("DATABASE_URL", "mongodb://localhost:27017")),
+            db_name=os.environ.get("DB_NAME", "test_database"),
+            max_pool_size=_env_int("MONGO_MAX_POOL_SIZE", 100),
+            min_pool_size=_env_int("MONGO_MIN_POOL_SIZE", 10),
+            max_idle_time_ms=_env_int("MONGO_MAX_IDLE_TIME_MS", 300000),
+            wait_queue_timeout_ms=_env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000),
+            server_selection_timeout_ms=_env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+            connect_timeout_ms=_env_int("MONGO_CONNECT_TIMEOUT_MS", 5000),
+            socket_timeout_ms=_env_int("MONGO_SOCKET_TIMEOUT_MS", 0),
+            compressors=_available_compressors(compressors),
+            zlib_compression_level=_env_int("MONGO_ZLIB_COMPRESSION_LEVEL", 6),
+            catalog_read_preference=os.environ.get("MONGO_CATALOG_READ_PREFERENCE", "primaryPreferred"),
+            catalog_max_staleness_s=_env_int("MONGO_CATALOG_MAX_STALENESS_S", None),
+            warm_pool=_env_bool("MONGO_WARM_POOL", True),
+        )
+
+    def client_options(self) -> dict:
+        """Keyword arguments for `AsyncIOMotorClient`."""
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "socketTimeoutMS": self.socket_timeout_ms or None,
+        }
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+            if "zlib" in self.compressors:
+                options["zlibCompressionLevel"] = self.zlib_compression_level
+        return options
+
+    @property
+    def catalog_read_preference_object(self):
+        return build_read_preference(self.catalog_read_preference, self.catalog_max_staleness_s)
@@ -0,0 +1,307 @@
+"""
+Synthetic data generator for capacity planning and benchmarks.
+
+Unlike seed_db.py it never touches existing data: every generated document's
+id (and every subscriber email) starts with "gen-", and --drop removes only
+those. Documents are produced lazily, batch by batch, and written with
+unordered insert_many calls, --concurrency of them in flight, so 10M orders
+need no more memory than a few batches.
+
+    python generate_data.py --products 100000 --orders 10000000 --subscribers 500000
+    python generate_data.py --drop --products 0 --orders 0 --subscribers 0 --inquiries 0
+
+Generation is deterministic for a given --seed: document i always gets the
+same id, slug, price and content (timestamps are relative to the run), and
+orders reference products by index. Re-running with the same arguments
+therefore skips what exists: the manifest's unique indexes (id, or email for
+subscribers) reject those documents, which are counted as duplicates.
+
+Connects through config.database, so MONGO_URL, DB_NAME, DB_BACKEND and the
+pool settings apply as for the app; the manifest indexes are built first.
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, List
+
+from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError
+
+load_dotenv()
+
+PREFIX = "gen-"
+
+NOTES_TOP = ["Bergamot", "Saffron", "Pink Pepper", "Neroli", "Cardamom", "Mandarin", "Elemi", "Juniper",
+             "Blackcurrant", "Ginger", "Aldehydes", "Grapefruit"]
+NOTES_HEART = ["Rose", "Iris", "Incense", "Jasmine", "Orris", "Violet", "Tuberose", "Cold Ash", "Leather",
+               "Osmanthus", "Cedar", "Magnolia"]
+NOTES_BASE = ["Oud", "Amber", "Musk", "Vetiver", "Smoked Vanilla", "Sandalwood", "Patchouli", "Labdanum",
+              "Tonka", "Benzoin", "Ambergris", "Oakmoss"]
+WORDS = ["ECLIPSE", "NOIR", "SILENT", "VOW", "EMBER", "VEIL", "MIDNIGHT", "SAFFRON", "RELIC", "ASH", "VELVET",
+         "OBSIDIAN", "SOLACE", "CINDER", "HALO", "MIRAGE", "ORACLE", "TEMPEST", "LUMEN", "SABLE"]
+FIRST_NAMES = ["Amira", "Noah", "Lena", "Omar", "Sofia", "Yusuf", "Maya", "Elias", "Zara", "Idris", "Nora", "Sami"]
+LAST_NAMES = ["Haddad", "Laurent", "Khan", "Rossi", "Novak", "Farah", "Silva", "Weber", "Aziz", "Moreau"]
+INQUIRY_TOPICS = ["a wholesale order", "the next batch of", "a gift set with", "sample sizes of",
+                  "shipping to Dubai for", "a private blend similar to"]
+
+# (status, payment_status, weight): most orders in a mature shop are finished
+ORDER_STATUSES = [
+    ("delivered", "paid", 50),
+    ("completed", "paid", 25),
+    ("pending", "initiated", 8),
+    ("expired", "expired", 10),
+    ("cancelled", "paid", 7),
+]
+
+
+def _iso(moment: datetime) -> str:
+    return moment.isoformat()
+
+
+class Generator:
+    def __init__(self, seed: int, products: int, collections: int, days: int, cloud_name: str):
+        self.seed = seed
+        self.products = products
+        self.collections = collections
+        self.days = days
+        self.cloud_name = cloud_name
+        self.now = datetime.now(timezone.utc)
+
+    def _rng(self, kind: str, i: int) -> random.Random:
+        # Per-document generator: document i is the same whatever the batch boundaries
+        return random.Random(f"{self.seed}:{kind}:{i}")
+
+    def _moment(self, rng: random.Random) -> datetime:
+        return self.now - timedelta(seconds=rng.random() * self.days * 86400)
+
+    def product_price_cents(self, i: int) -> int:
+        return self._rng("price", i).randrange(90, 650) * 100
+
+    def collection(self, k: int) -> dict:
+        rng = self._rng("collection", k)
+        return {
+            "id": f"{PREFIX}c-{k}",
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} COLLECTION",
+            "description": f"A study in {rng.choice(NOTES_BASE).lower()} and {rng.choice(NOTES_HEART).lower()}.",
+            "featured": k < 3,
+            "created_at": _iso(self._moment(rng)),
+        }
+
+    def _image(self, i: int, n: int) -> str:
+        return f"https://res.cloudinary.com/{self.cloud_name}/image/upload/arar/products/{PREFIX}p-{i}-{n}.jpg"
+
+    def _product_name(self, rng: random.Random, i: int) -> str:
+        return f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}"
+
+    def product_slug(self, i: int) -> str:
+        return f"{PREFIX}{self._product_name(self._rng('product', i), i).lower().replace(' ', '-')}"
+
+    def product(self, i: int) -> dict:
+        rng = self._rng("product", i)
+        name = self._product_name(rng, i)
+        price = self.product_price_cents(i)
+        created = self._moment(rng)
+        limited = rng.random() < 0.15
+        return {
+            "id": f"{PREFIX}p-{i}",
+            "name": name,
+            "slug": f"{PREFIX}{name.lower().replace(' ', '-')}",
+            "short_description": f"{rng.choice(NOTES_TOP)} over {rng.choice(NOTES_BASE).lower()}.",
+            "long_description": " ".join(
+                f"{rng.choice(NOTES_TOP)}, {rng.choice(NOTES_HEART).lower()} and {rng.choice(NOTES_BASE).lower()}."
+                for _ in range(rng.randint(3, 8))
+            ),
+            "price": f"${price // 100}",
+            "price_amount": price,
+            "currency": "USD",
+            "stock_quantity": rng.choice([0, rng.randint(1, 20), rng.randint(20, 500)]),
+            "is_limited": limited,
+            "batch_number": f"B{rng.randint(1, 99):02d}-{created.year}" if limited else None,
+            "status": "published" if rng.random() < 0.9 else "draft",
+            "hero_image_url": self._image(i, 0),
+            "gallery_images": [self._image(i, n) for n in range(1, rng.randint(2, 5))],
+            "notes_top": rng.sample(NOTES_TOP, rng.randint(1, 3)),
+            "notes_heart": rng.sample(NOTES_HEART, rng.randint(1, 3)),
+            "notes_base": rng.sample(NOTES_BASE, rng.randint(2, 4)),
+            "identity": f"{name.title()} is a composition of contrasts.",
+            "ritual": "Apply to pulse points in the evening.",
+            "craft": f"Aged for {rng.randint(3, 36)} months.",
+            "collection_id": f"{PREFIX}c-{rng.randrange(self.collections)}" if self.collections else None,
+            "created_at": _iso(created),
+            "updated_at": _iso(created + timedelta(days=rng.random() * 30)),
+        }
+
+    def order(self, n: int) -> dict:
+        rng = self._rng("order", n)
+        product = rng.randrange(self.products) if self.products else 0
+        status, payment_status, _ = rng.choices(ORDER_STATUSES, weights=[w for *_, w in ORDER_STATUSES])[0]
+        price = self.product_price_cents(product)
+        created = self._moment(rng)
+        return {
+            "id": f"{PREFIX}o-{n}",
+            "session_id": f"cs_{PREFIX}{n}",
+            "product_id": f"{PREFIX}p-{product}",
+            "product_slug": self.product_slug(product),
+            "customer_email": f"{rng.choice(FIRST_NAMES).lower()}.{rng.randrange(10**6)}@example.com",
+            "amount": price / 100.0,
+            "amount_cents": price,
+            "currency": "USD",
+            "payment_status": payment_status,
+            "status": status,
+            "created_at": _iso(created),
+            "updated_at": _iso(created + timedelta(hours=rng.random() * 240)),
+        }
+
+    def subscriber(self, n: int) -> dict:
+        rng = self._rng("subscriber", n)
+        return {
+            "id": f"{PREFIX}s-{n}",
+            "email": f"{PREFIX}{n}@example.com",
+            "subscribed_at": _iso(self._moment(rng)),
+        }
+
+    def inquiry(self, n: int) -> dict:
+        rng = self._rng("inquiry", n)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        return {
+            "id": f"{PREFIX}i-{n}",
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}@example.com",
+            "message": f"Hello, I would like to ask about {rng.choice(INQUIRY_TOPICS)} "
+                       f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}.",
+            "created_at": _iso(self._moment(rng)),
+        }
+
+
+class Progress:
+    """Throttled one-line progress report on stderr."""
+
+    def __init__(self, label: str, total: int, interval: float = 1.0):
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.inserted = 0
+        self.duplicates = 0
+        self.started = time.perf_counter()
+        self._last = 0.0
+
+    def add(self, inserted: int, duplicates: int):
+        self.inserted += inserted
+        self.duplicates += duplicates
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.report(end="\r")
+
+    def report(self, end: str = "\n"):
+        done = self.inserted + self.duplicates
+        elapsed = time.perf_counter() - self.started
+        rate = done / elapsed if elapsed else 0.0
+        eta = (self.total - done) / rate if rate else 0.0
+        sys.stderr.write(
+            f"{self.label:<12} {done:>12,}/{self.total:,} ({done / max(self.total, 1):6.1%}) "
+            f"{rate:>10,.0f} docs/s  ETA {eta:6.0f}s  duplicates {self.duplicates:,}{end}"
+        )
+        sys.stderr.flush()
+
+
+def _batches(make: Callable[[int], dict], total: int, batch_size: int) -> Iterator[List[dict]]:
+    for start in range(0, total, batch_size):
+        yield [make(i) for i in range(start, min(start + batch_size, total))]
+
+
+async def insert_batches(collection, label: str, make: Callable[[int], dict], total: int,
+                         batch_size: int, concurrency: int) -> Progress:
+    """Insert `total` generated documents with up to `concurrency` insert_many calls in flight."""
+    progress = Progress(label, total)
+    if total <= 0:
+        return progress
+    in_flight = set()
+
+    async def write(batch: List[dict]):
+        try:
+            result = await collection.insert_many(batch, ordered=False)
+            progress.add(len(result.inserted_ids), 0)
+        except BulkWriteError as e:
+            # Re-runs hit the unique indexes; anything else is a real failure
+            errors = e.details.get("writeErrors", [])
+            other = [error for error in errors if error.get("code") != 11000]
+            if other:
+                raise
+            progress.add(e.details.get("nInserted", 0), len(errors))
+
+    for batch in _batches(make, total, batch_size):
+        if len(in_flight) >= concurrency:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        in_flight.add(asyncio.ensure_future(write(batch)))
+        # Let the writes make progress while the next batch is generated
+        await asyncio.sleep(0)
+    for task in asyncio.as_completed(in_flight):
+        await task
+    progress.report()
+    return progress
+
+
+async def drop_generated(db):
+    for name, field in [("products", "id"), ("collections", "id"), ("orders", "id"),
+                        ("newsletter", "id"), ("contact_inquiries", "id")]:
+        result = await db[name].delete_many({field: {"$regex": f"^{PREFIX}"}})
+        print(f"Removed {result.deleted_count:,} generated {name}")
+
+
+async def generate(args) -> int:
+    from config.database import client, db, initialize_database
+
+    try:
+        await initialize_database()
+        if args.drop:
+            await drop_generated(db)
+
+        gen = Generator(args.seed, args.products, args.collections, args.days, args.cloud_name)
+        plan = [
+            ("collections", db.collections, gen.collection, args.collections),
+            ("products", db.products, gen.product, args.products),
+            ("orders", db.orders, gen.order, args.orders),
+            ("subscribers", db.newsletter, gen.subscriber, args.subscribers),
+            ("inquiries", db.contact_inquiries, gen.inquiry, args.inquiries),
+        ]
+        started = time.perf_counter()
+        total = 0
+        for label, collection, make, count in plan:
+            progress = await insert_batches(collection, label, make, count, args.batch_size, args.concurrency)
+            total += progress.inserted
+        print(f"Inserted {total:,} documents in {time.perf_counter() - started:.1f}s")
+        return 0
+    finally:
+        client.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic catalog, order and customer data")
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--collections", type=int, default=25, help="Collections the products are spread over")
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--subscribers", type=int, default=1000, help="Newsletter subscribers")
+    parser.add_argument("--inquiries", type=int, default=500, help="Contact inquiries")
+    parser.add_argument("--days", type=int, default=730, help="Spread timestamps over this many past days")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per insert_many")
+    parser.add_argument("--concurrency", type=int, default=8, help="insert_many calls in flight")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (same seed, same documents)")
+    parser.add_argument("--cloud-name", default="arar", help="Cloudinary cloud name in image URLs")
+    parser.add_argument("--drop", action="store_true", help="Remove previously generated documents first")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1 or args.concurrency < 1:
+        parser.error("--batch-size and --concurrency must be at least 1")
+    if args.orders > 0 and args.products < 1:
+        parser.error("--orders needs --products: every order references a generated product")
+    return asyncio.run(generate(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
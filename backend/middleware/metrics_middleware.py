@@ -0,0 +1,79 @@
+"""
+HTTP request metrics.
+
+`HttpMetricsMiddleware` is a pure ASGI middleware (no BaseHTTPMiddleware task
+or body buffering) that records, per route template:
+    http_request_duration_seconds   latency histogram
+    http_requests_total             count by status code
+    http_response_size_bytes        body size histogram
+plus a process-wide `http_requests_in_flight` gauge. The per-request cost is a
+couple of perf_counter calls and three locked dict updates.
+
+Routes are labelled with their template ("GET /api/fragrances/{slug}") via
+`route_label`, so path parameters never create new series.
+"""
+
+import time
+
+from middleware.request_context import route_label
+from services.metrics import CounterFamily, GaugeFamily, HistogramFamily
+
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+REQUEST_DURATION = HistogramFamily(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ("route",),
+)
+REQUESTS = CounterFamily(
+    "http_requests_total",
+    "HTTP requests by route and status code",
+    ("route", "status"),
+)
+RESPONSE_SIZE = HistogramFamily(
+    "http_response_size_bytes",
+    "HTTP response body size by route",
+    ("route",),
+    buckets=SIZE_BUCKETS,
+)
+IN_FLIGHT = GaugeFamily(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+)
+
+
+class HttpMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            message_type = message["type"]
+            if message_type == "http.response.body":
+                size += len(message.get("body", b""))
+            elif message_type == "http.response.start":
+                status = message["status"]
+            elif message_type == "http.response.zerocopysend":
+                size += message.get("count", 0)
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            # The router has stored the matched route in the (shared) scope by now
+            route = route_label(scope)
+            REQUEST_DURATION.observe(elapsed, route)
+            REQUESTS.inc(route, str(status))
+            RESPONSE_SIZE.observe(size, route)
@@ -0,0 +1,57 @@
+"""
+Per-route rate limiting at the edge of the app.
+
+`RateLimitMiddleware` checks the request's "METHOD /path" against the limits in
+services/rate_limiter.py and answers over-limit clients with a small 429 and a
+Retry-After header before routing, body parsing or dependencies run, so a
+rejected login never reaches bcrypt and a rejected checkout never calls Stripe.
+"""
+
+import json
+import math
+
+from services.rate_limiter import (
+    RATE_LIMIT_ENABLED,
+    RATE_LIMITED,
+    RouteRateLimits,
+    route_rate_limits,
+    scope_client_ip,
+)
+
+_BODY = json.dumps({"detail": "Too many requests, please try again later"}).encode()
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware; unlimited routes cost one dict lookup."""
+
+    def __init__(self, app, limits: RouteRateLimits = route_rate_limits, enabled: bool = RATE_LIMIT_ENABLED):
+        self.app = app
+        self.limits = limits
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = f"{scope['method']} {scope['path']}"
+        if route not in self.limits.limits:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = await self.limits.acquire(route, scope_client_ip(scope))
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc(route)
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_BODY)).encode()),
+                (b"retry-after", str(math.ceil(retry_after)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _BODY})
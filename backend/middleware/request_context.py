@@ -0,0 +1,52 @@
+"""
+Request context propagation.
+
+`RequestContextMiddleware` stores the ASGI scope of the request being handled in
+a context variable. Code running on behalf of that request - including pymongo
+monitoring callbacks, which Motor runs in its executor with a copy of the
+caller's context - can then find out which route it is serving.
+"""
+
+from contextvars import ContextVar
+from typing import Optional
+
+current_request_scope: ContextVar[Optional[dict]] = ContextVar("current_request_scope", default=None)
+
+NO_ROUTE = "<none>"
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_label(scope: Optional[dict]) -> str:
+    """
+    Low-cardinality label for a request: "METHOD /path/{template}".
+    Uses the matched route template, never the raw path, so ids don't explode label counts.
+    """
+    if scope is None:
+        return NO_ROUTE
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return UNMATCHED_ROUTE
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+def current_route() -> str:
+    """Route label of the request currently being served, or "<none>" outside a request."""
+    return route_label(current_request_scope.get())
+
+
+class RequestContextMiddleware:
+    """Pure ASGI middleware; adds one ContextVar.set/reset per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = current_request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_scope.reset(token)
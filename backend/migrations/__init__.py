@@ -0,0 +1,69 @@
+"""
+Versioned data migrations, applied online by migrations.runner.
+
+    python -m migrations status
+    python -m migrations run [--to VERSION] [--batch-size 500] [--pause-ms 50] [--max-rate 2000]
+
+Add a migration as mNNNN_<name>.py with a Migration subclass and list it in
+MIGRATIONS. Versions are never reused or renumbered once released.
+
+Deploy order: run `python -m migrations run` against the database BEFORE
+deploying code that relies on the migrated shape. Checkout reads
+products.price_amount without falling back to the price string, so products
+lack a price until migration 1 has completed. The app logs an error at startup
+and /api/health reports the REQUIRED_VERSIONS still pending (503 in production).
+"""
+
+import logging
+
+from migrations.m0001_price_amount import BackfillPriceAmount
+from migrations.m0002_iso_timestamps import NormalizeTimestamps
+from migrations.m0003_order_amounts import BackfillOrderAmounts
+from migrations.runner import STATE_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS = [
+    BackfillPriceAmount(),
+    NormalizeTimestamps(),
+    BackfillOrderAmounts(),
+]
+
+# Versions the application code depends on
+REQUIRED_VERSIONS = (1,)
+
+
+class MigrationGate:
+    """Tracks whether REQUIRED_VERSIONS have completed; stops querying once they have."""
+
+    def __init__(self, required=REQUIRED_VERSIONS):
+        self.required = tuple(required)
+        self.ready = False
+
+    async def pending(self, database) -> list:
+        if self.ready:
+            return []
+        done = {
+            state["_id"]
+            async for state in database[STATE_COLLECTION].find(
+                {"_id": {"$in": list(self.required)}, "status": "complete"}, {"_id": 1}
+            )
+        }
+        pending = [version for version in self.required if version not in done]
+        self.ready = not pending
+        return pending
+
+
+migration_gate = MigrationGate()
+
+
+async def check_required_migrations(database=None):
+    """Startup step: log an error while the code runs ahead of the data."""
+    if database is None:
+        from config.database import db as database
+    pending = await migration_gate.pending(database)
+    if pending:
+        logger.error(
+            "Data migrations %s have not completed; checkout fails for unmigrated products. "
+            "Run `python -m migrations run`.", pending
+        )
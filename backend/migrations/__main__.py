@@ -0,0 +1,62 @@
+"""
+Command line for the data migrations; see migrations/__init__.py.
+
+Connects through config.database, so MONGO_URL, DB_NAME and DB_BACKEND apply
+as for the app. Safe to run while the app serves traffic and to re-run after
+an interruption: completed migrations are skipped and a partial one resumes.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from dataclasses import asdict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+async def _main(args) -> int:
+    from config.database import db
+    from migrations import MIGRATIONS
+    from migrations.runner import MigrationLocked, MigrationRunner
+
+    runner = MigrationRunner(
+        db,
+        MIGRATIONS,
+        batch_size=args.batch_size,
+        pause_s=args.pause_ms / 1000,
+        max_rate=args.max_rate,
+    )
+    if args.command == "status":
+        for state in await runner.status():
+            print(f"{state['version']:>4}  {state['name']:<24} {state['status']:<9} {state['completed_at'] or ''}")
+        return 0
+    try:
+        reports = await runner.run(args.to)
+    except MigrationLocked as e:
+        print(e, file=sys.stderr)
+        return 2
+    for report in reports:
+        print(json.dumps(asdict(report), default=str))
+    return 0 if all(report.status == "complete" for report in reports) else 1
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m migrations", description="Apply versioned data migrations")
+    parser.add_argument("command", choices=("status", "run"))
+    parser.add_argument("--to", type=int, help="Stop after this version (default: all)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per bulk_write")
+    parser.add_argument("--pause-ms", type=float, default=50, help="Pause between batches")
+    parser.add_argument("--max-rate", type=float, help="Documents per second, across batches")
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Backfill `price_amount` (integer cents) on products that only have the
+display `price` string ("$380", "$1,250.00"), as seed_db.py used to write them.
+Checkout reads `price_amount` directly once this has run.
+"""
+
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+
+from migrations.runner import Migration
+
+logger = logging.getLogger(__name__)
+
+_NON_NUMERIC = re.compile(r"[^\d.]")
+
+
+def parse_price(price) -> Optional[int]:
+    """'$1,250.00' -> 125000; None when the string holds no usable amount."""
+    if not isinstance(price, str):
+        return None
+    try:
+        cents = int(Decimal(_NON_NUMERIC.sub("", price)) * 100)
+    except InvalidOperation:
+        return None
+    return cents if cents > 0 else None
+
+
+class BackfillPriceAmount(Migration):
+    version = 1
+    name = "products.price_amount"
+    collections = ("products",)
+    projection = {"id": 1, "price": 1, "price_amount": 1}
+
+    def filter(self, collection: str) -> dict:
+        return {"$or": [{"price_amount": {"$exists": False}}, {"price_amount": None}, {"price_amount": {"$lte": 0}}]}
+
+    def transform(self, collection: str, doc: dict) -> Optional[dict]:
+        cents = parse_price(doc.get("price"))
+        if cents is None:
+            logger.warning("Product %s has no parseable price: %r", doc.get("id"), doc.get("price"))
+            return None
+        return {"$set": {"price_amount": cents}}
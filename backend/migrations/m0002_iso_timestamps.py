@@ -0,0 +1,62 @@
+"""
+Store every timestamp as a UTC ISO-8601 string with an explicit offset
+("2025-01-31T12:00:00.123456+00:00"), the format the routes write.
+
+Documents built from the Pydantic models carried BSON dates and the admin
+routes wrote naive `utcnow()` strings; mixed types sort into separate BSON type
+brackets, so `sort("created_at", -1)` listings came out of order. Naive values
+are taken to be UTC.
+"""
+
+import re
+from datetime import datetime, timezone
+from typing import Optional
+
+from migrations.runner import Migration
+
+FIELDS = ("created_at", "updated_at", "subscribed_at")
+
+_UTC_SUFFIX = re.compile(r"\+00:00$")
+
+
+def normalize_timestamp(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, str):
+        try:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    else:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).isoformat()
+
+
+class NormalizeTimestamps(Migration):
+    version = 2
+    name = "timestamps.iso_utc"
+    collections = ("products", "collections", "orders", "newsletter", "contact_inquiries", "admin_users")
+    projection = {field: 1 for field in FIELDS}
+
+    def filter(self, collection: str) -> dict:
+        return {"$or": [
+            clause
+            for field in FIELDS
+            for clause in (
+                {field: {"$type": "date"}},
+                {field: {"$type": "string", "$not": _UTC_SUFFIX}},
+            )
+        ]}
+
+    def transform(self, collection: str, doc: dict) -> Optional[dict]:
+        changes = {}
+        for field in FIELDS:
+            value = doc.get(field)
+            if value is None:
+                continue
+            normalized = normalize_timestamp(value)
+            if normalized is not None and normalized != value:
+                changes[field] = normalized
+        return {"$set": changes} if changes else None
@@ -0,0 +1,38 @@
+"""
+Give every order both `amount_cents` (integer, authoritative) and `amount`
+(float dollars), as checkout writes them.
+
+Older orders have only `amount`: checkout stored float dollars, while orders
+built from models.order.Order stored integer cents. An integer `amount`
+without `amount_cents` is therefore read as cents.
+"""
+
+from typing import Optional
+
+from migrations.runner import Migration
+
+
+class BackfillOrderAmounts(Migration):
+    version = 3
+    name = "orders.amount_cents"
+    collections = ("orders",)
+    projection = {"amount": 1, "amount_cents": 1}
+
+    def filter(self, collection: str) -> dict:
+        return {"$or": [
+            {"amount_cents": {"$exists": False}},
+            {"amount_cents": {"$not": {"$type": ["int", "long"]}}},
+            {"amount": {"$not": {"$type": "double"}}},
+        ]}
+
+    def transform(self, collection: str, doc: dict) -> Optional[dict]:
+        amount, cents = doc.get("amount"), doc.get("amount_cents")
+        if isinstance(cents, (int, float)) and not isinstance(cents, bool):
+            cents = int(round(cents))
+        elif isinstance(amount, int) and not isinstance(amount, bool):
+            cents = amount
+        elif isinstance(amount, float):
+            cents = int(round(amount * 100))
+        else:
+            return None
+        return {"$set": {"amount_cents": cents, "amount": cents / 100.0}}
@@ -0,0 +1,285 @@
+"""
+Online, resumable data migrations.
+
+A `Migration` selects the documents that still need rewriting with `filter()`
+and returns the update for one document from `transform(doc)`. The runner walks
+each collection in `_id` order, `batch_size` documents at a time, and writes a
+batch with a single unordered `bulk_write`. Progress (last `_id` per collection
+and counters) is stored in the `migrations` collection after every batch, so an
+interrupted run resumes where it stopped instead of rescanning.
+
+Migrations run while the app is serving traffic:
+  * every update is guarded by the values it was computed from (plus the
+    migration's filter), so a document the app changed in the meantime is left
+    alone; a collection pass that hit such conflicts is followed by another
+    pass from the start, up to `max_passes`, after which the migration stays
+    "partial" and the next run rescans it;
+  * batches are paced by `pause_s` and an optional `max_rate` (documents per
+    second) to keep the load on the primary predictable;
+  * a lease on the state document stops two runners from applying the same
+    migration at once.
+
+Transforms must be idempotent: a migrated document must no longer match the
+filter. Migrations are applied in version order; a failed or partial one stops
+the run.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+STATE_COLLECTION = "migrations"
+LEASE_S = 60
+
+_MISSING = object()
+
+
+class Migration:
+    """Base class; set `version`, `name` and `collections`, implement filter/transform."""
+
+    version: int = 0
+    name: str = ""
+    collections: Sequence[str] = ()
+    # Fields loaded for transform(), and guarded against concurrent changes;
+    # must include every field it reads, sets or unsets. None loads whole documents.
+    projection: Optional[Dict[str, int]] = None
+
+    def filter(self, collection: str) -> dict:
+        raise NotImplementedError
+
+    def transform(self, collection: str, doc: dict) -> Optional[dict]:
+        """Update document (`$set` / `$unset`) for `doc`, or None to leave it as is."""
+        raise NotImplementedError
+
+
+class MigrationLocked(Exception):
+    pass
+
+
+@dataclass
+class MigrationReport:
+    version: int
+    name: str
+    status: str
+    scanned: int = 0
+    modified: int = 0
+    skipped: int = 0
+    conflicts: int = 0
+    elapsed_s: float = 0.0
+    collections: Dict[str, dict] = field(default_factory=dict)
+
+
+def _guard(doc: dict, update: dict, projection: Optional[Dict[str, int]]) -> dict:
+    """
+    Filter matching `doc` only while the fields the update was computed from
+    (the projection) and the fields it touches are unchanged.
+    """
+    guard = {"_id": doc["_id"]}
+    paths = [path for path, include in (projection or {}).items() if include and path != "_id"]
+    paths += [path for operator in ("$set", "$unset") for path in update.get(operator, {})]
+    for path in paths:
+        value = doc
+        for part in path.split("."):
+            value = value.get(part, _MISSING) if isinstance(value, dict) else _MISSING
+        guard[path] = {"$exists": False} if value is _MISSING else value
+    return guard
+
+
+class MigrationRunner:
+    def __init__(
+        self,
+        database,
+        migrations: Sequence[Migration],
+        batch_size: int = 500,
+        pause_s: float = 0.05,
+        max_rate: Optional[float] = None,
+        max_passes: int = 3,
+    ):
+        versions = [m.version for m in migrations]
+        if len(set(versions)) != len(versions):
+            raise ValueError(f"Duplicate migration versions: {versions}")
+        self.database = database
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.batch_size = batch_size
+        self.pause_s = pause_s
+        self.max_rate = max_rate
+        self.max_passes = max_passes
+        self.owner = f"{os.uname().nodename}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.state = database[STATE_COLLECTION]
+
+    # -- state -----------------------------------------------------------------
+
+    async def status(self) -> List[dict]:
+        states = {s["_id"]: s for s in await self.state.find({}).to_list(None)}
+        return [
+            {
+                "version": m.version,
+                "name": m.name,
+                "status": states.get(m.version, {}).get("status", "pending"),
+                "progress": states.get(m.version, {}).get("progress", {}),
+                "completed_at": states.get(m.version, {}).get("completed_at"),
+            }
+            for m in self.migrations
+        ]
+
+    async def _acquire(self, migration: Migration) -> dict:
+        now = datetime.now(timezone.utc)
+        await self.state.update_one(
+            {"_id": migration.version},
+            {"$setOnInsert": {"name": migration.name, "status": "pending", "progress": {}, "locked_until": now}},
+            upsert=True,
+        )
+        state = await self.state.find_one_and_update(
+            {
+                "_id": migration.version,
+                "status": {"$ne": "complete"},
+                "$or": [{"locked_until": {"$lte": now}}, {"owner": self.owner}],
+            },
+            {"$set": {
+                "status": "running",
+                "owner": self.owner,
+                "locked_until": now + timedelta(seconds=LEASE_S),
+                "updated_at": now.isoformat(),
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+        if state is None:
+            current = await self.state.find_one({"_id": migration.version})
+            if current and current.get("status") == "complete":
+                return current
+            raise MigrationLocked(f"Migration {migration.version} is being run by {current.get('owner')}")
+        return state
+
+    async def _save(self, migration: Migration, fields: dict):
+        now = datetime.now(timezone.utc)
+        await self.state.update_one(
+            {"_id": migration.version, "owner": self.owner},
+            {"$set": {"locked_until": now + timedelta(seconds=LEASE_S), "updated_at": now.isoformat(), **fields}},
+        )
+
+    # -- execution ---------------------------------------------------------------
+
+    async def _throttle(self, batch_started: float, documents: int):
+        delay = self.pause_s
+        if self.max_rate:
+            delay = max(delay, documents / self.max_rate - (time.perf_counter() - batch_started))
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _migrate_collection(self, migration: Migration, name: str, progress: dict, report: MigrationReport):
+        collection = self.database[name]
+        counters = progress.setdefault(name, {"last_id": None, "scanned": 0, "modified": 0, "skipped": 0,
+                                              "conflicts": 0, "done": False})
+        if counters["done"]:
+            return
+        base_filter = migration.filter(name)
+        # A run makes at most max_passes passes; `retry` survives interruptions
+        for _ in range(self.max_passes):
+            await self._pass(migration, collection, name, base_filter, counters, progress)
+            if not counters.pop("retry", False):
+                counters["done"] = True
+                break
+            # Documents skipped over on conflict still match the filter: rescan
+            counters["last_id"] = None
+            counters["passes"] = counters.get("passes", 1) + 1
+        await self._save(migration, {"progress": progress})
+        for key in ("scanned", "modified", "skipped", "conflicts"):
+            setattr(report, key, getattr(report, key) + counters[key])
+        report.collections[name] = {k: v for k, v in counters.items() if k != "last_id"}
+
+    async def _pass(self, migration: Migration, collection, name: str, base_filter: dict, counters: dict,
+                    progress: dict):
+        """Walk `collection` once from `last_id`, flagging `retry` when an update lost a race."""
+        while True:
+            started = time.perf_counter()
+            query = dict(base_filter)
+            if counters["last_id"] is not None:
+                query = {"$and": [base_filter, {"_id": {"$gt": counters["last_id"]}}]}
+            batch = await collection.find(query, migration.projection).sort("_id", 1).limit(self.batch_size).to_list(None)
+            if not batch:
+                break
+
+            requests = []
+            for doc in batch:
+                update = migration.transform(name, doc)
+                if update:
+                    requests.append(UpdateOne({"$and": [base_filter, _guard(doc, update, migration.projection)]}, update))
+                else:
+                    counters["skipped"] += 1
+            modified = 0
+            if requests:
+                try:
+                    result = await collection.bulk_write(requests, ordered=False)
+                    matched, modified = result.matched_count, result.modified_count
+                except BulkWriteError as e:
+                    if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+                        raise
+                    matched, modified = e.details.get("nMatched", 0), e.details.get("nModified", 0)
+                # Guard mismatch: the app changed the document after we read it
+                conflicts = len(requests) - matched
+                counters["conflicts"] += conflicts
+                if conflicts:
+                    counters["retry"] = True
+            counters["modified"] += modified
+            counters["scanned"] += len(batch)
+            counters["last_id"] = batch[-1]["_id"]
+            await self._save(migration, {"progress": progress})
+            await self._throttle(started, len(batch))
+
+    async def apply(self, migration: Migration) -> MigrationReport:
+        state = await self._acquire(migration)
+        report = MigrationReport(migration.version, migration.name, state["status"])
+        if state["status"] == "complete":
+            return report
+        started = time.perf_counter()
+        progress = state.get("progress") or {}
+        logger.info("Applying migration %s (%s)", migration.version, migration.name)
+        try:
+            for name in migration.collections:
+                await self._migrate_collection(migration, name, progress, report)
+        except Exception as e:
+            await self._save(migration, {"status": "failed", "error": str(e), "progress": progress,
+                                         "locked_until": datetime.now(timezone.utc)})
+            logger.error("Migration %s failed: %s", migration.version, e)
+            raise
+        report.elapsed_s = round(time.perf_counter() - started, 3)
+        if not all(progress[name]["done"] for name in migration.collections):
+            # Documents kept changing under us; the next run rescans them
+            report.status = "partial"
+            await self._save(migration, {"status": "partial", "progress": progress,
+                                         "locked_until": datetime.now(timezone.utc)})
+            logger.warning("Migration %s partial after %d passes: %d conflicts",
+                           migration.version, self.max_passes, report.conflicts)
+            return report
+        report.status = "complete"
+        await self.state.update_one(
+            {"_id": migration.version, "owner": self.owner},
+            {"$set": {"status": "complete", "completed_at": datetime.now(timezone.utc).isoformat(),
+                      "locked_until": datetime.now(timezone.utc)}},
+        )
+        logger.info("Migration %s complete: %d scanned, %d modified, %d conflicts",
+                    migration.version, report.scanned, report.modified, report.conflicts)
+        return report
+
+    async def run(self, target: Optional[int] = None) -> List[MigrationReport]:
+        """Apply every migration up to `target` (default: all) in version order."""
+        reports = []
+        for migration in self.migrations:
+            if target is not None and migration.version > target:
+                break
+            report = await self.apply(migration)
+            reports.append(report)
+            if report.status != "complete":
+                break
+        return reports
+
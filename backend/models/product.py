@@ -4,6 +4,15 @@ from datetime import datetime
 import uuid
 
 
+class ImageMeta(BaseModel):
+    """Dimensions and placeholders for one product image (see services/image_metadata.py)."""
+    url: str
+    width: int
+    height: int
+    blurhash: Optional[str] = None
+    lqip: Optional[str] = None
+
+
 class ProductBase(BaseModel):
     name: str
     slug: str
@@ -58,5 +67,7 @@ class Product(ProductBase):
     model_config = ConfigDict(extra="ignore")
     
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    hero_image_meta: Optional[ImageMeta] = None
+    gallery_images_meta: List[Optional[ImageMeta]] = []
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
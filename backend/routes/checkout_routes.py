@@ -1,11 +1,16 @@
 from fastapi import APIRouter, HTTPException, Request, Response, status as http_status
-import stripe
 from pydantic import BaseModel
 from config.database import products_collection, orders_collection
 import os
 from datetime import datetime, timezone
 import uuid
 import logging
+from utils.lazy_import import lazy_import
+from services.tracing import span
+from services.cache_bus import publish_invalidation
+
+# Loaded on first checkout/webhook request, not at startup
+stripe = lazy_import("stripe")
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -13,6 +18,16 @@ logger = logging.getLogger(__name__)
 # Get Stripe API key from environment
 STRIPE_API_KEY = os.environ.get('STRIPE_API_KEY', os.environ.get('STRIPE_SECRET_KEY'))
 STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET')
+# Alternative API host, e.g. the local emulator in benchmarks/stripe_emulator.py.
+# Never honoured in production, where it would send the live key elsewhere.
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE')
+IS_PRODUCTION = os.environ.get('ENVIRONMENT', 'development').lower() == 'production'
+
+
+def configure_stripe():
+    stripe.api_key = STRIPE_API_KEY
+    if STRIPE_API_BASE and not IS_PRODUCTION:
+        stripe.api_base = STRIPE_API_BASE
 
 
 class CheckoutRequest(BaseModel):
@@ -30,8 +45,7 @@ async def create_checkout_session(data: CheckoutRequest, request: Request):
     Create Stripe checkout session using standard stripe library.
     """
     try:
-        # Configure stripe
-        stripe.api_key = STRIPE_API_KEY
+        configure_stripe()
         
         # Get product from database - price comes from DB, not client
         product = await products_collection.find_one(
@@ -50,18 +64,10 @@ async def create_checkout_session(data: CheckoutRequest, request: Request):
                 detail="This item is currently out of stock"
             )
         
-        # Get price_amount in cents
+        # Price in cents; products without one are backfilled by migration 1
         price_amount = product.get('price_amount')
-        # Fallback if price_amount is not present (e.g. from seed_db price string)
-        if not price_amount:
-            price_str = product.get('price', '$0')
-            try:
-                price_amount = int(float(price_str.replace('$', '').replace(',', '')) * 100)
-            except:
-                price_amount = 0
-
         if not price_amount or price_amount <= 0:
-            logger.error(f"Invalid price_amount for product {product['id']}: {price_amount}")
+            logger.error("Invalid price_amount for product %s: %s", product['id'], price_amount)
             raise HTTPException(status_code=500, detail="Product pricing error")
         
         # Build dynamic URLs
@@ -70,28 +76,29 @@ async def create_checkout_session(data: CheckoutRequest, request: Request):
         cancel_url = f"{origin_url}/fragrance/{product['slug']}"
         
         # Create Stripe Checkout Session
-        session = stripe.checkout.Session.create(
-            payment_method_types=['card'],
-            line_items=[{
-                'price_data': {
-                    'currency': product.get('currency', 'usd').lower(),
-                    'product_data': {
-                        'name': product['name'],
-                        'description': product.get('short_description', ''),
+        with span("stripe.checkout.Session.create", "stripe"):
+            session = stripe.checkout.Session.create(
+                payment_method_types=['card'],
+                line_items=[{
+                    'price_data': {
+                        'currency': product.get('currency', 'usd').lower(),
+                        'product_data': {
+                            'name': product['name'],
+                            'description': product.get('short_description', ''),
+                        },
+                        'unit_amount': price_amount,
                     },
-                    'unit_amount': price_amount,
-                },
-                'quantity': 1,
-            }],
-            mode='payment',
-            success_url=success_url,
-            cancel_url=cancel_url,
-            metadata={
-                'product_id': product['id'],
-                'product_slug': product['slug'],
-                'product_name': product['name']
-            }
-        )
+                    'quantity': 1,
+                }],
+                mode='payment',
+                success_url=success_url,
+                cancel_url=cancel_url,
+                metadata={
+                    'product_id': product['id'],
+                    'product_slug': product['slug'],
+                    'product_name': product['name']
+                }
+            )
         
         # Create payment transaction record
         transaction = {
@@ -110,12 +117,12 @@ async def create_checkout_session(data: CheckoutRequest, request: Request):
         }
         
         await orders_collection.insert_one(transaction)
-        logger.info(f"Checkout session created: {session.id} for product {product['id']}")
+        logger.info("Checkout session created: %s for product %s", session.id, product['id'])
         
         return {"sessionId": session.id, "url": session.url}
         
     except Exception as e:
-        logger.error(f"Error creating checkout session: {str(e)}")
+        logger.error("Error creating checkout session: %s", e)
         raise HTTPException(status_code=500, detail=f"Unable to create checkout session: {str(e)}")
 
 
@@ -125,8 +132,9 @@ async def get_checkout_status(session_id: str, request: Request):
     Get the status of a checkout session and update database accordingly.
     """
     try:
-        stripe.api_key = STRIPE_API_KEY
-        session = stripe.checkout.Session.retrieve(session_id)
+        configure_stripe()
+        with span("stripe.checkout.Session.retrieve", "stripe"):
+            session = stripe.checkout.Session.retrieve(session_id)
         
         # Find the existing transaction
         transaction = await orders_collection.find_one({"session_id": session_id})
@@ -150,6 +158,7 @@ async def get_checkout_status(session_id: str, request: Request):
                         }
                     }
                 )
+                await publish_invalidation(f"order:{transaction['id']}")
                 
                 # Reduce stock
                 product_id = transaction.get("product_id")
@@ -173,6 +182,7 @@ async def get_checkout_status(session_id: str, request: Request):
                         }
                     }
                 )
+                await publish_invalidation(f"order:{transaction['id']}")
         
         return {
             "status": session.status,
@@ -182,7 +192,7 @@ async def get_checkout_status(session_id: str, request: Request):
         }
         
     except Exception as e:
-        logger.error(f"Error checking checkout status: {str(e)}")
+        logger.error("Error checking checkout status: %s", e)
         raise HTTPException(status_code=500, detail="Unable to check payment status")
 
 
@@ -195,9 +205,10 @@ async def stripe_webhook(request: Request):
     sig_header = request.headers.get("Stripe-Signature")
     
     try:
-        event = stripe.Webhook.construct_event(
-            payload, sig_header, STRIPE_WEBHOOK_SECRET
-        )
+        with span("stripe.Webhook.construct_event", "stripe"):
+            event = stripe.Webhook.construct_event(
+                payload, sig_header, STRIPE_WEBHOOK_SECRET
+            )
     except ValueError as e:
         # Invalid payload
         return Response(status_code=400)
@@ -227,6 +238,7 @@ async def stripe_webhook(request: Request):
                     }
                 }
             )
+            await publish_invalidation(f"order:{transaction['id']}")
             
             # Reduce stock
             if product_id:
@@ -238,6 +250,6 @@ async def stripe_webhook(request: Request):
                     }
                 )
             
-            logger.info(f"Webhook: Payment completed for session {session_id}")
+            logger.info("Webhook: Payment completed for session %s", session_id)
     
     return {"status": "success"}
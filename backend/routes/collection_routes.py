@@ -2,13 +2,16 @@ from fastapi import APIRouter, HTTPException, Depends
 from models.collection import CollectionCreate, CollectionUpdate
 from middleware.auth_middleware import get_current_admin
 from config.database import collections_collection
-from datetime import datetime
+from services.response_cache import cached_response
+from services.cache_bus import publish_invalidation
+from datetime import datetime, timezone
 import uuid
 
 router = APIRouter()
 
 
 @router.get("")
+@cached_response(ttl=60, key=("path", "query"), tags=("collections",))
 async def get_all_collections(current_admin: dict = Depends(get_current_admin)):
     """Get all collections"""
     collections = await collections_collection.find({}, {"_id": 0}).to_list(100)
@@ -23,9 +26,10 @@ async def create_collection(
     """Create new collection"""
     collection_dict = collection.model_dump()
     collection_dict["id"] = str(uuid.uuid4())
-    collection_dict["created_at"] = datetime.utcnow().isoformat()
+    collection_dict["created_at"] = datetime.now(timezone.utc).isoformat()
     
     await collections_collection.insert_one(collection_dict)
+    await publish_invalidation("collections")
     return {"message": "Collection created successfully", "id": collection_dict["id"]}
 
 
@@ -45,6 +49,7 @@ async def update_collection(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Collection not found")
+    await publish_invalidation("collections")
     
     return {"message": "Collection updated successfully"}
 
@@ -58,4 +63,5 @@ async def delete_collection(
     result = await collections_collection.delete_one({"id": collection_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Collection not found")
+    await publish_invalidation("collections")
     return {"message": "Collection deleted successfully"}
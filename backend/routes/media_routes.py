@@ -1,9 +1,15 @@
 import os
 import time
-from fastapi import APIRouter, Depends, HTTPException
-import cloudinary
-import cloudinary.utils
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
 from middleware.auth_middleware import get_current_admin
+from services.image_derivatives import UnsupportedImageError, get_derivative_engine
+from services.static_files import serve_static_file
+from utils.lazy_import import lazy_import
+
+# Loaded on first signature request, not at startup
+cloudinary = lazy_import("cloudinary")
+cloudinary_utils = lazy_import("cloudinary.utils")
 
 router = APIRouter()
 
@@ -49,7 +55,7 @@ async def get_upload_signature(current_admin: dict = Depends(get_current_admin))
     
     try:
         # Generate the cryptographic signature using the hidden API secret
-        signature = cloudinary.utils.api_sign_request(
+        signature = cloudinary_utils.api_sign_request(
             params_to_sign,
             config["api_secret"]
         )
@@ -64,3 +70,41 @@ async def get_upload_signature(current_admin: dict = Depends(get_current_admin))
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate secure upload signature: {str(e)}")
+
+
+@router.get("/derived/{public_id:path}")
+async def get_image_derivative(
+    public_id: str,
+    request: Request,
+    w: int = 960,
+    q: str = "auto",
+    fmt: Optional[str] = None
+):
+    """
+    Serve a resized variant of a locally stored image, rendering it on first request.
+    Without `fmt`, WebP is served to clients that accept it and JPEG otherwise.
+    """
+    negotiated = fmt is None
+    if negotiated:
+        fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    if w <= 0:
+        raise HTTPException(status_code=400, detail="Width must be positive")
+    
+    engine = get_derivative_engine()
+    try:
+        path = await engine.get_derivative(public_id, w, q, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnsupportedImageError:
+        raise HTTPException(status_code=415, detail="Not a supported image")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    # The URL names the source, not its content, so it can't be cached as immutable
+    return await serve_static_file(
+        request,
+        engine.cache_dir,
+        os.path.relpath(path, engine.cache_dir),
+        cache_control="public, max-age=86400",
+        extra_headers={"vary": "Accept"} if negotiated else None
+    )
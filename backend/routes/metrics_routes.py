@@ -0,0 +1,62 @@
+import hmac
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from middleware.auth_middleware import get_current_admin
+from config.database import query_monitor
+from services.metrics import render_prometheus
+from services.tracing import trace_buffer
+from utils.loop_watchdog import loop_watchdog
+from utils.startup_profiler import startup_profiler
+
+router = APIRouter()
+
+# Mounted at the app root so scrapers find /metrics; guarded by a static
+# bearer token (METRICS_TOKEN) when one is configured. Production never
+# serves it without one.
+prometheus_router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@prometheus_router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """All registered metrics in Prometheus text format"""
+    token = os.environ.get("METRICS_TOKEN")
+    if not token and os.environ.get("ENVIRONMENT", "development").lower() == "production":
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token:
+        supplied = request.headers.get("authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/db")
+async def get_db_metrics(current_admin: dict = Depends(get_current_admin)):
+    """Per-collection/command latency, per-route attribution and recent slow queries"""
+    return query_monitor.snapshot()
+
+
+@router.get("/startup")
+async def get_startup_profile(current_admin: dict = Depends(get_current_admin)):
+    """Import and init time per module/step from the last startup"""
+    return startup_profiler.report()
+
+
+@router.get("/loop-stalls")
+async def get_loop_stalls(current_admin: dict = Depends(get_current_admin)):
+    """Event loop stalls aggregated by the blocking call site"""
+    return loop_watchdog.report()
+
+
+@router.get("/traces")
+async def get_traces(
+    route: Optional[str] = None,
+    min_duration_ms: float = 0,
+    limit: int = 50,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """Recently sampled request traces, newest first (route like "POST /api/create-checkout-session")"""
+    return trace_buffer.query(route=route, min_duration_ms=min_duration_ms, limit=min(limit, 500))
@@ -1,10 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
 from middleware.auth_middleware import get_current_admin
 from config.database import orders_collection
+from services.response_cache import cached_response
+from services.cache_bus import publish_invalidation
 from typing import Optional
 
 router = APIRouter()
 
+# Orders in these states no longer change on their own, so reads can be cached
+TERMINAL_ORDER_STATUSES = {"delivered", "cancelled", "expired"}
+
+
+def is_terminal_order(order: dict) -> bool:
+    return order.get("status") in TERMINAL_ORDER_STATUSES
+
 
 @router.get("")
 async def get_all_orders(
@@ -21,6 +30,7 @@ async def get_all_orders(
 
 
 @router.get("/{order_id}")
+@cached_response(ttl=300, key=("path", "principal"), tags=("orders", "order:{order_id}"), cache_if=is_terminal_order)
 async def get_order(order_id: str, current_admin: dict = Depends(get_current_admin)):
     """Get single order"""
     order = await orders_collection.find_one({"id": order_id}, {"_id": 0})
@@ -47,5 +57,6 @@ async def update_order_status(
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Order not found")
+    await publish_invalidation(f"order:{order_id}")
     
     return {"message": "Order status updated successfully", "status": status}
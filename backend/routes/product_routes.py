@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from pydantic import BaseModel
 from models.product import ProductCreate, ProductUpdate, Product
 from middleware.auth_middleware import get_current_admin
 from config.database import products_collection
-from datetime import datetime
+from services.image_metadata import refresh_product_image_meta
+from datetime import datetime, timezone
 import uuid
 
 router = APIRouter()
@@ -23,7 +24,11 @@ async def get_all_products(current_admin: dict = Depends(get_current_admin)):
 
 
 @router.post("", response_model=dict)
-async def create_product(product: ProductCreate, current_admin: dict = Depends(get_current_admin)):
+async def create_product(
+    product: ProductCreate,
+    background_tasks: BackgroundTasks,
+    current_admin: dict = Depends(get_current_admin)
+):
     """Create new product"""
     # Check if slug exists
     existing = await products_collection.find_one({"slug": product.slug})
@@ -32,10 +37,12 @@ async def create_product(product: ProductCreate, current_admin: dict = Depends(g
     
     product_dict = product.model_dump()
     product_dict["id"] = str(uuid.uuid4())
-    product_dict["created_at"] = datetime.utcnow().isoformat()
-    product_dict["updated_at"] = datetime.utcnow().isoformat()
+    product_dict["created_at"] = datetime.now(timezone.utc).isoformat()
+    product_dict["updated_at"] = datetime.now(timezone.utc).isoformat()
     
     await products_collection.insert_one(product_dict)
+    # Image dimensions and placeholders are computed after the response is sent
+    background_tasks.add_task(refresh_product_image_meta, product_dict["id"])
     return {"message": "Product created successfully", "id": product_dict["id"], "slug": product.slug}
 
 
@@ -52,6 +59,7 @@ async def get_product(product_id: str, current_admin: dict = Depends(get_current
 async def update_product(
     product_id: str,
     product_update: ProductUpdate,
+    background_tasks: BackgroundTasks,
     current_admin: dict = Depends(get_current_admin)
 ):
     """Update product"""
@@ -66,12 +74,14 @@ async def update_product(
             raise HTTPException(status_code=400, detail="Slug already in use")
     
     update_data = {k: v for k, v in product_update.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.utcnow().isoformat()
+    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
     
     await products_collection.update_one(
         {"id": product_id},
         {"$set": update_data}
     )
+    if "hero_image_url" in update_data or "gallery_images" in update_data:
+        background_tasks.add_task(refresh_product_image_meta, product_id)
     
     return {"message": "Product updated successfully", "id": product_id}
 
@@ -94,7 +104,7 @@ async def update_stock(
     """Update product stock"""
     result = await products_collection.update_one(
         {"id": product_id},
-        {"$set": {"stock_quantity": payload.stock_quantity, "updated_at": datetime.utcnow().isoformat()}}
+        {"$set": {"stock_quantity": payload.stock_quantity, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -113,7 +123,7 @@ async def update_status(
     
     result = await products_collection.update_one(
         {"id": product_id},
-        {"$set": {"status": payload.status, "updated_at": datetime.utcnow().isoformat()}}
+        {"$set": {"status": payload.status, "updated_at": datetime.now(timezone.utc).isoformat()}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -1,12 +1,40 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, EmailStr
-from config.database import products_collection, newsletter_collection, contact_inquiries_collection
+from config.database import catalog_products_collection, newsletter_collection, contact_inquiries_collection
+from services.srcset import with_srcsets
+from services.ingestion import BatchWriter, QueueFull, RecentKeys
 from typing import List
+import hashlib
+import os
 import uuid
 from datetime import datetime, timezone
 
 router = APIRouter()
 
+# Signups are written behind in batches; the unique email index settles duplicates
+newsletter_writer = BatchWriter(
+    "newsletter",
+    newsletter_collection,
+    max_queue=int(os.environ.get("NEWSLETTER_QUEUE_SIZE", "10000")),
+    batch_size=int(os.environ.get("NEWSLETTER_BATCH_SIZE", "500")),
+    flush_interval=float(os.environ.get("NEWSLETTER_FLUSH_INTERVAL_S", "1")),
+)
+# Lets an immediate resubmission still get a 400 without a database read
+recent_newsletter_emails = RecentKeys(max_size=100000, window=24 * 3600)
+
+contact_writer = BatchWriter(
+    "contact_inquiries",
+    contact_inquiries_collection,
+    max_queue=int(os.environ.get("CONTACT_QUEUE_SIZE", "5000")),
+    batch_size=int(os.environ.get("CONTACT_BATCH_SIZE", "200")),
+    flush_interval=float(os.environ.get("CONTACT_FLUSH_INTERVAL_S", "2")),
+)
+# Identical submissions within the window are stored once
+recent_inquiries = RecentKeys(
+    max_size=50000,
+    window=float(os.environ.get("CONTACT_DEDUPE_WINDOW_S", "600"))
+)
+
 
 class NewsletterSubscribe(BaseModel):
     email: EmailStr
@@ -24,32 +52,35 @@ async def root():
 
 
 @router.get("/fragrances")
-async def get_published_fragrances():
+async def get_published_fragrances(include_srcset: bool = False):
     """Get all published fragrances for public view"""
-    fragrances = await products_collection.find(
+    fragrances = await catalog_products_collection.find(
         {"status": "published"},
         {"_id": 0}
     ).to_list(100)
+    if include_srcset:
+        fragrances = [with_srcsets(fragrance) for fragrance in fragrances]
     return fragrances
 
 
 @router.get("/fragrances/{slug}")
-async def get_fragrance_by_slug(slug: str):
+async def get_fragrance_by_slug(slug: str, include_srcset: bool = False):
     """Get single fragrance by slug"""
-    fragrance = await products_collection.find_one(
+    fragrance = await catalog_products_collection.find_one(
         {"slug": slug, "status": "published"},
         {"_id": 0}
     )
     if not fragrance:
         raise HTTPException(status_code=404, detail="Fragrance not found")
+    if include_srcset:
+        with_srcsets(fragrance)
     return fragrance
 
 
 @router.post("/newsletter")
 async def subscribe_newsletter(data: NewsletterSubscribe):
     """Newsletter subscription"""
-    existing = await newsletter_collection.find_one({"email": data.email})
-    if existing:
+    if recent_newsletter_emails.check_and_add(data.email):
         raise HTTPException(status_code=400, detail="Email already subscribed")
     
     subscription = {
@@ -57,19 +88,43 @@ async def subscribe_newsletter(data: NewsletterSubscribe):
         "email": data.email,
         "subscribed_at": datetime.now(timezone.utc).isoformat()
     }
-    await newsletter_collection.insert_one(subscription)
+    try:
+        newsletter_writer.submit(subscription)
+    except QueueFull as e:
+        recent_newsletter_emails.discard(data.email)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many signups right now, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     return {"message": "Successfully subscribed", "email": data.email}
 
 
 @router.post("/contact")
 async def create_contact_inquiry(data: ContactInquiry):
-    """Contact form submission"""
+    """Contact form submission (rate limited per IP by RateLimitMiddleware)"""
+    content_hash = hashlib.sha256(
+        "\x1f".join([data.name.strip().lower(), data.email.lower(), " ".join(data.message.split())]).encode()
+    ).digest()
+    inquiry_id = str(uuid.uuid4())
+    duplicate_of = recent_inquiries.check_and_add(content_hash, inquiry_id)
+    if duplicate_of:
+        return {"message": "Inquiry received", "id": duplicate_of}
+    
     inquiry = {
-        "id": str(uuid.uuid4()),
+        "id": inquiry_id,
         "name": data.name,
         "email": data.email,
         "message": data.message,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
-    await contact_inquiries_collection.insert_one(inquiry)
+    try:
+        contact_writer.submit(inquiry)
+    except QueueFull as e:
+        recent_inquiries.discard(content_hash)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many inquiries right now, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     return {"message": "Inquiry received", "id": inquiry["id"]}
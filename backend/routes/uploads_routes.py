@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Request
+from services.image_storage import LOCAL_UPLOADS_DIR
+from services.static_files import serve_static_file
+
+router = APIRouter()
+
+
+@router.api_route("/{file_path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_upload(file_path: str, request: Request):
+    """
+    Serve files written by LocalStorage, with Range, conditional requests and
+    immutable caching for content-addressed names.
+    """
+    return await serve_static_file(request, LOCAL_UPLOADS_DIR, file_path)
@@ -22,6 +22,7 @@ async def seed():
             "description": "A shadow caught in amber. The scent of dusk in an ancient library. Deep notes of blackened oud and smoked vanilla.",
             "short_description": "A shadow caught in amber.",
             "price": "$380",
+            "price_amount": 38000,
             "stock_quantity": 42,
             "status": "published",
             "identity": "The absence of light is not the absence of presence. Eclipse Noir is a composition that existence in the shadows, revealing itself only to those who dwell within them.",
@@ -40,6 +41,7 @@ async def seed():
             "description": "A promise whispered in a cathedral. Incense and cold stone. A meditative blend of frankincense and white musk.",
             "short_description": "A promise whispered in a cathedral.",
             "price": "$420",
+            "price_amount": 42000,
             "stock_quantity": 18,
             "status": "published",
             "identity": "A vow taken in silence is a vow that remains unbroken. Silent Vow captures the sacred atmosphere of a quiet cathedral at dawn.",
@@ -58,6 +60,7 @@ async def seed():
             "description": "The contrast of power and grace. Cold metal against warm skin. Saffron and metallic violet leaf over a base of raw silk.",
             "short_description": "The contrast of power and grace.",
             "price": "$450",
+            "price_amount": 45000,
             "stock_quantity": 24,
             "status": "published",
             "identity": "Strength is not purely structural. Iron & Silk explores the duality of the modern experience: the rigid architecture of the world against the softness of the soul.",
@@ -2,10 +2,20 @@ from fastapi import FastAPI, APIRouter, HTTPException, Depends, status as http_s
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from contextlib import asynccontextmanager
+import asyncio
 from dotenv import load_dotenv
 from pathlib import Path
 import os
 import logging
+from utils.startup_profiler import startup_profiler
+from utils.logging_config import configure_logging, logging_pipeline
+from middleware.request_context import RequestContextMiddleware
+from middleware.metrics_middleware import HttpMetricsMiddleware
+from middleware.rate_limit import RateLimitMiddleware
+from services.tracing import TracedJSONResponse, TracingMiddleware
+from services.response_cache import cached_response
+from migrations import check_required_migrations, migration_gate
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -19,12 +29,84 @@ validate_env()
 ENV_MODE = os.environ.get("ENVIRONMENT", "development").lower()
 IS_PRODUCTION = ENV_MODE == "production"
 
+
+async def seed_default_admin():
+    """Create default admin user if doesn't exist (only in non-production)"""
+    if IS_PRODUCTION:
+        logger.info("Production mode: Default admin seeding disabled.")
+        return
+
+    from config.database import admin_users_collection
+    from services.auth_service import get_password_hash
+
+    existing_admin = await admin_users_collection.find_one({"email": "admin@arar-perfume.com"})
+    if not existing_admin:
+        # bcrypt is CPU-bound; hash off the loop so the other init steps keep running
+        hashed_password = await asyncio.to_thread(get_password_hash, "ArarAdmin2024!")
+        default_admin = {
+            "id": "default-admin",
+            "email": "admin@arar-perfume.com",
+            "full_name": "ARAR Admin",
+            "role": "admin",
+            "is_active": True,
+            "hashed_password": hashed_password,
+            "created_at": None
+        }
+        await admin_users_collection.insert_one(default_admin)
+        logger.info("Default admin user created: admin@arar-perfume.com / ArarAdmin2024!")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logging_pipeline.start()
+    logger.info("ARAR Perfume API starting up...")
+    from config.database import client, initialize_database, warm_connection_pool
+
+    # Independent init steps run concurrently
+    await startup_profiler.run_concurrently({
+        "initialize_database": initialize_database,
+        "warm_connection_pool": warm_connection_pool,
+        "seed_default_admin": seed_default_admin,
+        "check_required_migrations": check_required_migrations,
+    })
+    startup_profiler.mark_complete()
+
+    from services.cache_bus import invalidation_bus
+    invalidation_bus.start()
+
+    from services.loop_lag import loop_lag_sampler
+    from utils.loop_watchdog import WATCHDOG_ENABLED, loop_watchdog
+    loop_lag_sampler.start()
+    if WATCHDOG_ENABLED:
+        loop_watchdog.start()
+
+    yield
+
+    loop_watchdog.stop()
+    await loop_lag_sampler.stop()
+    await invalidation_bus.stop()
+
+    from services.image_derivatives import shutdown_derivative_engine
+    from services.ingestion import stop_batch_writers
+    from services.static_files import file_cache
+    # Drain write-behind queues while the database client is still open
+    await stop_batch_writers()
+    shutdown_derivative_engine()
+    file_cache.close()
+    client.close()
+    logger.info("ARAR Parfums API shutting down...")
+    # Flush queued records before the process exits
+    logging_pipeline.stop()
+
+
 # Create FastAPI app with hardened settings
 app = FastAPI(
     title="ARAR Perfume API",
     version="2.0.0",
     redirect_slashes=False,
-    debug=not IS_PRODUCTION
+    debug=not IS_PRODUCTION,
+    lifespan=lifespan,
+    default_response_class=TracedJSONResponse
 )
 
 # CORS Middleware - Strict Origin Enforcement
@@ -33,6 +115,15 @@ if IS_PRODUCTION and not cors_origin:
     # This should be caught by validator, but as a secondary guard:
     raise RuntimeError("CORS_ORIGIN must be set in production mode.")
 
+# Makes the current route visible to DB command monitoring
+app.add_middleware(RequestContextMiddleware)
+# Per-route latency, status and size metrics (exported on /metrics)
+app.add_middleware(HttpMetricsMiddleware)
+# Span breakdown in Server-Timing, sampled traces at /api/admin/metrics/traces
+app.add_middleware(TracingMiddleware)
+# Cheap 429s for login, checkout and the public forms, ahead of everything else
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -41,18 +132,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-log_level = logging.INFO if IS_PRODUCTION else logging.DEBUG
-logging.basicConfig(
-    level=log_level,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging: records are queued and written by a background thread
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Global Exception Handler to prevent exposing stack traces in production
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    logger.error(f"Unhandled exception: {str(exc)}", exc_info=not IS_PRODUCTION)
+    logger.error("Unhandled exception: %s", exc, exc_info=not IS_PRODUCTION)
     if IS_PRODUCTION:
         return Response(
             content='{"detail": "Internal Server Error"}',
@@ -65,8 +152,16 @@ async def global_exception_handler(request, exc):
         return await http_exception_handler(request, exc)
     raise exc
 
-# Import routes
-from routes import admin_routes, product_routes, collection_routes, order_routes, public_routes, checkout_routes, media_routes
+# Import routes (timed by the startup profiler)
+admin_routes = startup_profiler.import_module("routes.admin_routes")
+product_routes = startup_profiler.import_module("routes.product_routes")
+collection_routes = startup_profiler.import_module("routes.collection_routes")
+order_routes = startup_profiler.import_module("routes.order_routes")
+public_routes = startup_profiler.import_module("routes.public_routes")
+checkout_routes = startup_profiler.import_module("routes.checkout_routes")
+media_routes = startup_profiler.import_module("routes.media_routes")
+metrics_routes = startup_profiler.import_module("routes.metrics_routes")
+uploads_routes = startup_profiler.import_module("routes.uploads_routes")
 
 # Include routers
 app.include_router(public_routes.router, prefix="/api", tags=["Public"])
@@ -76,42 +171,9 @@ app.include_router(product_routes.router, prefix="/api/admin/products", tags=["P
 app.include_router(collection_routes.router, prefix="/api/admin/collections", tags=["Collections"])
 app.include_router(order_routes.router, prefix="/api/admin/orders", tags=["Orders"])
 app.include_router(media_routes.router, prefix="/api/media", tags=["Media"])
-
-
-@app.on_event("startup")
-async def startup_event():
-    logger.info("ARAR Perfume API starting up...")
-    # Database initialization
-    from config.database import initialize_database
-    await initialize_database()
-    
-    # Create default admin user if doesn't exist (only in non-production)
-    if not IS_PRODUCTION:
-        from config.database import admin_users_collection
-        from services.auth_service import get_password_hash
-        
-        existing_admin = await admin_users_collection.find_one({"email": "admin@arar-perfume.com"})
-        if not existing_admin:
-            default_admin = {
-                "id": "default-admin",
-                "email": "admin@arar-perfume.com",
-                "full_name": "ARAR Admin",
-                "role": "admin",
-                "is_active": True,
-                "hashed_password": get_password_hash("ArarAdmin2024!"),
-                "created_at": None
-            }
-            await admin_users_collection.insert_one(default_admin)
-            logger.info("Default admin user created: admin@arar-perfume.com / ArarAdmin2024!")
-    else:
-        logger.info("Production mode: Default admin seeding disabled.")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    from config.database import client
-    client.close()
-    logger.info("ARAR Parfums API shutting down...")
+app.include_router(metrics_routes.router, prefix="/api/admin/metrics", tags=["Metrics"])
+app.include_router(uploads_routes.router, prefix="/uploads", tags=["Uploads"])
+app.include_router(metrics_routes.prometheus_router, tags=["Metrics"])
 
 
 @app.get("/")
@@ -125,6 +187,18 @@ async def health_check():
 
 
 @app.get("/api/health")
+@cached_response(ttl=5, key=("path",))
 async def api_health_check():
     """Health check endpoint under /api prefix for Kubernetes routing."""
-    return {"status": "healthy", "version": "2.0.0", "service": "arar-perfume"}
+    from config.database import db
+    pending = await migration_gate.pending(db)
+    if pending and IS_PRODUCTION:
+        # Not ready: the code expects data migrations that have not run
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "migrations_pending", "pending_migrations": pending},
+        )
+    body = {"status": "healthy", "version": "2.0.0", "service": "arar-perfume"}
+    if pending:
+        body["pending_migrations"] = pending
+    return body
@@ -0,0 +1,183 @@
+"""
+Cross-worker cache invalidation bus.
+
+Each worker keeps its own in-process response cache (services/response_cache.py).
+Writers call `publish_invalidation(*tags)`, which evicts the tags locally and
+appends an event to the `cache_invalidations` capped collection. Every worker
+tails that collection with a tailable, awaiting cursor and evicts the same tags
+from its own cache, so an admin write handled by one worker is visible on all
+of them within one cursor round trip, with no extra infrastructure.
+
+A capped collection is used rather than a change stream because it works on
+standalone servers as well as replica sets. If the tail is interrupted (network
+error, or the capped collection wrapped past our position) the worker cannot
+know which events it missed, so it clears its whole cache before resuming.
+Events are read in natural (server insertion) order: `_id`s are generated by
+each worker's driver and do not order events across processes.
+
+With the in-memory database backend there is a single process, so the bus only
+evicts locally.
+
+Configuration:
+    CACHE_BUS_ENABLED       Tail and publish through MongoDB (default 1)
+    CACHE_BUS_SIZE_BYTES    Size of the capped collection (default 1 MiB)
+    CACHE_BUS_MAX_EVENTS    Maximum events kept in it (default 10000)
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+from services.metrics import CounterFamily
+from services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_BUS_ENABLED = os.environ.get("CACHE_BUS_ENABLED", "1").lower() in ("1", "true", "yes")
+CACHE_BUS_SIZE_BYTES = int(os.environ.get("CACHE_BUS_SIZE_BYTES", str(1024 * 1024)))
+CACHE_BUS_MAX_EVENTS = int(os.environ.get("CACHE_BUS_MAX_EVENTS", "10000"))
+COLLECTION_NAME = "cache_invalidations"
+
+# Pause before re-opening the tail after an error or a dead cursor
+RETAIL_DELAY_S = 1.0
+AWAIT_TIME_MS = 1000
+
+CACHE_BUS_EVENTS = CounterFamily(
+    "cache_bus_events_total",
+    "Cache invalidation events by direction",
+    ("direction",),
+)
+
+
+class InvalidationBus:
+    def __init__(self, database=None, cache=response_cache):
+        self._database = database
+        self.cache = cache
+        self.origin = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._collection = None
+
+    @property
+    def database(self):
+        if self._database is None:
+            from config.database import db
+            self._database = db
+        return self._database
+
+    @property
+    def distributed(self) -> bool:
+        from config.database import supports_tailable_cursors
+        return CACHE_BUS_ENABLED and supports_tailable_cursors
+
+    async def _ensure_collection(self):
+        if self._collection is not None:
+            return self._collection
+        try:
+            await self.database.create_collection(
+                COLLECTION_NAME, capped=True, size=CACHE_BUS_SIZE_BYTES, max=CACHE_BUS_MAX_EVENTS
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        collection = self.database[COLLECTION_NAME]
+        options = await collection.options()
+        if not options.get("capped"):
+            raise RuntimeError(f"{COLLECTION_NAME} exists but is not a capped collection")
+        self._collection = collection
+        return collection
+
+    async def publish(self, *tags: str):
+        """Evict `tags` here and tell every other worker to do the same."""
+        self.cache.invalidate_tags(tags)
+        if not self.distributed:
+            return
+        try:
+            collection = await self._ensure_collection()
+            await collection.insert_one({
+                "tags": list(tags),
+                "origin": self.origin,
+                "at": datetime.now(timezone.utc),
+            })
+            CACHE_BUS_EVENTS.inc("published")
+        except PyMongoError as e:
+            # The write itself succeeded; other workers converge when entries expire
+            logger.warning("Could not publish cache invalidation for %s: %s", tags, e)
+
+    async def _newest_id(self, collection):
+        newest = await collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        if newest is None:
+            # Tailable cursors on an empty capped collection die immediately
+            await collection.insert_one({"tags": [], "origin": self.origin, "at": datetime.now(timezone.utc)})
+            newest = await collection.find_one({}, {"_id": 1}, sort=[("$natural", -1)])
+        return newest["_id"]
+
+    async def _tail(self):
+        collection = await self._ensure_collection()
+        # Start after the newest event: older ones predate our (empty) cache
+        last_id = await self._newest_id(collection)
+
+        while True:
+            if await collection.find_one({"_id": last_id}, {"_id": 1}) is None:
+                # The capped collection wrapped past our position: events were lost
+                logger.warning("Cache invalidation tail fell behind, clearing local cache")
+                self.cache.clear()
+                last_id = await self._newest_id(collection)
+            # ObjectIds come from each worker's driver and are not ordered across
+            # processes, so resume by natural (server insertion) order instead of
+            # an _id range: replay from the start, skipping up to the last event seen.
+            cursor = collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT, max_await_time_ms=AWAIT_TIME_MS)
+            caught_up = False
+            try:
+                while cursor.alive:
+                    async for event in cursor:
+                        if not caught_up:
+                            caught_up = event["_id"] == last_id
+                            continue
+                        last_id = event["_id"]
+                        if event.get("origin") != self.origin and event.get("tags"):
+                            self.cache.invalidate_tags(event["tags"])
+                            CACHE_BUS_EVENTS.inc("received")
+            except PyMongoError as e:
+                logger.warning("Cache invalidation tail interrupted, clearing local cache: %s", e)
+                self.cache.clear()
+            finally:
+                await cursor.close()
+            await asyncio.sleep(RETAIL_DELAY_S)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tail()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cache invalidation bus unavailable, retrying: %s", e)
+                self._collection = None
+                self.cache.clear()
+                await asyncio.sleep(RETAIL_DELAY_S * 5)
+
+    def start(self):
+        if not self.distributed or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(), name="cache-invalidation-bus")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+invalidation_bus = InvalidationBus()
+
+
+async def publish_invalidation(*tags: str):
+    await invalidation_bus.publish(*tags)
@@ -0,0 +1,221 @@
+"""
+Responsive image derivatives for self-hosted (LocalStorage) deployments.
+
+When Cloudinary is not configured, `LocalStorage.get_optimized_url` points at
+`/api/media/derived/<public_id>?w=<width>&q=<quality>`. The first request for a
+given variant renders it with Pillow in a process pool; the result is cached on
+disk under a key made of the source's content hash and the render parameters,
+so every later request (and every other worker) serves the file directly.
+
+Requested widths snap up to the nearest standard width and qualities must be one
+of the QUALITY_LADDER steps (or an "auto" alias), so an anonymous client can make
+at most a few dozen renders per image. Images are never upscaled.
+
+Configuration:
+    IMAGE_DERIVATIVE_WORKERS   Processes used for rendering (default: min(2, CPU count))
+"""
+
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STANDARD_WIDTHS = (320, 640, 960, 1280, 1920)
+# "auto" quality levels, in the spirit of Cloudinary's q_auto variants
+AUTO_QUALITIES = {"auto": 80, "auto:best": 90, "auto:good": 80, "auto:eco": 70, "auto:low": 60}
+QUALITY_LADDER = tuple(sorted(set(AUTO_QUALITIES.values())))
+FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+DERIVED_DIR = "_derived"
+
+_HASH_CACHE_SIZE = 4096
+
+
+def snap_width(width: int) -> int:
+    """Smallest standard width that is >= width (the largest one for anything bigger)."""
+    for standard in STANDARD_WIDTHS:
+        if width <= standard:
+            return standard
+    return STANDARD_WIDTHS[-1]
+
+
+class UnsupportedImageError(Exception):
+    """The source file exists but Pillow cannot decode it."""
+
+
+def parse_quality(quality) -> int:
+    """
+    Map an "auto" alias or a numeric quality to a QUALITY_LADDER step; numbers
+    from 1 to 100 snap to the nearest step. Raises ValueError for anything else.
+    """
+    if not isinstance(quality, int):
+        quality = str(quality).strip().lower()
+        if quality in AUTO_QUALITIES:
+            return AUTO_QUALITIES[quality]
+        try:
+            quality = int(quality)
+        except ValueError:
+            raise ValueError(f"Unsupported quality: {quality!r}") from None
+    if not 1 <= quality <= 100:
+        raise ValueError(f"Quality must be between 1 and 100: {quality}")
+    return min(QUALITY_LADDER, key=lambda step: (abs(step - quality), step))
+
+
+def render_derivative(source_path: str, target_path: str, width: int, quality: int, fmt: str) -> Tuple[int, int]:
+    """
+    Resize `source_path` to at most `width` pixels wide and encode it to `target_path`.
+    Runs in a worker process; returns the output dimensions.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+
+        if fmt == "jpeg":
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            options = {"quality": quality, "optimize": True, "progressive": True}
+        else:
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            options = {"quality": quality, "method": 4}
+
+        # Write then rename, so concurrent readers never see a partial file
+        temp_path = f"{target_path}.{os.getpid()}.tmp"
+        image.save(temp_path, FORMATS[fmt], **options)
+        os.replace(temp_path, target_path)
+        return image.width, image.height
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class DerivativeEngine:
+    def __init__(self, base_path: str, max_workers: Optional[int] = None):
+        self.base_path = os.path.realpath(base_path)
+        self.cache_dir = os.path.join(self.base_path, DERIVED_DIR)
+        self.max_workers = max_workers or int(
+            os.environ.get("IMAGE_DERIVATIVE_WORKERS", min(2, os.cpu_count() or 1))
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Content hashes of sources Pillow could not decode, so they are not retried
+        self._unsupported: "OrderedDict[str, None]" = OrderedDict()
+        # (path, mtime_ns, size) -> sha256, so unchanged sources are hashed once
+        self._hashes: "OrderedDict[tuple, str]" = OrderedDict()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs Motor/executor threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def resolve_source(self, public_id: str) -> Optional[str]:
+        """Absolute path of an original upload, or None if missing or outside the uploads dir."""
+        path = os.path.realpath(os.path.join(self.base_path, public_id))
+        if not path.startswith(self.base_path + os.sep) or path.startswith(self.cache_dir + os.sep):
+            return None
+        return path if os.path.isfile(path) else None
+
+    async def content_hash(self, source_path: str) -> str:
+        stat = os.stat(source_path)
+        key = (source_path, stat.st_mtime_ns, stat.st_size)
+        digest = self._hashes.get(key)
+        if digest is None:
+            from services.image_storage import run_blocking
+            digest = await run_blocking(_hash_file, source_path)
+            self._hashes[key] = digest
+            if len(self._hashes) > _HASH_CACHE_SIZE:
+                self._hashes.popitem(last=False)
+        else:
+            self._hashes.move_to_end(key)
+        return digest
+
+    def derivative_path(self, digest: str, width: int, quality: int, fmt: str) -> str:
+        extension = "jpg" if fmt == "jpeg" else fmt
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}_w{width}_q{quality}.{extension}")
+
+    async def get_derivative(self, public_id: str, width: int, quality="auto", fmt: str = "webp") -> Optional[str]:
+        """
+        Path of the requested variant, rendering it on first request.
+        Returns None when the original does not exist; raises UnsupportedImageError
+        when it is not an image.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported derivative format: {fmt}")
+        source_path = self.resolve_source(public_id)
+        if source_path is None:
+            return None
+
+        width = snap_width(width)
+        quality = parse_quality(quality)
+        digest = await self.content_hash(source_path)
+        if digest in self._unsupported:
+            raise UnsupportedImageError(f"Not a supported image: {public_id}")
+        target_path = self.derivative_path(digest, width, quality, fmt)
+        if os.path.exists(target_path):
+            return target_path
+
+        # Single-flight: concurrent requests for the same variant share one render
+        pending = self._inflight.get(target_path)
+        if pending is None:
+            pending = asyncio.ensure_future(self._render(source_path, target_path, digest, width, quality, fmt))
+            self._inflight[target_path] = pending
+        await asyncio.shield(pending)
+        return target_path
+
+    async def _render(self, source_path: str, target_path: str, digest: str, width: int, quality: int, fmt: str):
+        from PIL import UnidentifiedImageError
+
+        try:
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            loop = asyncio.get_running_loop()
+            size = await loop.run_in_executor(
+                self._get_executor(), render_derivative, source_path, target_path, width, quality, fmt
+            )
+        except UnidentifiedImageError:
+            self._unsupported[digest] = None
+            if len(self._unsupported) > _HASH_CACHE_SIZE:
+                self._unsupported.popitem(last=False)
+            raise UnsupportedImageError(f"Not a supported image: {os.path.basename(source_path)}") from None
+        finally:
+            # Failed renders must not be handed to later requests
+            self._inflight.pop(target_path, None)
+        logger.info("Rendered derivative %s (%dx%d)", os.path.basename(target_path), *size)
+
+
+_engine: Optional[DerivativeEngine] = None
+
+
+def get_derivative_engine() -> DerivativeEngine:
+    global _engine
+    if _engine is None:
+        from services.image_storage import LOCAL_UPLOADS_DIR
+        _engine = DerivativeEngine(LOCAL_UPLOADS_DIR)
+    return _engine
+
+
+def shutdown_derivative_engine():
+    if _engine is not None:
+        _engine.shutdown()
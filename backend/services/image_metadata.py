@@ -0,0 +1,298 @@
+"""
+Image metadata for product images: real dimensions plus placeholders.
+
+For every product image we store
+    {"url", "width", "height", "blurhash", "lqip"}
+next to the URLs on the product document (`hero_image_meta`, and
+`gallery_images_meta` aligned with `gallery_images`), so catalog responses
+carry them without any per-request work. `lqip` is a tiny base64 WebP data
+URI; `blurhash` is the compact string form for clients that decode it.
+
+The metadata is computed by a background job after a product is created or its
+images change, and can be backfilled for existing products with:
+
+    python -m services.image_metadata [--force]
+
+Dimensions come from the image header only (Pillow opens lazily; remote images
+are fetched with a ranged request). Placeholders are rendered from a heavily
+downscaled decode: JPEG draft mode locally, a tiny Cloudinary transformation
+for Cloudinary URLs. Other remote images are downloaded once, up to
+IMAGE_META_MAX_BYTES.
+
+Configuration:
+    IMAGE_META_CONCURRENCY    Images processed in parallel per job (default 4)
+    IMAGE_META_MAX_BYTES      Largest remote image downloaded in full (default 20 MiB)
+    IMAGE_META_TIMEOUT_S      HTTP timeout for remote images (default 10)
+"""
+
+import asyncio
+import base64
+import io
+import logging
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from utils.blurhash import encode as blurhash_encode
+
+logger = logging.getLogger(__name__)
+
+META_CONCURRENCY = int(os.environ.get("IMAGE_META_CONCURRENCY", "4"))
+META_MAX_BYTES = int(os.environ.get("IMAGE_META_MAX_BYTES", str(20 * 1024 * 1024)))
+META_TIMEOUT_S = float(os.environ.get("IMAGE_META_TIMEOUT_S", "10"))
+
+HEADER_PROBE_BYTES = 64 * 1024
+BLURHASH_SIZE = 32
+BLURHASH_COMPONENTS = (4, 3)
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+
+# EXIF orientations that rotate the image by 90 degrees
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+_CLOUDINARY_UPLOAD = re.compile(r"^(https?://res\.cloudinary\.com/[^/]+/image/upload/)(.+)$")
+
+
+def _oriented_size(image) -> Tuple[int, int]:
+    """Display size of a (lazily opened) image, honouring EXIF orientation."""
+    width, height = image.size
+    try:
+        orientation = image.getexif().get(0x0112)
+    except Exception:
+        orientation = None
+    if orientation in _TRANSPOSED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def probe_file_dimensions(path: str) -> Optional[Tuple[int, int]]:
+    """Width and height from the file header, or None if it is not a readable image."""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as image:
+            return _oriented_size(image)
+    except Exception:
+        return None
+
+
+def _placeholders(image) -> Dict[str, str]:
+    """Blurhash and LQIP data URI for an opened image. Blocking; call off the loop."""
+    from PIL import Image, ImageOps
+
+    # JPEG can decode at 1/2..1/8 scale, which skips most of the IDCT work
+    image.draft("RGB", (BLURHASH_SIZE * 4, BLURHASH_SIZE * 4))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    small = image.copy()
+    small.thumbnail((BLURHASH_SIZE, BLURHASH_SIZE), Image.BILINEAR)
+    blurhash = blurhash_encode(list(small.getdata()), small.width, small.height, *BLURHASH_COMPONENTS)
+
+    lqip_height = max(1, round(image.height * LQIP_WIDTH / image.width))
+    lqip = image.resize((LQIP_WIDTH, lqip_height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    lqip.save(buffer, "WEBP", quality=LQIP_QUALITY)
+    return {
+        "blurhash": blurhash,
+        "lqip": "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"),
+    }
+
+
+def analyze_image(source) -> Dict:
+    """Dimensions and placeholders for a path or file-like object. Blocking."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        width, height = _oriented_size(image)
+        return {"width": width, "height": height, **_placeholders(image)}
+
+
+def local_path_for_url(url: str) -> Optional[str]:
+    """Filesystem path of a `/uploads/...` URL served by LocalStorage, if any."""
+    if not url.startswith("/uploads/"):
+        return None
+    from services.image_storage import LOCAL_UPLOADS_DIR
+    from services.static_files import resolve_path
+    return resolve_path(LOCAL_UPLOADS_DIR, url[len("/uploads/"):].split("?", 1)[0])
+
+
+def cloudinary_thumbnail_url(url: str) -> Optional[str]:
+    """A tiny JPEG rendition of a Cloudinary delivery URL, for placeholders."""
+    match = _CLOUDINARY_UPLOAD.match(url)
+    if not match:
+        return None
+    return f"{match.group(1)}w_{BLURHASH_SIZE * 2},c_limit,f_jpg,q_60/{match.group(2)}"
+
+
+async def _fetch(client, url: str, limit: int, headers: Optional[dict] = None) -> bytes:
+    async with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= limit:
+                break
+        return bytes(body[:limit])
+
+
+async def probe_remote_dimensions(client, url: str) -> Optional[Tuple[int, int]]:
+    """Parse just the header of a remote image (first HEADER_PROBE_BYTES)."""
+    from PIL import ImageFile
+
+    header = await _fetch(client, url, HEADER_PROBE_BYTES, headers={"Range": f"bytes=0-{HEADER_PROBE_BYTES - 1}"})
+    parser = ImageFile.Parser()
+    try:
+        parser.feed(header)
+    except Exception:
+        return None
+    if parser.image is None:
+        return None
+    return _oriented_size(parser.image)
+
+
+async def compute_image_meta(url: str, client=None) -> Optional[Dict]:
+    """Metadata for one image URL, or None if it cannot be read."""
+    from services.image_storage import run_blocking
+
+    if not url:
+        return None
+    try:
+        path = local_path_for_url(url)
+        if path is not None:
+            meta = await run_blocking(analyze_image, path)
+        elif url.startswith(("http://", "https://")):
+            meta = await _compute_remote_meta(url, client)
+        else:
+            return None
+    except Exception as e:
+        logger.warning("Could not compute image metadata for %s: %s", url, e)
+        return None
+    return {"url": url, **meta}
+
+
+async def _compute_remote_meta(url: str, client=None) -> Dict:
+    import httpx
+    from services.image_storage import run_blocking
+
+    if client is None:
+        async with httpx.AsyncClient(timeout=META_TIMEOUT_S, follow_redirects=True) as own_client:
+            return await _compute_remote_meta(url, own_client)
+
+    thumbnail_url = cloudinary_thumbnail_url(url)
+    if thumbnail_url is not None:
+        dimensions, thumbnail = await asyncio.gather(
+            probe_remote_dimensions(client, url),
+            _fetch(client, thumbnail_url, META_MAX_BYTES),
+        )
+        if dimensions is not None:
+            placeholders = await run_blocking(_placeholders_from_bytes, thumbnail)
+            return {"width": dimensions[0], "height": dimensions[1], **placeholders}
+
+    body = await _fetch(client, url, META_MAX_BYTES)
+    return await run_blocking(analyze_image, io.BytesIO(body))
+
+
+def _placeholders_from_bytes(data: bytes) -> Dict[str, str]:
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        return _placeholders(image)
+
+
+def is_meta_current(product: dict) -> bool:
+    """True when the stored metadata describes the product's current image URLs."""
+    hero_meta = product.get("hero_image_meta") or {}
+    if hero_meta.get("url") != product.get("hero_image_url"):
+        return False
+    gallery = product.get("gallery_images") or []
+    gallery_meta = product.get("gallery_images_meta") or []
+    return len(gallery_meta) == len(gallery) and all(
+        (meta or {}).get("url") == url for meta, url in zip(gallery_meta, gallery)
+    )
+
+
+_PRODUCT_IMAGE_PROJECTION = {
+    "_id": 0, "id": 1, "hero_image_url": 1, "gallery_images": 1,
+    "hero_image_meta": 1, "gallery_images_meta": 1,
+}
+
+
+async def refresh_product_image_meta(product_id: str, collection=None, force: bool = False) -> bool:
+    """
+    Compute and store image metadata for one product.
+
+    Entries whose URL is unchanged are reused unless `force` is set. The write is
+    conditional on the image URLs still being the ones we processed, so a job
+    racing with a newer edit never stores stale metadata. Returns True if written.
+    """
+    if collection is None:
+        from config.database import products_collection as collection
+
+    product = await collection.find_one({"id": product_id}, _PRODUCT_IMAGE_PROJECTION)
+    if not product:
+        return False
+    if not force and is_meta_current(product):
+        return False
+
+    hero_url = product.get("hero_image_url") or ""
+    gallery = list(product.get("gallery_images") or [])
+    known = {}
+    if not force:
+        for meta in [product.get("hero_image_meta"), *(product.get("gallery_images_meta") or [])]:
+            if meta and meta.get("url"):
+                known[meta["url"]] = meta
+
+    import httpx
+
+    semaphore = asyncio.Semaphore(META_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=META_TIMEOUT_S, follow_redirects=True) as client:
+        async def meta_for(url: str):
+            if url in known:
+                return known[url]
+            async with semaphore:
+                return await compute_image_meta(url, client)
+
+        metas = await asyncio.gather(*(meta_for(url) for url in [hero_url, *gallery]))
+
+    result = await collection.update_one(
+        {"id": product_id, "hero_image_url": product.get("hero_image_url"), "gallery_images": product.get("gallery_images")},
+        {"$set": {"hero_image_meta": metas[0], "gallery_images_meta": list(metas[1:])}},
+    )
+    if result.modified_count:
+        logger.info("Stored image metadata for product %s (%d images)", product_id, len(metas))
+    return bool(result.modified_count)
+
+
+async def backfill_image_meta(collection=None, force: bool = False, concurrency: int = 2) -> int:
+    """Refresh every product whose image metadata is missing or stale. Returns the number updated."""
+    if collection is None:
+        from config.database import products_collection as collection
+
+    pending = []
+    async for product in collection.find({}, _PRODUCT_IMAGE_PROJECTION):
+        if force or not is_meta_current(product):
+            pending.append(product["id"])
+    logger.info("Backfilling image metadata for %d products", len(pending))
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def refresh(product_id: str) -> bool:
+        async with semaphore:
+            return await refresh_product_image_meta(product_id, collection, force=force)
+
+    results = await asyncio.gather(*(refresh(product_id) for product_id in pending))
+    return sum(results)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backfill product image dimensions and placeholders")
+    parser.add_argument("--force", action="store_true", help="Recompute metadata that is already current")
+    parser.add_argument("--concurrency", type=int, default=2, help="Products processed in parallel")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    updated = asyncio.run(backfill_image_meta(force=args.force, concurrency=args.concurrency))
+    print(f"Updated image metadata on {updated} products")
@@ -15,16 +15,154 @@ Usage:
     
     storage = ImageStorageService()
     url = await storage.upload(file_bytes, filename="product_hero.jpg")
+    results = await storage.upload_many([(hero_bytes, "hero.jpg"), (detail_bytes, "detail.jpg")])
     await storage.delete(public_id)
+
+Provider SDK calls and file I/O are blocking, so they run on a bounded thread
+pool rather than on the event loop:
+    - IMAGE_STORAGE_MAX_WORKERS   Size of the storage thread pool (default 4)
+    - IMAGE_UPLOAD_CONCURRENCY    Max parallel uploads per upload_many call (default 4)
+    - IMAGE_UPLOAD_TIMEOUT_S      Per-file upload timeout in seconds (default 60)
+
+ImageStorageService stores images content-addressed: uploads are named after
+the SHA-256 of their bytes and recorded in the `image_assets` collection with a
+reference count. Uploading bytes that are already stored returns the existing
+asset without contacting the provider, and `delete` only removes the underlying
+file once the last reference is released.
+
+Large files can be uploaded with `upload_stream`, which takes an async iterator
+of byte chunks (see `iter_upload_file`). Chunks are hashed and written to a
+temporary file off the loop and the file is renamed into place atomically, so
+peak memory per upload is one chunk regardless of file size.
 """
 
 import os
+import asyncio
+import functools
+import hashlib
 import logging
-from typing import Optional
+import tempfile
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
 from abc import ABC, abstractmethod
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from services.image_metadata import probe_file_dimensions
+from services.tracing import span
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+LOCAL_UPLOADS_DIR = os.environ.get('LOCAL_UPLOADS_DIR', '/app/uploads')
+
+STORAGE_MAX_WORKERS = int(os.environ.get('IMAGE_STORAGE_MAX_WORKERS', '4'))
+UPLOAD_CONCURRENCY = int(os.environ.get('IMAGE_UPLOAD_CONCURRENCY', '4'))
+UPLOAD_TIMEOUT_S = float(os.environ.get('IMAGE_UPLOAD_TIMEOUT_S', '60'))
+
+# Retries when an upload races with the deletion of the same content
+DEDUP_MAX_ATTEMPTS = 5
+DEDUP_RETRY_DELAY_S = 0.05
+
+_storage_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_storage_executor() -> ThreadPoolExecutor:
+    """Shared, bounded pool for blocking storage calls (created on first use)."""
+    global _storage_executor
+    if _storage_executor is None:
+        _storage_executor = ThreadPoolExecutor(
+            max_workers=STORAGE_MAX_WORKERS,
+            thread_name_prefix="image-storage"
+        )
+    return _storage_executor
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking storage call on the storage pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_storage_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def iter_upload_file(upload_file, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Yield the body of a FastAPI/Starlette UploadFile in chunks."""
+    while True:
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+async def _single_chunk(data: bytes) -> AsyncIterator[bytes]:
+    yield data
+
+
+def _write_chunk(file_obj, hasher, chunk: bytes):
+    hasher.update(chunk)
+    file_obj.write(chunk)
+
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+async def _iter_file(path: str, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    with open(path, 'rb') as f:
+        while True:
+            chunk = await run_blocking(f.read, chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def content_addressed_name(digest: str, filename: str) -> str:
+    """Storage name for content with the given SHA-256, keeping the original extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    return f"{digest[:32]}{extension}"
+
+
+def _remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def spool_chunks(
+    chunks: AsyncIterator[bytes],
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> Tuple[str, str, int]:
+    """
+    Write a stream of chunks to a new temporary file, hashing as it goes.
+    
+    Hashing and writing happen on the storage pool, one chunk at a time.
+    The caller owns the returned file and must rename or remove it.
+    
+    Returns:
+        (temp_path, sha256_hex, size_in_bytes)
+    
+    Raises:
+        ValueError: if the stream exceeds max_bytes (the temp file is removed)
+    """
+    if directory:
+        await run_blocking(os.makedirs, directory, exist_ok=True)
+    fd, temp_path = await run_blocking(tempfile.mkstemp, dir=directory, prefix=".upload-", suffix=".part")
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise ValueError(f"Upload exceeds the maximum size of {max_bytes} bytes")
+                await run_blocking(_write_chunk, f, hasher, chunk)
+    except BaseException:
+        await asyncio.shield(run_blocking(_remove_quietly, temp_path))
+        raise
+    return temp_path, hasher.hexdigest(), size
+
 
 class BaseImageStorage(ABC):
     """Abstract base class for image storage providers."""
@@ -34,6 +172,17 @@ class BaseImageStorage(ABC):
         """Upload an image and return the URL and metadata."""
         pass
     
+    @abstractmethod
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        folder: str = "",
+        max_bytes: Optional[int] = None
+    ) -> dict:
+        """Upload an image from an async iterator of byte chunks."""
+        pass
+    
     @abstractmethod
     async def delete(self, public_id: str) -> bool:
         """Delete an image by its public ID."""
@@ -74,6 +223,34 @@ class CloudinaryStorage(BaseImageStorage):
         Returns:
             dict with keys: url, public_id, secure_url, format, width, height
         """
+        return await self._upload(file_data, filename, folder)
+    
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        folder: str = "products",
+        max_bytes: Optional[int] = None
+    ) -> dict:
+        """
+        Upload a chunked stream to Cloudinary.
+        
+        The stream is spooled to a temporary file first and the SDK uploads from
+        that path, so the image is never held in memory as a whole.
+        """
+        if not self.configured:
+            raise RuntimeError("Cloudinary is not configured. Please set environment variables.")
+        
+        temp_path, checksum, size = await spool_chunks(chunks, max_bytes=max_bytes)
+        try:
+            result = await self._upload(temp_path, filename, folder)
+        finally:
+            await run_blocking(_remove_quietly, temp_path)
+        result.update({"sha256": checksum, "bytes": size})
+        return result
+    
+    async def _upload(self, source, filename: str, folder: str) -> dict:
+        """Upload raw bytes or a local file path."""
         if not self.configured:
             raise RuntimeError("Cloudinary is not configured. Please set environment variables.")
         
@@ -82,19 +259,23 @@ class CloudinaryStorage(BaseImageStorage):
         # Generate a unique public_id from filename
         base_name = os.path.splitext(filename)[0]
         
-        result = cloudinary.uploader.upload(
-            file_data,
-            folder=f"arar-perfume/{folder}",
-            public_id=base_name,
-            overwrite=True,
-            resource_type="image",
-            transformation=[
-                {"quality": "auto:best"},
-                {"fetch_format": "auto"}
-            ]
-        )
+        with span("cloudinary.uploader.upload", "cloudinary"):
+            result = await run_blocking(
+                cloudinary.uploader.upload,
+                source,
+                folder=f"arar-perfume/{folder}",
+                public_id=base_name,
+                overwrite=True,
+                resource_type="image",
+                transformation=[
+                    {"quality": "auto:best"},
+                    {"fetch_format": "auto"}
+                ],
+                # HTTP timeout, so a stalled upload also frees its pool thread
+                timeout=UPLOAD_TIMEOUT_S
+            )
         
-        logger.info(f"Image uploaded to Cloudinary: {result['public_id']}")
+        logger.info("Image uploaded to Cloudinary: %s", result['public_id'])
         
         return {
             "url": result['url'],
@@ -112,13 +293,14 @@ class CloudinaryStorage(BaseImageStorage):
         
         import cloudinary.uploader
         
-        result = cloudinary.uploader.destroy(public_id)
+        with span("cloudinary.uploader.destroy", "cloudinary"):
+            result = await run_blocking(cloudinary.uploader.destroy, public_id, timeout=UPLOAD_TIMEOUT_S)
         success = result.get('result') == 'ok'
         
         if success:
-            logger.info(f"Image deleted from Cloudinary: {public_id}")
+            logger.info("Image deleted from Cloudinary: %s", public_id)
         else:
-            logger.warning(f"Failed to delete image: {public_id}")
+            logger.warning("Failed to delete image: %s", public_id)
         
         return success
     
@@ -147,44 +329,73 @@ class LocalStorage(BaseImageStorage):
     Note: Not recommended for production. Use Cloudinary or S3.
     """
     
-    def __init__(self, base_path: str = "/app/uploads"):
+    def __init__(self, base_path: str = LOCAL_UPLOADS_DIR):
         self.base_path = base_path
         os.makedirs(base_path, exist_ok=True)
     
     async def upload(self, file_data: bytes, filename: str, folder: str = "products") -> dict:
         """Save file locally and return path."""
-        folder_path = os.path.join(self.base_path, folder)
-        os.makedirs(folder_path, exist_ok=True)
+        return await self.upload_stream(_single_chunk(file_data), filename, folder)
+    
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        folder: str = "products",
+        max_bytes: Optional[int] = None
+    ) -> dict:
+        """
+        Stream chunks to disk and return path.
         
+        Chunks go to a temp file in the target folder, which is then renamed over
+        the final path, so readers never observe a partially written image.
+        """
+        folder_path = os.path.join(self.base_path, folder)
         file_path = os.path.join(folder_path, filename)
         
-        with open(file_path, 'wb') as f:
-            f.write(file_data)
+        temp_path, checksum, size = await spool_chunks(chunks, directory=folder_path, max_bytes=max_bytes)
+        try:
+            # Header-only read; Pillow does not decode pixel data here
+            dimensions = await run_blocking(probe_file_dimensions, temp_path) or (0, 0)
+            # mkstemp creates 0600 files; uploads are meant to be served
+            await run_blocking(os.chmod, temp_path, 0o644)
+            await run_blocking(os.replace, temp_path, file_path)
+        except BaseException:
+            await run_blocking(_remove_quietly, temp_path)
+            raise
         
-        logger.info(f"Image saved locally: {file_path}")
+        logger.info("Image saved locally: %s", file_path)
         
         return {
             "url": f"/uploads/{folder}/{filename}",
             "secure_url": f"/uploads/{folder}/{filename}",
             "public_id": f"{folder}/{filename}",
             "format": filename.split('.')[-1],
-            "width": 0,
-            "height": 0
+            "width": dimensions[0],
+            "height": dimensions[1],
+            "sha256": checksum,
+            "bytes": size
         }
     
     async def delete(self, public_id: str) -> bool:
         """Delete local file."""
         file_path = os.path.join(self.base_path, public_id)
         try:
-            os.remove(file_path)
-            logger.info(f"Local file deleted: {file_path}")
+            await run_blocking(os.remove, file_path)
+            logger.info("Local file deleted: %s", file_path)
             return True
         except FileNotFoundError:
             return False
     
     def get_optimized_url(self, public_id: str, width: int = 800, quality: str = "auto") -> str:
-        """Local storage doesn't support optimization."""
-        return f"/uploads/{public_id}"
+        """
+        Get a resized/recompressed variant URL.
+        
+        Variants are rendered on first request and cached on disk
+        (see services/image_derivatives.py); the width snaps to a standard size.
+        """
+        from services.image_derivatives import snap_width, parse_quality
+        return f"/api/media/derived/{public_id}?w={snap_width(width)}&q={parse_quality(quality)}"
 
 
 class ImageStorageService:
@@ -201,14 +412,24 @@ class ImageStorageService:
         print(result['secure_url'])  # CDN URL
     """
     
-    def __init__(self, provider: Optional[str] = None):
+    def __init__(
+        self,
+        provider: Optional[str] = None,
+        storage: Optional[BaseImageStorage] = None,
+        assets_collection=None
+    ):
         """
         Initialize the storage service.
         
         Args:
             provider: Force a specific provider ('cloudinary' or 'local')
+            storage: Use this provider instance instead (takes precedence over `provider`)
+            assets_collection: Collection tracking stored hashes (default: image_assets)
         """
-        if provider == 'cloudinary':
+        self._assets = assets_collection
+        if storage is not None:
+            self._storage = storage
+        elif provider == 'cloudinary':
             self._storage = CloudinaryStorage()
         elif provider == 'local':
             self._storage = LocalStorage()
@@ -222,18 +443,162 @@ class ImageStorageService:
                 self._storage = LocalStorage()
                 logger.info("Using local storage for images (Cloudinary not configured)")
     
+    @property
+    def assets(self):
+        if self._assets is None:
+            from config.database import image_assets_collection
+            self._assets = image_assets_collection
+        return self._assets
+    
     @property
     def provider_name(self) -> str:
         """Get the name of the current storage provider."""
         return self._storage.__class__.__name__
     
     async def upload(self, file_data: bytes, filename: str, folder: str = "products") -> dict:
-        """Upload an image using the configured provider."""
-        return await self._storage.upload(file_data, filename, folder)
+        """
+        Upload an image using the configured provider.
+        
+        Identical bytes are stored once: if the content is already known, the
+        existing asset is returned (with "deduplicated": True) and no upload happens.
+        """
+        digest = await run_blocking(_hash_bytes, file_data)
+        
+        async def store(name: str) -> dict:
+            return await self._storage.upload(file_data, name, folder)
+        
+        return await self._store_deduplicated(digest, filename, folder, store)
+    
+    async def upload_stream(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str,
+        folder: str = "products",
+        max_bytes: Optional[int] = None
+    ) -> dict:
+        """
+        Upload an image from an async iterator of chunks using the configured provider.
+        
+        The stream is spooled to a temp file to learn its hash before anything is
+        stored; new content is then streamed from that file to the provider.
+        """
+        temp_path, digest, _size = await spool_chunks(chunks, max_bytes=max_bytes)
+        
+        async def store(name: str) -> dict:
+            return await self._storage.upload_stream(_iter_file(temp_path), name, folder)
+        
+        try:
+            return await self._store_deduplicated(digest, filename, folder, store)
+        finally:
+            await run_blocking(_remove_quietly, temp_path)
+    
+    async def _store_deduplicated(self, digest: str, filename: str, folder: str, store) -> dict:
+        for attempt in range(DEDUP_MAX_ATTEMPTS):
+            # Known content: take a reference to the existing asset
+            asset = await self.assets.find_one_and_update(
+                {"sha256": digest, "deleting": {"$ne": True}},
+                {
+                    "$inc": {"ref_count": 1},
+                    "$set": {"last_referenced_at": datetime.now(timezone.utc).isoformat()}
+                },
+                projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+            if asset:
+                logger.info("Deduplicated upload %s -> %s (refs: %d)", filename, asset["public_id"], asset["ref_count"])
+                return dict(asset["result"], deduplicated=True)
+            
+            # New content. The name derives from the hash, so a concurrent upload of
+            # the same bytes writes the same object and the unique index picks one record.
+            result = await store(content_addressed_name(digest, filename))
+            result["sha256"] = digest
+            try:
+                await self.assets.insert_one({
+                    "sha256": digest,
+                    "public_id": result["public_id"],
+                    "provider": self.provider_name,
+                    "original_filename": filename,
+                    "folder": folder,
+                    "ref_count": 1,
+                    "result": result,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    "last_referenced_at": datetime.now(timezone.utc).isoformat()
+                })
+                return dict(result, deduplicated=False)
+            except DuplicateKeyError:
+                # Either another upload of the same bytes won (next attempt references it),
+                # or the content is being deleted (wait for that to finish, then store again).
+                await asyncio.sleep(DEDUP_RETRY_DELAY_S * (attempt + 1))
+        
+        raise RuntimeError(f"Could not store {filename}: content {digest[:12]} is busy, try again")
+    
+    async def upload_many(
+        self,
+        files: List[Tuple[bytes, str]],
+        folder: str = "products",
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> List[dict]:
+        """
+        Upload several images concurrently (e.g. a product gallery).
+        
+        Args:
+            files: (file_data, filename) pairs
+            concurrency: Max uploads in flight (default IMAGE_UPLOAD_CONCURRENCY)
+            timeout: Per-file timeout in seconds (default IMAGE_UPLOAD_TIMEOUT_S)
+        
+        Returns:
+            One entry per input file, in input order: the upload result dict, or
+            {"filename": ..., "error": ...} if that file failed or timed out.
+        """
+        semaphore = asyncio.Semaphore(concurrency or UPLOAD_CONCURRENCY)
+        timeout = timeout or UPLOAD_TIMEOUT_S
+        
+        async def upload_one(file_data: bytes, filename: str) -> dict:
+            async with semaphore:
+                try:
+                    return await asyncio.wait_for(self.upload(file_data, filename, folder), timeout)
+                except asyncio.TimeoutError:
+                    logger.warning("Upload timed out after %ss: %s", timeout, filename)
+                    return {"filename": filename, "error": f"Upload timed out after {timeout}s"}
+                except Exception as e:
+                    logger.warning("Upload failed for %s: %s", filename, e)
+                    return {"filename": filename, "error": str(e)}
+        
+        return await asyncio.gather(*(upload_one(data, name) for data, name in files))
     
     async def delete(self, public_id: str) -> bool:
-        """Delete an image using the configured provider."""
-        return await self._storage.delete(public_id)
+        """
+        Release a reference to an image.
+        
+        The stored file is only deleted from the provider when no references remain.
+        Images not tracked in image_assets are deleted directly.
+        """
+        asset = await self.assets.find_one_and_update(
+            {"public_id": public_id, "ref_count": {"$gt": 0}, "deleting": {"$ne": True}},
+            {"$inc": {"ref_count": -1}},
+            projection={"_id": 0, "ref_count": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if asset is None:
+            return await self._storage.delete(public_id)
+        if asset["ref_count"] > 0:
+            return True
+        
+        # Last reference: tombstone the record so concurrent uploads of the same
+        # bytes wait instead of referencing a file that is about to disappear
+        claimed = await self.assets.find_one_and_update(
+            {"public_id": public_id, "ref_count": 0, "deleting": {"$ne": True}},
+            {"$set": {"deleting": True}},
+            projection={"_id": 1}
+        )
+        if claimed is None:
+            # A new reference arrived in between; keep the file
+            return True
+        try:
+            return await self._storage.delete(public_id)
+        finally:
+            await self.assets.delete_one({"_id": claimed["_id"]})
     
     def get_optimized_url(self, public_id: str, width: int = 800, quality: str = "auto") -> str:
         """Get an optimized URL for the image."""
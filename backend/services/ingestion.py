@@ -0,0 +1,190 @@
+"""
+Write-behind ingestion for high-volume public submissions.
+
+A `BatchWriter` accepts documents into a bounded in-process queue and a
+background task writes them with `insert_many(ordered=False)` whenever
+`batch_size` documents are waiting or `flush_interval` seconds have passed,
+whichever comes first. Duplicate-key errors are expected (unique indexes
+resolve repeated submissions) and are counted rather than raised.
+
+When the queue is full `submit` raises `QueueFull`, which routes turn into a
+503 with Retry-After, so a burst degrades into client retries instead of
+unbounded memory growth.
+
+Writers register themselves on creation; the app lifespan calls
+`stop_batch_writers()` on shutdown to drain whatever is still queued. The flush
+task starts on first submit.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Hashable, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from services.metrics import CounterFamily
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+# Pause before retrying a batch after a transient database error
+RETRY_DELAY_S = 1.0
+
+INGESTION_DOCUMENTS = CounterFamily(
+    "ingestion_documents_total",
+    "Documents handled by write-behind writers, by outcome",
+    ("writer", "outcome"),
+)
+
+_writers: List["BatchWriter"] = []
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("Ingestion queue is full")
+        self.retry_after = retry_after
+
+
+class RecentKeys:
+    """
+    Bounded LRU of recently seen keys with a time window.
+
+    `check_and_add(key, value)` returns the value stored for `key` if it was seen
+    within `window` seconds, and otherwise records `value` and returns None.
+    """
+
+    def __init__(self, max_size: int, window: float):
+        self.max_size = max_size
+        self.window = window
+        self._seen: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def check_and_add(self, key: Hashable, value: Any = True) -> Any:
+        now = time.monotonic()
+        entry = self._seen.get(key)
+        if entry is not None and now - entry[0] < self.window:
+            return entry[1]
+        self._seen[key] = (now, value)
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+        return None
+
+    def discard(self, key: Hashable):
+        self._seen.pop(key, None)
+
+    def __len__(self):
+        return len(self._seen)
+
+
+class BatchWriter:
+    def __init__(
+        self,
+        name: str,
+        collection,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+    ):
+        self.name = name
+        self.collection = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: deque = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        _writers.append(self)
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def submit(self, document: dict):
+        """Queue a document for writing. Raises QueueFull when at capacity."""
+        if len(self._queue) >= self.max_queue:
+            INGESTION_DOCUMENTS.inc(self.name, "rejected")
+            # One flush interval is roughly how long it takes to make room
+            raise QueueFull(retry_after=max(1, round(self.flush_interval)))
+        self._ensure_started()
+        self._queue.append(document)
+        INGESTION_DOCUMENTS.inc(self.name, "queued")
+        if len(self._queue) >= self.batch_size:
+            self._ready.set()
+
+    def _task_is_current(self) -> bool:
+        # A task left over from an event loop that has since closed (tests) is dead
+        return (
+            self._task is not None and not self._task.done()
+            and self._task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def _ensure_started(self):
+        if not self._task_is_current():
+            self._stopping = False
+            self._ready = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"batch-writer-{self.name}")
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._ready.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything queued so far, in batches of `batch_size`."""
+        while self._queue:
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            if not await self._write(batch):
+                # Transient failure: put the batch back in front and retry later
+                self._queue.extendleft(reversed(batch))
+                await asyncio.sleep(RETRY_DELAY_S)
+                if self._stopping:
+                    return
+
+    async def _write(self, batch: List[dict]) -> bool:
+        try:
+            result = await self.collection.insert_many(batch, ordered=False)
+            INGESTION_DOCUMENTS.inc(self.name, "written", amount=len(result.inserted_ids))
+            return True
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY_ERROR)
+            INGESTION_DOCUMENTS.inc(self.name, "written", amount=e.details.get("nInserted", 0))
+            INGESTION_DOCUMENTS.inc(self.name, "duplicate", amount=duplicates)
+            if len(errors) > duplicates:
+                INGESTION_DOCUMENTS.inc(self.name, "failed", amount=len(errors) - duplicates)
+                logger.error("%s: %d documents rejected by the database", self.name, len(errors) - duplicates)
+            return True
+        except PyMongoError as e:
+            logger.warning("%s: batch of %d not written, will retry: %s", self.name, len(batch), e)
+            return False
+        except Exception:
+            INGESTION_DOCUMENTS.inc(self.name, "failed", amount=len(batch))
+            logger.exception("%s: dropping batch of %d", self.name, len(batch))
+            return True
+
+    async def stop(self):
+        """Stop the flush task and write whatever is still queued."""
+        if not self._task_is_current():
+            self._task = None
+            return
+        self._stopping = True
+        self._ready.set()
+        await self._task
+        self._task = None
+        if self._queue:
+            await self.flush()
+            if self._queue:
+                INGESTION_DOCUMENTS.inc(self.name, "failed", amount=len(self._queue))
+                logger.error("%s: dropped %d queued documents on shutdown", self.name, len(self._queue))
+                self._queue.clear()
+
+
+async def stop_batch_writers():
+    await asyncio.gather(*(writer.stop() for writer in _writers))
@@ -0,0 +1,64 @@
+"""
+Event-loop lag sampling.
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up. The delay is time the loop spent running other callbacks, i.e. how long a
+ready request would have waited before its handler got to run.
+
+Configuration:
+    LOOP_LAG_INTERVAL_S   Sampling interval in seconds (default 0.5)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from services.metrics import GaugeFamily, HistogramFamily
+
+logger = logging.getLogger(__name__)
+
+LAG_INTERVAL_S = float(os.environ.get("LOOP_LAG_INTERVAL_S", "0.5"))
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG = HistogramFamily(
+    "event_loop_lag_seconds",
+    "Delay between when a timer was due and when the event loop ran it",
+    buckets=LAG_BUCKETS,
+)
+LOOP_LAG_LAST = GaugeFamily(
+    "event_loop_lag_last_seconds",
+    "Most recent event loop lag sample",
+)
+
+
+class LoopLagSampler:
+    def __init__(self, interval: float = LAG_INTERVAL_S):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - expected)
+            LOOP_LAG.observe(lag)
+            LOOP_LAG_LAST.set(lag)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="loop-lag-sampler")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_sampler = LoopLagSampler()
@@ -0,0 +1,213 @@
+"""
+In-process metrics primitives.
+
+Small, dependency-free counters, gauges and histograms grouped into labelled
+families. Families register themselves in `REGISTRY` so every metric the process
+records can be exported from one place; `render_prometheus` produces the
+Prometheus text exposition format.
+
+Updates are cheap (a dict lookup plus a bisect) and guarded by a per-family lock,
+so they are safe to record from pymongo's monitoring threads as well as from the
+event loop.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+# Seconds; the usual Prometheus latency ladder trimmed to what a web API cares about
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Counts (documents, items)
+DEFAULT_COUNT_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class Histogram:
+    """Fixed-bucket histogram. Not locked on its own; use through a HistogramFamily."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """[(upper_bound, cumulative_count), ...] ending with (inf, count)."""
+        result = []
+        running = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            running += count
+            result.append((bound, running))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile: the upper bound of the bucket holding the q-th observation."""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        for bound, cumulative in self.cumulative():
+            if cumulative >= rank:
+                return bound if bound != float("inf") else self.buckets[-1]
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class _Family:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        self._children: Dict[tuple, object] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels: Sequence[str]) -> tuple:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {labels}")
+        return tuple(str(v) for v in labels)
+
+    def items(self) -> list:
+        """Snapshot of (label_values, child) pairs."""
+        with self._lock:
+            return list(self._children.items())
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+
+class CounterFamily(_Family):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._children.get(self._key(labels), 0)
+
+
+class GaugeFamily(_Family):
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        key = self._key(labels)
+        with self._lock:
+            self._children[key] = self._children.get(key, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._children.get(self._key(labels), 0)
+
+
+class HistogramFamily(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS, registry=None):
+        super().__init__(name, documentation, label_names, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str):
+        key = self._key(labels)
+        with self._lock:
+            histogram = self._children.get(key)
+            if histogram is None:
+                histogram = self._children[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def snapshot(self) -> dict:
+        """{(label1, label2, ...): {count, sum, p50, p95, p99}, ...}"""
+        with self._lock:
+            return {key: child.snapshot() for key, child in self._children.items()}
+
+    def cumulative_items(self) -> list:
+        """(label_values, (cumulative buckets, sum, count)) pairs, copied under the lock."""
+        with self._lock:
+            return [
+                (key, (child.cumulative(), child.sum, child.count))
+                for key, child in self._children.items()
+            ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._families: Dict[str, _Family] = {}
+        self._lock = threading.Lock()
+
+    def register(self, family: _Family):
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"Metric '{family.name}' is already registered")
+            self._families[family.name] = family
+
+    def families(self) -> List[_Family]:
+        with self._lock:
+            return list(self._families.values())
+
+
+REGISTRY = MetricsRegistry()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render_prometheus(registry: MetricsRegistry = REGISTRY) -> str:
+    """Text exposition format (version 0.0.4) of every family in `registry`."""
+    lines = []
+    for family in registry.families():
+        lines.append(f"# HELP {family.name} {family.documentation}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        if isinstance(family, HistogramFamily):
+            for labels, (buckets, total, count) in family.cumulative_items():
+                for bound, cumulative in buckets:
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{family.name}_bucket{_format_labels(family.label_names, labels, le)} {cumulative}")
+                label_text = _format_labels(family.label_names, labels)
+                lines.append(f"{family.name}_sum{label_text} {_format_value(total)}")
+                lines.append(f"{family.name}_count{label_text} {count}")
+        else:
+            for labels, value in family.items():
+                lines.append(f"{family.name}{_format_labels(family.label_names, labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,254 @@
+"""
+Token-bucket rate limiting.
+
+Each key (typically a client IP and route) gets a bucket holding up to `burst`
+tokens that refills at `rate` tokens per second; a request spends one token.
+Buckets live in bounded LRUs, so a flood of distinct keys cannot grow memory
+without limit (an evicted key simply starts again with a full bucket).
+`ShardedTokenBucketLimiter` spreads keys over several independently locked
+LRUs so concurrent requests for different clients rarely contend.
+
+`RouteRateLimits` maps "METHOD /path" to a (rate, burst) limit and is what
+middleware/rate_limit.py enforces before a request reaches routing. In shared
+mode each worker additionally counts requests in fixed windows in MongoDB
+(`rate_limits` collection, one document per key and window, expired by the
+TTL index in config/indexes.py), so the limit holds across workers; the local
+buckets still turn away the bulk of an abusive client's requests without a
+database round trip.
+
+Configuration:
+    TRUST_PROXY_HEADERS   Use the first X-Forwarded-For address as the client IP (default off)
+    RATE_LIMIT_ENABLED    Enforce the per-route limits (default 1)
+    RATE_LIMITS           Overrides, e.g. "POST /api/contact=5/5;POST /api/admin/login=10/5"
+                          (requests per minute / burst)
+    RATE_LIMIT_SHARED     Also count requests in MongoDB across workers (default 0)
+    RATE_LIMIT_SHARDS     Lock shards of the in-process limiter (default 16)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, Optional, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from services.metrics import CounterFamily
+
+logger = logging.getLogger(__name__)
+
+TRUST_PROXY_HEADERS = os.environ.get("TRUST_PROXY_HEADERS", "").lower() in ("1", "true", "yes")
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1").lower() in ("1", "true", "yes")
+RATE_LIMIT_SHARED = os.environ.get("RATE_LIMIT_SHARED", "").lower() in ("1", "true", "yes")
+RATE_LIMIT_SHARDS = int(os.environ.get("RATE_LIMIT_SHARDS", "16"))
+COLLECTION_NAME = "rate_limits"
+
+RATE_LIMITED = CounterFamily(
+    "rate_limited_requests_total",
+    "Requests rejected with 429 by the per-route rate limits",
+    ("route",),
+)
+
+# Requests per minute and burst for the endpoints that are expensive to abuse:
+# login runs bcrypt, checkout calls Stripe, the forms write to MongoDB
+DEFAULT_LIMITS = {
+    "POST /api/admin/login": (10, 5),
+    "POST /api/create-checkout-session": (20, 10),
+    "POST /api/newsletter": (10, 5),
+    "POST /api/contact": (
+        float(os.environ.get("CONTACT_RATE_PER_MINUTE", "5")),
+        int(os.environ.get("CONTACT_BURST", "5")),
+    ),
+}
+
+
+def scope_client_ip(scope: dict) -> str:
+    """Address to throttle on; only trusts X-Forwarded-For behind a known proxy."""
+    if TRUST_PROXY_HEADERS:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").split(",", 1)[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        # key -> [tokens, last_refill]
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, rate: Optional[float] = None, burst: Optional[int] = None) -> float:
+        """
+        Spend a token for `key`. Returns 0 when allowed, otherwise the number of
+        seconds until a token becomes available. `rate` and `burst` override the
+        limiter's defaults for this key.
+        """
+        rate = self.rate if rate is None else rate
+        burst = self.burst if burst is None else burst
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(burst), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                return 0.0
+            return (1 - bucket[0]) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ShardedTokenBucketLimiter:
+    """Token buckets split over `shards` LRUs, each with its own lock."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100000, shards: int = RATE_LIMIT_SHARDS):
+        shards = max(1, shards)
+        self._shards = [
+            TokenBucketLimiter(rate, burst, max_keys=max(1, max_keys // shards)) for _ in range(shards)
+        ]
+
+    def acquire(self, key: Hashable, rate: Optional[float] = None, burst: Optional[int] = None) -> float:
+        return self._shards[hash(key) % len(self._shards)].acquire(key, rate, burst)
+
+    def clear(self):
+        for shard in self._shards:
+            shard.clear()
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
+
+
+class MongoWindowLimiter:
+    """
+    Fixed-window counters shared by every worker: a key may make `burst`
+    requests per window of `burst / rate` seconds, which matches the bucket's
+    long-run rate. One upsert per request that passed the local bucket.
+    """
+
+    def __init__(self, database=None):
+        self._database = database
+        self._collection = None
+
+    @property
+    def database(self):
+        if self._database is None:
+            from config.database import db
+            self._database = db
+        return self._database
+
+    @property
+    def collection(self):
+        # The expires_at TTL index is declared in config/indexes.py
+        if self._collection is None:
+            self._collection = self.database[COLLECTION_NAME]
+        return self._collection
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        window = burst / rate
+        now = time.time()
+        window_start = int(now // window * window)
+        window_end = window_start + window
+        try:
+            doc = await self.collection.find_one_and_update(
+                {"_id": f"{key}|{window_start}"},
+                {
+                    "$inc": {"count": 1},
+                    "$setOnInsert": {
+                        "expires_at": datetime.fromtimestamp(window_end, timezone.utc) + timedelta(seconds=60)
+                    },
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except PyMongoError as e:
+            # Fall back to the per-worker limit rather than failing the request
+            logger.warning("Shared rate limit unavailable for %s: %s", key, e)
+            return 0.0
+        if doc["count"] <= burst:
+            return 0.0
+        return window_end - now
+
+
+class RouteRateLimits:
+    """Per-route limits keyed by "METHOD /path", enforced per client IP."""
+
+    def __init__(
+        self,
+        limits: Dict[str, Tuple[float, int]],
+        shared: bool = False,
+        database=None,
+        max_keys: int = 100000,
+    ):
+        # route -> (tokens per second, burst)
+        self.limits = {route: (per_minute / 60, int(burst)) for route, (per_minute, burst) in limits.items()}
+        self.local = ShardedTokenBucketLimiter(rate=1, burst=1, max_keys=max_keys)
+        self.shared = MongoWindowLimiter(database) if shared else None
+        self._cross_worker: Optional[bool] = None
+
+    @property
+    def cross_worker(self) -> bool:
+        """Whether the shared limiter adds anything: not on the single-process memory backend."""
+        if self._cross_worker is None:
+            from config.database import shared_across_workers
+            self._cross_worker = self.shared is not None and shared_across_workers
+        return self._cross_worker
+
+    async def acquire(self, route: str, ip: str) -> float:
+        """Seconds the client must wait before retrying `route`, or 0 when allowed."""
+        limit = self.limits.get(route)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        retry_after = self.local.acquire((route, ip), rate, burst)
+        if retry_after or not self.cross_worker:
+            # Without other workers the local buckets are exact
+            return retry_after
+        return await self.shared.acquire(f"{route}|{ip}", rate, burst)
+
+    def clear(self):
+        self.local.clear()
+
+
+def parse_limits(spec: str) -> Dict[str, Tuple[float, int]]:
+    """Parse "METHOD /path=PER_MINUTE[/BURST];..." (burst defaults to the per-minute rate)."""
+    limits = {}
+    for item in spec.split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        route, _, value = item.rpartition("=")
+        method, _, path = route.strip().partition(" ")
+        per_minute, _, burst = value.partition("/")
+        if not method or not path.strip():
+            raise ValueError(f"Invalid rate limit {item!r}: expected 'METHOD /path=PER_MINUTE[/BURST]'")
+        per_minute = float(per_minute)
+        limits[f"{method.upper()} {path.strip()}"] = (per_minute, int(burst) if burst else max(1, int(per_minute)))
+    return limits
+
+
+route_rate_limits = RouteRateLimits(
+    {**DEFAULT_LIMITS, **parse_limits(os.environ.get("RATE_LIMITS", ""))},
+    shared=RATE_LIMIT_SHARED,
+)
@@ -0,0 +1,245 @@
+"""
+Declarative in-process response cache.
+
+Routes opt in with a decorator placed under the router decorator:
+
+    @router.get("/{order_id}")
+    @cached_response(ttl=300, key=("path", "principal"), tags=("orders", "order:{order_id}"),
+                     cache_if=is_terminal_order)
+    async def get_order(order_id: str, current_admin: dict = Depends(get_current_admin)):
+        ...
+
+Dependencies (including authentication) still run on every request; only the
+endpoint body and JSON rendering are skipped on a hit. Entries are stored as
+rendered JSON bytes and keyed by the chosen parts:
+    path        the request path
+    query       the sorted query string
+    principal   the authenticated admin (`current_admin["email"]`)
+
+After `ttl` seconds an entry goes stale; for another `stale_ttl` seconds it is
+still served while a single background task refreshes it, so an expiry never
+sends a burst of identical queries to Mongo. Concurrent misses for the same key
+share one call of the endpoint. Tags are format strings over the endpoint's
+arguments; `invalidate_tags("orders")` drops every entry carrying the tag.
+
+Responses carry `X-Cache: HIT | STALE | MISS`.
+
+Configuration:
+    RESPONSE_CACHE_ENABLED       Serve from the cache (default 1)
+    RESPONSE_CACHE_MAX_ENTRIES   Entries kept across all routes (default 10000)
+"""
+
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Sequence, Set
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from services.metrics import CounterFamily
+from services.tracing import span
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+
+KEY_PARTS = ("path", "query", "principal")
+
+CACHE_REQUESTS = CounterFamily(
+    "response_cache_requests_total",
+    "Cached route lookups by outcome",
+    ("endpoint", "outcome"),
+)
+
+
+class _Entry:
+    __slots__ = ("body", "tags", "fresh_until", "stale_until")
+
+    def __init__(self, body: bytes, tags: Set[str], ttl: float, stale_ttl: float):
+        now = time.monotonic()
+        self.body = body
+        self.tags = tags
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale_ttl
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, _Entry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[tuple]] = {}
+        self._inflight: Dict[tuple, asyncio.Future] = {}
+        self._refreshing: Set[tuple] = set()
+        # Bumped on every invalidation; results computed across one are discarded
+        self.generation = 0
+
+    def get(self, key: tuple) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry.stale_until:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, entry: _Entry, generation: int):
+        if generation != self.generation:
+            return
+        self._remove(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying any of `tags`. Returns the number removed."""
+        self.generation += 1
+        removed = 0
+        for tag in tags:
+            for key in list(self._by_tag.get(tag, ())):
+                self._remove(key)
+                removed += 1
+        return removed
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._by_tag.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+response_cache = ResponseCache()
+
+
+def invalidate_tags(*tags: str) -> int:
+    return response_cache.invalidate_tags(tags)
+
+
+def _render(result) -> bytes:
+    with span("json.render", "serialize"):
+        return JSONResponse(jsonable_encoder(result)).body
+
+
+def _json_response(body: bytes, outcome: str) -> Response:
+    return Response(content=body, media_type="application/json", headers={"x-cache": outcome})
+
+
+def cached_response(
+    ttl: float,
+    key: Sequence[str] = ("path", "query"),
+    tags: Sequence[str] = (),
+    stale_ttl: Optional[float] = None,
+    cache_if: Optional[Callable[[object], bool]] = None,
+    cache: ResponseCache = response_cache,
+):
+    """
+    Cache a JSON GET endpoint. See the module docstring for the key parts and tags.
+
+    `stale_ttl` defaults to `ttl`. `cache_if(result)` can veto caching a result
+    (it is still returned).
+    """
+    unknown = set(key) - set(KEY_PARTS)
+    if unknown:
+        raise ValueError(f"Unknown cache key parts: {sorted(unknown)}")
+    stale_ttl = ttl if stale_ttl is None else stale_ttl
+
+    def decorator(endpoint):
+        name = endpoint.__qualname__
+        signature = inspect.signature(endpoint)
+        wants_request = any(p.annotation is Request for p in signature.parameters.values())
+        request_param = next(
+            (p.name for p in signature.parameters.values() if p.annotation is Request), "_cache_request"
+        )
+
+        def build_key(request: Request, kwargs: dict) -> tuple:
+            parts = [name]
+            if "path" in key:
+                parts.append(request.url.path)
+            if "query" in key:
+                parts.append(tuple(sorted(request.query_params.multi_items())))
+            if "principal" in key:
+                admin = kwargs.get("current_admin") or {}
+                parts.append(admin.get("email"))
+            return tuple(parts)
+
+        async def compute(cache_key: tuple, kwargs: dict, generation: int) -> bytes:
+            result = await endpoint(**kwargs)
+            if isinstance(result, Response):
+                raise TypeError(f"{name}: cached endpoints must return JSON-serializable data")
+            body = _render(result)
+            if cache_if is None or cache_if(result):
+                entry_tags = {tag.format(**kwargs) for tag in tags}
+                cache.put(cache_key, _Entry(body, entry_tags, ttl, stale_ttl), generation)
+            return body
+
+        async def refresh(cache_key: tuple, kwargs: dict):
+            try:
+                await compute(cache_key, kwargs, cache.generation)
+            except HTTPException:
+                # e.g. the resource is gone; stop serving the stale copy
+                cache._remove(cache_key)
+            except Exception:
+                logger.exception("Background refresh of %s failed", name)
+            finally:
+                cache._refreshing.discard(cache_key)
+
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            request = kwargs[request_param] if wants_request else kwargs.pop(request_param)
+            if not CACHE_ENABLED:
+                return await endpoint(**kwargs)
+
+            cache_key = build_key(request, kwargs)
+            entry = cache.get(cache_key)
+            if entry is not None:
+                if time.monotonic() < entry.fresh_until:
+                    CACHE_REQUESTS.inc(name, "hit")
+                    return _json_response(entry.body, "HIT")
+                if cache_key not in cache._refreshing:
+                    cache._refreshing.add(cache_key)
+                    asyncio.get_running_loop().create_task(refresh(cache_key, kwargs))
+                CACHE_REQUESTS.inc(name, "stale")
+                return _json_response(entry.body, "STALE")
+
+            CACHE_REQUESTS.inc(name, "miss")
+            # Single-flight: concurrent misses share one call of the endpoint
+            pending = cache._inflight.get(cache_key)
+            if pending is None:
+                pending = asyncio.ensure_future(compute(cache_key, kwargs, cache.generation))
+                cache._inflight[cache_key] = pending
+                pending.add_done_callback(lambda _: cache._inflight.pop(cache_key, None))
+            body = await asyncio.shield(pending)
+            return _json_response(body, "MISS")
+
+        if not wants_request:
+            # FastAPI injects the Request for the cache key without the endpoint seeing it
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(request_param, inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+        return wrapper
+
+    return decorator
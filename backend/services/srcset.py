@@ -0,0 +1,83 @@
+"""
+Responsive `srcset` strings for product images.
+
+`build_srcset(url)` turns a stored image URL into a srcset over the configured
+width ladder, using the same transformation URLs as the storage providers:
+Cloudinary delivery URLs get `w_<width>,q_<quality>,f_auto` transformations and
+LocalStorage `/uploads/...` URLs point at `/api/media/derived/...`. URLs that
+cannot be transformed (third-party hosts) have no srcset.
+
+Results are memoized per (public_id, ladder, quality), so catalog responses can
+embed srcsets for every image without rebuilding strings per request.
+
+Configuration:
+    IMAGE_SRCSET_WIDTHS    Comma-separated width ladder (default 320,640,960,1280,1920)
+    IMAGE_SRCSET_QUALITY   Quality used in srcset URLs (default auto)
+"""
+
+import functools
+import os
+import re
+from typing import Iterable, Optional, Tuple
+
+from services.image_derivatives import STANDARD_WIDTHS, parse_quality, snap_width
+
+_CLOUDINARY_UPLOAD = re.compile(
+    r"^https?://res\.cloudinary\.com/(?P<cloud>[^/]+)/image/upload/"
+    # Uploaded URLs carry a version; anything before it is an existing transformation
+    r"(?:(?:[^/]+/)*?v\d+/)?(?P<public_id>[^?#]+)"
+)
+_SRCSET_CACHE_SIZE = 4096
+
+
+def parse_ladder(value: str) -> Tuple[int, ...]:
+    """Parse "320, 640,960" into a sorted, de-duplicated tuple of widths."""
+    widths = {int(part) for part in value.split(",") if part.strip()}
+    if not widths or min(widths) <= 0:
+        raise ValueError(f"Invalid srcset width ladder: {value!r}")
+    return tuple(sorted(widths))
+
+
+SRCSET_WIDTHS = parse_ladder(os.environ.get("IMAGE_SRCSET_WIDTHS", ",".join(map(str, STANDARD_WIDTHS))))
+SRCSET_QUALITY = os.environ.get("IMAGE_SRCSET_QUALITY", "auto")
+
+
+@functools.lru_cache(maxsize=_SRCSET_CACHE_SIZE)
+def _cloudinary_srcset(cloud_name: str, public_id: str, ladder: Tuple[int, ...], quality: str) -> str:
+    return ", ".join(
+        f"https://res.cloudinary.com/{cloud_name}/image/upload/w_{width},q_{quality},f_auto/{public_id} {width}w"
+        for width in ladder
+    )
+
+
+@functools.lru_cache(maxsize=_SRCSET_CACHE_SIZE)
+def _local_srcset(public_id: str, ladder: Tuple[int, ...], quality: str) -> str:
+    # Derivatives only exist at standard widths; snapping first avoids
+    # listing the same file under two descriptors
+    widths = sorted({snap_width(width) for width in ladder})
+    q = parse_quality(quality)
+    return ", ".join(f"/api/media/derived/{public_id}?w={width}&q={q} {width}w" for width in widths)
+
+
+def build_srcset(url: Optional[str], ladder: Optional[Iterable[int]] = None, quality: str = None) -> Optional[str]:
+    """srcset for an image URL, or None if the URL is not served by a known provider."""
+    if not url:
+        return None
+    ladder = SRCSET_WIDTHS if ladder is None else tuple(sorted(set(ladder)))
+    quality = quality or SRCSET_QUALITY
+
+    if url.startswith("/uploads/"):
+        return _local_srcset(url[len("/uploads/"):].split("?", 1)[0], ladder, quality)
+    match = _CLOUDINARY_UPLOAD.match(url)
+    if match:
+        return _cloudinary_srcset(match.group("cloud"), match.group("public_id"), ladder, quality)
+    return None
+
+
+def with_srcsets(product: dict, ladder: Optional[Iterable[int]] = None, quality: str = None) -> dict:
+    """Add `hero_image_srcset` and `gallery_images_srcset` (aligned with `gallery_images`)."""
+    product["hero_image_srcset"] = build_srcset(product.get("hero_image_url"), ladder, quality)
+    product["gallery_images_srcset"] = [
+        build_srcset(url, ladder, quality) for url in product.get("gallery_images") or []
+    ]
+    return product
@@ -0,0 +1,322 @@
+"""
+Static file serving for locally stored uploads.
+
+`serve_static_file` answers GET/HEAD for a file under a root directory with:
+  - conditional requests (ETag / If-None-Match, Last-Modified / If-Modified-Since)
+  - single byte ranges (Range, If-Range) with 206 / 416 responses
+  - long-lived `immutable` caching for content-addressed files (hash-named
+    uploads and rendered derivatives), shorter caching for everything else
+  - an LRU of open file descriptors and stat results, revalidated at most
+    every UPLOADS_STAT_TTL_S seconds, so hot images skip open()/stat() entirely
+
+Bodies are sent with zero-copy `http.response.zerocopysend` when the ASGI server
+offers it. With UPLOADS_ACCEL_REDIRECT_PREFIX set, the response is instead handed
+to nginx via X-Accel-Redirect so nginx can use sendfile(2). Otherwise the file is
+read with pread() on a worker thread in UPLOADS_CHUNK_SIZE chunks.
+
+Configuration:
+    UPLOADS_FD_CACHE_SIZE          Open files kept in the LRU (default 256)
+    UPLOADS_STAT_TTL_S             Seconds a cached stat result is trusted (default 1)
+    UPLOADS_MAX_AGE_S              max-age for non content-addressed files (default 3600)
+    UPLOADS_CHUNK_SIZE             Read size for the pread fallback (default 256 KiB)
+    UPLOADS_ACCEL_REDIRECT_PREFIX  Internal nginx location mapped to the uploads dir (default unset)
+"""
+
+import asyncio
+import os
+import posixpath
+import re
+import stat
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from typing import Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+FD_CACHE_SIZE = int(os.environ.get("UPLOADS_FD_CACHE_SIZE", "256"))
+STAT_TTL_S = float(os.environ.get("UPLOADS_STAT_TTL_S", "1"))
+MAX_AGE_S = int(os.environ.get("UPLOADS_MAX_AGE_S", "3600"))
+CHUNK_SIZE = int(os.environ.get("UPLOADS_CHUNK_SIZE", str(256 * 1024)))
+ACCEL_REDIRECT_PREFIX = os.environ.get("UPLOADS_ACCEL_REDIRECT_PREFIX", "").rstrip("/")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Hash-named uploads (see services.image_storage.content_addressed_name) and derivatives
+_CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{32}(?:[0-9a-f]{32})?(?:_w\d+_q\d+)?\.[a-z0-9]+$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def is_content_addressed(relative_path: str) -> bool:
+    return bool(_CONTENT_ADDRESSED.match(posixpath.basename(relative_path)))
+
+
+class _CachedFile:
+    __slots__ = ("path", "fd", "size", "mtime", "etag", "last_modified", "checked_at", "refs", "evicted")
+
+    def __init__(self, path: str, fd: int, st: os.stat_result):
+        self.path = path
+        self.fd = fd
+        self.size = st.st_size
+        self.mtime = st.st_mtime
+        self.etag = f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+        self.last_modified = formatdate(st.st_mtime, usegmt=True)
+        self.checked_at = time.monotonic()
+        self.refs = 0
+        self.evicted = False
+
+    def matches(self, st: os.stat_result) -> bool:
+        return self.etag == f'"{st.st_ino:x}-{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+
+class FileDescriptorCache:
+    """
+    LRU of open file descriptors plus their stat results.
+
+    Entries are reference counted while a response is streaming from them; an
+    entry evicted (or replaced because the file changed) while in use is closed
+    when its last reader releases it. Reads use pread(), so one descriptor can
+    serve any number of concurrent responses.
+    """
+
+    def __init__(self, max_entries: int = FD_CACHE_SIZE, stat_ttl: float = STAT_TTL_S):
+        self.max_entries = max_entries
+        self.stat_ttl = stat_ttl
+        self._entries: "OrderedDict[str, _CachedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def acquire(self, path: str) -> Optional[_CachedFile]:
+        """Open (or reuse) `path`. Returns None if it is missing or not a regular file."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and time.monotonic() - entry.checked_at < self.stat_ttl:
+                self._entries.move_to_end(path)
+                entry.refs += 1
+                return entry
+
+        # Miss or stale: revalidate off the event loop
+        fresh = await asyncio.to_thread(self._open_or_revalidate, path, entry)
+
+        with self._lock:
+            current = self._entries.get(path)
+            if fresh is None:
+                if current is not None:
+                    self._drop(path, current)
+                return None
+            if current is not fresh:
+                if current is not None:
+                    self._drop(path, current)
+                self._entries[path] = fresh
+            self._entries.move_to_end(path)
+            fresh.refs += 1
+            while len(self._entries) > self.max_entries:
+                old_path, old_entry = next(iter(self._entries.items()))
+                self._drop(old_path, old_entry)
+            return fresh
+
+    def release(self, entry: _CachedFile):
+        with self._lock:
+            entry.refs -= 1
+            if entry.evicted and entry.refs == 0:
+                os.close(entry.fd)
+
+    def _drop(self, path: str, entry: _CachedFile):
+        """Remove an entry (lock held); its fd closes once no response is using it."""
+        if self._entries.get(path) is entry:
+            del self._entries[path]
+        entry.evicted = True
+        if entry.refs == 0:
+            os.close(entry.fd)
+
+    @staticmethod
+    def _open_or_revalidate(path: str, entry: Optional[_CachedFile]) -> Optional[_CachedFile]:
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        if entry is not None and entry.matches(st):
+            entry.checked_at = time.monotonic()
+            return entry
+        fd = os.open(path, os.O_RDONLY)
+        return _CachedFile(path, fd, os.fstat(fd))
+
+    def close(self):
+        with self._lock:
+            for path, entry in list(self._entries.items()):
+                self._drop(path, entry)
+
+
+file_cache = FileDescriptorCache()
+
+
+def resolve_path(root: str, relative_path: str) -> Optional[str]:
+    """Map a URL path onto `root`, refusing anything that escapes it."""
+    if "\x00" in relative_path or "\\" in relative_path:
+        return None
+    normalized = posixpath.normpath("/" + relative_path).lstrip("/")
+    if not normalized or normalized.startswith(".") or "/." in normalized:
+        # No "..", and no dotfiles such as in-progress ".upload-*.part" temp files
+        return None
+    return os.path.join(root, normalized)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range` header into an inclusive (start, end).
+
+    Returns None when the header should be ignored (malformed or multi-range; a
+    full 200 is a valid answer), and raises ValueError when it is unsatisfiable.
+    """
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return False
+
+
+def _if_range_allows(header: Optional[str], entry: _CachedFile) -> bool:
+    if header is None:
+        return True
+    header = header.strip()
+    if header.startswith('"') or header.startswith("W/"):
+        return header == entry.etag
+    return header == entry.last_modified
+
+
+class StaticFileResponse(Response):
+    """Streams [start, end] of a cached file descriptor, then releases it."""
+
+    def __init__(self, entry: _CachedFile, status_code: int, headers: dict, media_type: str,
+                 start: int, end: int, cache: FileDescriptorCache):
+        self.entry = entry
+        self.start = start
+        self.end = end
+        self.cache = cache
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            count = self.end - self.start + 1
+            if scope["method"] == "HEAD" or count <= 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": self.entry.fd,
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+            else:
+                await self._send_chunks(send, count)
+        finally:
+            self.cache.release(self.entry)
+
+    async def _send_chunks(self, send, count: int):
+        offset = self.start
+        remaining = count
+        while remaining > 0:
+            chunk = await asyncio.to_thread(os.pread, self.entry.fd, min(CHUNK_SIZE, remaining), offset)
+            if not chunk:
+                # File shrank underneath us; end the body rather than hang
+                break
+            offset += len(chunk)
+            remaining -= len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def serve_static_file(
+    request: Request,
+    root: str,
+    relative_path: str,
+    cache_control: Optional[str] = None,
+    extra_headers: Optional[dict] = None,
+    cache: FileDescriptorCache = file_cache,
+) -> Response:
+    """Build the response for GET/HEAD of `relative_path` under `root`."""
+    path = resolve_path(root, relative_path)
+    entry = await cache.acquire(path) if path else None
+    if entry is None:
+        return Response(status_code=404, content=b'{"detail":"Not Found"}', media_type="application/json")
+
+    if cache_control is None:
+        cache_control = IMMUTABLE_CACHE_CONTROL if is_content_addressed(relative_path) else f"public, max-age={MAX_AGE_S}"
+    headers = {
+        "etag": entry.etag,
+        "last-modified": entry.last_modified,
+        "cache-control": cache_control,
+        "accept-ranges": "bytes",
+        **(extra_headers or {}),
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (if_none_match is not None and _etag_matches(if_none_match, entry.etag)) or (
+        if_none_match is None and if_modified_since is not None
+        and _not_modified_since(if_modified_since, entry.mtime)
+    ):
+        cache.release(entry)
+        return Response(status_code=304, headers=headers)
+
+    media_type = guess_type(path)[0] or "application/octet-stream"
+    status_code, start, end = 200, 0, entry.size - 1
+    range_header = request.headers.get("range")
+    if range_header and _if_range_allows(request.headers.get("if-range"), entry):
+        try:
+            byte_range = parse_range(range_header, entry.size)
+        except ValueError:
+            cache.release(entry)
+            return Response(status_code=416, headers={**headers, "content-range": f"bytes */{entry.size}"})
+        if byte_range is not None:
+            status_code, (start, end) = 206, byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{entry.size}"
+    headers["content-length"] = str(max(0, end - start + 1))
+
+    if ACCEL_REDIRECT_PREFIX:
+        # nginx re-serves the file itself (sendfile, ranges) from its internal location
+        cache.release(entry)
+        headers.pop("content-length")
+        headers.pop("content-range", None)
+        relative = os.path.relpath(path, root).replace(os.sep, "/")
+        headers["x-accel-redirect"] = f"{ACCEL_REDIRECT_PREFIX}/{relative}"
+        return Response(status_code=200, headers=headers, media_type=media_type)
+
+    return StaticFileResponse(entry, status_code, headers, media_type, start, end, cache)
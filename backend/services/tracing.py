@@ -0,0 +1,207 @@
+"""
+Lightweight per-request tracing.
+
+`TracingMiddleware` opens a `Trace` for every HTTP request and stores it in a
+context variable. Code on the request path records spans into it:
+
+    with span("stripe.checkout.Session.create", "stripe"):
+        ...
+
+MongoDB commands are recorded by the query monitor (Motor runs pymongo's
+monitoring callbacks with a copy of the request's context), JSON rendering by
+`TracedJSONResponse`, and admin authentication by `get_current_admin`.
+
+Every response carries an `X-Trace-Id` header and, unless disabled, a
+`Server-Timing` header with the time spent per span category (db, stripe, auth,
+serialize, ...) plus the total, so a browser's network panel shows where a slow
+request went. The breakdown exposes internal timings (auth included) to any
+client, so it is off by default in production. Full traces (every span with its
+offset) are kept for a sample of requests, and always for slow ones, in an
+in-memory ring buffer served at /api/admin/metrics/traces.
+
+Outside a request `span` is a no-op, so instrumented code can be used anywhere.
+
+Configuration:
+    SERVER_TIMING_ENABLED   Send the Server-Timing header (default 1, 0 in production)
+    TRACE_SAMPLE_RATE       Fraction of requests whose full trace is kept (default 0.01)
+    TRACE_SLOW_MS           Requests at least this slow are always kept (default 1000)
+    TRACE_BUFFER_SIZE       Traces kept in the ring buffer (default 500)
+"""
+
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.responses import JSONResponse
+
+from middleware.request_context import route_label
+
+
+def _server_timing_enabled(environ=os.environ) -> bool:
+    default = "0" if environ.get("ENVIRONMENT", "development").lower() == "production" else "1"
+    return environ.get("SERVER_TIMING_ENABLED", default).lower() in ("1", "true", "yes")
+
+
+SERVER_TIMING_ENABLED = _server_timing_enabled()
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "1000"))
+TRACE_BUFFER_SIZE = int(os.environ.get("TRACE_BUFFER_SIZE", "500"))
+
+
+class Trace:
+    __slots__ = ("id", "method", "path", "route", "status", "started_at", "start", "duration", "spans")
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = None
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = None
+        # (name, category, offset_s, duration_s, attrs); appended from any thread
+        self.spans = []
+
+    def add(self, name: str, category: str, start: float, duration: float, attrs: Optional[dict] = None):
+        self.spans.append((name, category, start - self.start, duration, attrs))
+
+    def breakdown(self) -> dict:
+        """{category: (total seconds, span count)} in first-seen order."""
+        totals = {}
+        for _name, category, _offset, duration, _attrs in list(self.spans):
+            total, count = totals.get(category, (0.0, 0))
+            totals[category] = (total + duration, count + 1)
+        return totals
+
+    def server_timing(self) -> str:
+        parts = [
+            f'{category};dur={total * 1000:.1f};desc="{count} span{"s" if count != 1 else ""}"'
+            for category, (total, count) in self.breakdown().items()
+        ]
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": round((self.duration or 0) * 1000, 2),
+            "breakdown_ms": {
+                category: round(total * 1000, 2) for category, (total, _count) in self.breakdown().items()
+            },
+            "spans": [
+                {
+                    "name": name,
+                    "category": category,
+                    "offset_ms": round(offset * 1000, 2),
+                    "duration_ms": round(duration * 1000, 2),
+                    **({"attributes": attrs} if attrs else {}),
+                }
+                for name, category, offset, duration, attrs in sorted(list(self.spans), key=lambda s: s[2])
+            ],
+        }
+
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(name: str, category: str, **attrs):
+    """Time the enclosed block as a span of the current request's trace."""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, category, start, time.perf_counter() - start, attrs or None)
+
+
+class TracedJSONResponse(JSONResponse):
+    """Default response class; times JSON rendering as a `serialize` span."""
+
+    def render(self, content) -> bytes:
+        with span("json.render", "serialize"):
+            return super().render(content)
+
+
+class TraceBuffer:
+    """Ring buffer of recently kept traces."""
+
+    def __init__(self, size: int = TRACE_BUFFER_SIZE):
+        self._traces = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, trace: Trace):
+        with self._lock:
+            self._traces.append(trace)
+
+    def query(self, route: Optional[str] = None, min_duration_ms: float = 0, limit: int = 50) -> list:
+        """Newest first, optionally filtered by route label and minimum duration."""
+        with self._lock:
+            traces = list(self._traces)
+        result = []
+        for trace in reversed(traces):
+            if route is not None and trace.route != route:
+                continue
+            if (trace.duration or 0) * 1000 < min_duration_ms:
+                continue
+            result.append(trace.as_dict())
+            if len(result) >= limit:
+                break
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+trace_buffer = TraceBuffer()
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening a Trace per HTTP request."""
+
+    def __init__(self, app, buffer: TraceBuffer = trace_buffer):
+        self.app = app
+        self.buffer = buffer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace(scope.get("method", ""), scope.get("path", ""))
+        token = current_trace.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-trace-id", trace.id.encode()))
+                if SERVER_TIMING_ENABLED:
+                    headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.start
+            trace.route = route_label(scope)
+            if trace.duration * 1000 >= TRACE_SLOW_MS or random.random() < TRACE_SAMPLE_RATE:
+                self.buffer.add(trace)
@@ -0,0 +1,26 @@
+"""
+Shared pytest configuration.
+
+Makes the backend packages importable and points in-process tests at the
+in-memory database backend, so they run without MongoDB or external services.
+The HTTP tests in test_arar_backend.py are unaffected: they only talk to
+REACT_APP_BACKEND_URL.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Enough configuration for server.validate_env() in development mode
+os.environ.setdefault("ENVIRONMENT", "development")
+os.environ.setdefault("DB_BACKEND", "memory")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "arar_test")
+os.environ.setdefault("STRIPE_SECRET_KEY", "sk_test_placeholder")
+os.environ.setdefault("STRIPE_WEBHOOK_SECRET", "whsec_placeholder")
+os.environ.setdefault("CLOUDINARY_CLOUD_NAME", "placeholder")
+os.environ.setdefault("CLOUDINARY_API_KEY", "placeholder")
+os.environ.setdefault("CLOUDINARY_API_SECRET", "placeholder")
+os.environ.setdefault("JWT_SECRET_KEY", "test-secret-key")
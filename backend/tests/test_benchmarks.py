@@ -0,0 +1,42 @@
+"""
+Smoke test for the benchmark harness: every scenario runs error-free against
+the in-process app, and the baseline comparison flags regressions.
+"""
+import asyncio
+
+from benchmarks import run
+from benchmarks.fake_stripe import sign_payload, verify_signature
+from routes import checkout_routes
+from services.rate_limiter import route_rate_limits
+
+
+def test_every_scenario_runs_without_errors(monkeypatch):
+    monkeypatch.setattr(checkout_routes, "stripe", checkout_routes.stripe)
+    route_rate_limits.clear()
+
+    results = asyncio.run(run.run_benchmarks(
+        list(run.SCENARIOS), requests=4, concurrency=2, warmup=1, products=5, orders=20
+    ))
+
+    assert set(results) == set(run.SCENARIOS)
+    for name, result in results.items():
+        assert result["errors"] == 0, (name, result["first_error"])
+        assert result["throughput_rps"] > 0
+        assert 0 < result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+
+
+def test_compare_flags_throughput_and_latency_regressions():
+    baseline = {"catalog": {"throughput_rps": 100.0, "p95_ms": 10.0}}
+    ok = {"catalog": {"throughput_rps": 90.0, "p95_ms": 12.0, "errors": 0}}
+    slow = {"catalog": {"throughput_rps": 50.0, "p95_ms": 20.0, "errors": 0}}
+
+    assert run.compare(ok, baseline, tolerance=0.25) == []
+    assert len(run.compare(slow, baseline, tolerance=0.25)) == 2
+    assert run.percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+
+
+def test_webhook_signatures():
+    header = sign_payload(b'{"id": 1}', "whsec_x")
+    assert verify_signature(b'{"id": 1}', header, "whsec_x")
+    assert not verify_signature(b'{"id": 2}', header, "whsec_x")
+    assert not verify_signature(b'{"id": 1}', sign_payload(b'{"id": 1}', "whsec_x", timestamp=1), "whsec_x")
@@ -0,0 +1,36 @@
+"""
+Tests for utils/env_validator.py.
+"""
+import pytest
+
+from utils.env_validator import validate_env
+
+PRODUCTION_ENV = {
+    "ENVIRONMENT": "production",
+    "MONGO_URL": "mongodb://db:27017",
+    "DB_NAME": "arar",
+    "STRIPE_SECRET_KEY": "sk_live_123",
+    "STRIPE_WEBHOOK_SECRET": "whsec_123",
+    "CLOUDINARY_CLOUD_NAME": "arar",
+    "CLOUDINARY_API_KEY": "key",
+    "CLOUDINARY_API_SECRET": "secret",
+    "CORS_ORIGIN": "https://arar.example",
+}
+
+
+@pytest.fixture
+def production(monkeypatch):
+    for name, value in PRODUCTION_ENV.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("STRIPE_API_BASE", raising=False)
+    return monkeypatch
+
+
+def test_valid_production_environment_passes(production):
+    validate_env()
+
+
+def test_stripe_api_base_is_fatal_in_production(production):
+    production.setenv("STRIPE_API_BASE", "http://localhost:12111")
+    with pytest.raises(SystemExit):
+        validate_env()
@@ -0,0 +1,50 @@
+"""
+Tests for the synthetic data generator (generate_data.py).
+"""
+import asyncio
+
+import pytest
+
+from config.indexes import INDEX_MANIFEST
+from config.memory_backend import MemoryClient
+from generate_data import Generator, insert_batches, main
+
+
+def test_documents_are_deterministic_and_consistent():
+    gen, again = Generator(7, 50, 5, 30, "arar"), Generator(7, 50, 5, 30, "arar")
+    assert gen.product(3)["slug"] == again.product(3)["slug"] == gen.product_slug(3)
+
+    order = gen.order(11)
+    product = gen.product(int(order["product_id"].rsplit("-", 1)[1]))
+    assert order["product_slug"] == product["slug"]
+    assert order["amount_cents"] == product["price_amount"] == round(order["amount"] * 100)
+    assert product["collection_id"].startswith("gen-c-")
+
+
+def test_parallel_batches_and_idempotent_reruns():
+    collection = MemoryClient()["arar_test"].orders
+    asyncio.run(collection.create_index("id", unique=True))
+    gen = Generator(1, 20, 0, 30, "arar")
+
+    first = asyncio.run(insert_batches(collection, "orders", gen.order, 95, batch_size=10, concurrency=3))
+    rerun = asyncio.run(insert_batches(collection, "orders", gen.order, 100, batch_size=10, concurrency=3))
+
+    assert (first.inserted, first.duplicates) == (95, 0)
+    assert (rerun.inserted, rerun.duplicates) == (5, 95)
+    assert asyncio.run(collection.count_documents({})) == 100
+
+
+def test_reruns_do_not_duplicate_inquiries():
+    collection = MemoryClient()["arar_test"].contact_inquiries
+    asyncio.run(collection.create_indexes(INDEX_MANIFEST["contact_inquiries"]))
+    gen = Generator(1, 20, 0, 30, "arar")
+
+    asyncio.run(insert_batches(collection, "inquiries", gen.inquiry, 30, batch_size=10, concurrency=2))
+    rerun = asyncio.run(insert_batches(collection, "inquiries", gen.inquiry, 30, batch_size=10, concurrency=2))
+
+    assert (rerun.inserted, rerun.duplicates) == (0, 30)
+
+
+def test_orders_require_products():
+    with pytest.raises(SystemExit):
+        main(["--products", "0", "--orders", "5"])
@@ -0,0 +1,53 @@
+"""
+Tests for services/image_derivatives.py.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services.image_derivatives import DerivativeEngine, UnsupportedImageError, parse_quality
+
+
+def test_quality_is_limited_to_the_ladder():
+    assert parse_quality("auto:eco") == 70
+    assert parse_quality("83") == parse_quality(80) == 80
+    assert parse_quality(100) == 90 and parse_quality(1) == 60
+    for invalid in ("0", "101", "best", ""):
+        with pytest.raises(ValueError):
+            parse_quality(invalid)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = DerivativeEngine(str(tmp_path))
+    # Threads instead of spawned processes keep the test fast
+    engine._executor = ThreadPoolExecutor(max_workers=1)
+    yield engine
+    engine.shutdown()
+
+
+def test_renders_and_reuses_a_derivative(engine, tmp_path):
+    from PIL import Image
+
+    Image.new("RGB", (1000, 500), "red").save(tmp_path / "hero.png")
+
+    path = asyncio.run(engine.get_derivative("hero.png", 500, "auto", "jpeg"))
+
+    with Image.open(path) as derived:
+        assert derived.size == (640, 320)
+    assert path.endswith("_w640_q80.jpg")
+    assert asyncio.run(engine.get_derivative("hero.png", 600, "80", "jpeg")) == path
+
+
+def test_non_image_source_is_rejected_and_not_retried(engine, tmp_path):
+    (tmp_path / "notes.png").write_bytes(b"not an image")
+
+    with pytest.raises(UnsupportedImageError):
+        asyncio.run(engine.get_derivative("notes.png", 320))
+    assert engine._inflight == {}
+
+    engine._executor = None  # a second render attempt would need a process pool
+    with pytest.raises(UnsupportedImageError):
+        asyncio.run(engine.get_derivative("notes.png", 640))
+    assert engine._executor is None
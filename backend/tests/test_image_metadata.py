@@ -0,0 +1,76 @@
+"""
+Tests for services/image_metadata.py (local images, memory backend).
+"""
+import asyncio
+
+import pytest
+from PIL import Image
+
+import services.image_storage as image_storage
+from config.memory_backend import MemoryClient
+from services.image_metadata import analyze_image, is_meta_current, refresh_product_image_meta
+from utils.blurhash import encode
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_storage, "LOCAL_UPLOADS_DIR", str(tmp_path))
+    (tmp_path / "products").mkdir()
+    Image.new("RGB", (400, 300), (180, 120, 60)).save(tmp_path / "products" / "hero.jpg")
+    Image.new("RGB", (200, 500), (20, 40, 200)).save(tmp_path / "products" / "detail.png")
+    return tmp_path
+
+
+def test_blurhash_of_flat_colour():
+    pixels = [(255, 255, 255)] * 16
+    assert encode(pixels, 4, 4, 1, 1) == "00TSUA"
+
+
+def test_analyze_honours_exif_orientation(tmp_path):
+    path = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    Image.new("RGB", (400, 300)).save(path, exif=exif)
+
+    meta = analyze_image(str(path))
+
+    assert (meta["width"], meta["height"]) == (300, 400)
+    assert meta["lqip"].startswith("data:image/webp;base64,")
+
+
+def test_local_upload_reports_dimensions(uploads):
+    with open(uploads / "products" / "hero.jpg", "rb") as f:
+        data = f.read()
+    result = run(image_storage.LocalStorage(str(uploads)).upload(data, "copy.jpg"))
+    assert (result["width"], result["height"]) == (400, 300)
+
+
+def test_refresh_stores_meta_next_to_urls(uploads):
+    products = MemoryClient()["arar_test"].products
+    product = {
+        "id": "p1",
+        "hero_image_url": "/uploads/products/hero.jpg",
+        "gallery_images": ["/uploads/products/detail.png", "/uploads/products/missing.jpg"],
+    }
+    run(products.insert_one(dict(product)))
+
+    assert run(refresh_product_image_meta("p1", products)) is True
+    stored = run(products.find_one({"id": "p1"}, {"_id": 0}))
+
+    assert stored["hero_image_meta"]["width"] == 400
+    assert stored["hero_image_meta"]["height"] == 300
+    assert len(stored["hero_image_meta"]["blurhash"]) == 28
+    assert stored["gallery_images_meta"][0]["height"] == 500
+    # Unreadable images are left empty so the next run retries them
+    assert stored["gallery_images_meta"][1] is None
+    assert not is_meta_current(stored)
+
+    run(products.update_one({"id": "p1"}, {"$set": {"gallery_images": ["/uploads/products/detail.png"]}}))
+    assert run(refresh_product_image_meta("p1", products)) is True
+    stored = run(products.find_one({"id": "p1"}, {"_id": 0}))
+    assert is_meta_current(stored)
+    assert run(refresh_product_image_meta("p1", products)) is False
@@ -0,0 +1,135 @@
+"""
+Tests for services/image_storage.py using LocalStorage in a temp directory.
+"""
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from config.memory_backend import MemoryClient
+from services.image_storage import ImageStorageService, LocalStorage, content_addressed_name
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def chunked(data: bytes, size: int):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.fixture
+def local_storage(tmp_path):
+    return LocalStorage(str(tmp_path))
+
+
+@pytest.fixture
+def assets():
+    collection = MemoryClient()["arar_test"].image_assets
+    run(collection.create_index("sha256", unique=True))
+    return collection
+
+
+@pytest.fixture
+def storage_service(local_storage, assets):
+    return ImageStorageService(storage=local_storage, assets_collection=assets)
+
+
+def stored_name(data: bytes, filename: str) -> str:
+    return content_addressed_name(hashlib.sha256(data).hexdigest(), filename)
+
+
+class TestStreamingUpload:
+
+    def test_stream_writes_file_and_checksum(self, local_storage, tmp_path):
+        data = os.urandom(300_000)
+        result = run(local_storage.upload_stream(chunked(data, 64 * 1024), "hero.jpg"))
+
+        assert result["public_id"] == "products/hero.jpg"
+        assert result["bytes"] == len(data)
+        assert result["sha256"] == hashlib.sha256(data).hexdigest()
+        assert (tmp_path / "products" / "hero.jpg").read_bytes() == data
+
+    def test_oversized_stream_leaves_no_files(self, local_storage, tmp_path):
+        with pytest.raises(ValueError):
+            run(local_storage.upload_stream(chunked(b"x" * 5000, 1000), "big.jpg", max_bytes=2000))
+        assert os.listdir(tmp_path / "products") == []
+
+    def test_failed_stream_keeps_previous_version(self, local_storage, tmp_path):
+        run(local_storage.upload(b"original", "hero.jpg"))
+
+        async def broken():
+            yield b"partial"
+            raise ConnectionError("client went away")
+
+        with pytest.raises(ConnectionError):
+            run(local_storage.upload_stream(broken(), "hero.jpg"))
+        assert (tmp_path / "products" / "hero.jpg").read_bytes() == b"original"
+        assert os.listdir(tmp_path / "products") == ["hero.jpg"]
+
+
+class TestUploadMany:
+
+    def test_results_in_input_order(self, storage_service):
+        files = [(f"image-{i}".encode(), f"gallery_{i}.jpg") for i in range(5)]
+        results = run(storage_service.upload_many(files, concurrency=2))
+        assert [r["public_id"] for r in results] == [f"products/{stored_name(data, name)}" for data, name in files]
+
+    def test_failures_are_reported_per_file(self, storage_service, local_storage):
+        original_upload = local_storage.upload
+
+        async def flaky_upload(file_data, filename, folder="products"):
+            if file_data == b"b":
+                raise OSError("disk full")
+            return await original_upload(file_data, filename, folder)
+
+        local_storage.upload = flaky_upload
+        results = run(storage_service.upload_many([(b"a", "good.jpg"), (b"b", "bad.jpg")]))
+        assert results[0]["public_id"] == f"products/{stored_name(b'a', 'good.jpg')}"
+        assert results[1] == {"filename": "bad.jpg", "error": "disk full"}
+
+
+class TestDeduplication:
+
+    def test_identical_bytes_are_stored_once(self, storage_service, local_storage, tmp_path, assets):
+        calls = []
+        original_upload = local_storage.upload
+
+        async def counting_upload(file_data, filename, folder="products"):
+            calls.append(filename)
+            return await original_upload(file_data, filename, folder)
+
+        local_storage.upload = counting_upload
+        first = run(storage_service.upload(b"bottle-shot", "eclipse_hero.jpg"))
+        second = run(storage_service.upload(b"bottle-shot", "eclipse_hero_2024.JPG"))
+
+        assert len(calls) == 1
+        assert first["deduplicated"] is False and second["deduplicated"] is True
+        assert first["public_id"] == second["public_id"]
+        assert run(assets.find_one({"sha256": first["sha256"]}))["ref_count"] == 2
+
+    def test_streamed_upload_deduplicates_against_bytes(self, storage_service):
+        first = run(storage_service.upload(b"x" * 10_000, "a.jpg"))
+        second = run(storage_service.upload_stream(chunked(b"x" * 10_000, 4096), "b.jpg"))
+        assert second["deduplicated"] is True
+        assert second["public_id"] == first["public_id"]
+
+    def test_delete_keeps_file_until_last_reference(self, storage_service, tmp_path, assets):
+        result = run(storage_service.upload(b"shared", "a.jpg"))
+        run(storage_service.upload(b"shared", "b.jpg"))
+        path = tmp_path / result["public_id"]
+
+        assert run(storage_service.delete(result["public_id"])) is True
+        assert path.exists()
+        assert run(storage_service.delete(result["public_id"])) is True
+        assert not path.exists()
+        assert run(assets.count_documents({})) == 0
+
+    def test_reupload_after_delete_stores_again(self, storage_service, tmp_path):
+        result = run(storage_service.upload(b"seasonal", "a.jpg"))
+        run(storage_service.delete(result["public_id"]))
+        again = run(storage_service.upload(b"seasonal", "a.jpg"))
+        assert again["deduplicated"] is False
+        assert (tmp_path / again["public_id"]).read_bytes() == b"seasonal"
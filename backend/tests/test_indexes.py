@@ -0,0 +1,37 @@
+"""
+Tests for the index manifest (config/indexes.py), its build on startup and
+utils/query_plan_checker.py, on the in-memory backend.
+"""
+import asyncio
+
+from config.database import _ensure_indexes, db, initialize_database
+from config.indexes import INDEX_MANIFEST
+from utils.query_plan_checker import QUERY_SHAPES, check_query_plans
+
+
+def test_manifest_is_built_once():
+    asyncio.run(initialize_database())
+
+    for name, models in INDEX_MANIFEST.items():
+        existing = asyncio.run(db[name].index_information())
+        assert {model.document["name"] for model in models} <= set(existing)
+        assert asyncio.run(_ensure_indexes(name, models)) == []
+
+
+def test_route_query_shapes_use_the_manifest():
+    asyncio.run(initialize_database())
+
+    results = asyncio.run(check_query_plans(db))
+
+    assert len(results) == len(QUERY_SHAPES)
+    # The in-memory planner only knows equality lookups, so sort-only shapes
+    # (the admin order list) scan there; MongoDB serves them from the index.
+    sorted_routes = {shape.route for shape in QUERY_SHAPES if shape.sort}
+    unexpected = {r["route"] for r in results if r["collscan"] and not r["expected"]}
+    assert unexpected <= sorted_routes
+
+
+def test_rate_limit_windows_expire_by_ttl():
+    (model,) = INDEX_MANIFEST["rate_limits"]
+    assert model.document["key"] == {"expires_at": 1}
+    assert model.document["expireAfterSeconds"] == 0
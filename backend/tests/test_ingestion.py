@@ -0,0 +1,104 @@
+"""
+Tests for services/ingestion.py against the in-memory backend, and for the
+public routes that write through it.
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config.memory_backend import MemoryClient
+from services.ingestion import BatchWriter, QueueFull, RecentKeys
+
+
+@pytest.fixture
+def collection():
+    collection = MemoryClient()["arar_test"].newsletter
+    asyncio.run(collection.create_index("email", unique=True))
+    return collection
+
+
+def test_flushes_on_batch_size_and_resolves_duplicates(collection):
+    async def scenario():
+        writer = BatchWriter("test-size", collection, batch_size=3, flush_interval=60)
+        for email in ["a@x.com", "b@x.com", "a@x.com"]:
+            writer.submit({"email": email})
+        await asyncio.sleep(0.05)
+        assert writer.pending == 0
+        await writer.stop()
+        return await collection.count_documents({})
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_flushes_on_interval(collection):
+    async def scenario():
+        writer = BatchWriter("test-interval", collection, batch_size=100, flush_interval=0.05)
+        writer.submit({"email": "a@x.com"})
+        assert await collection.count_documents({}) == 0
+        await asyncio.sleep(0.2)
+        count = await collection.count_documents({})
+        await writer.stop()
+        return count
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_backpressure_and_drain_on_stop(collection):
+    async def scenario():
+        writer = BatchWriter("test-full", collection, max_queue=2, batch_size=100, flush_interval=60)
+        writer.submit({"email": "a@x.com"})
+        writer.submit({"email": "b@x.com"})
+        with pytest.raises(QueueFull):
+            writer.submit({"email": "c@x.com"})
+        await writer.stop()
+        return await collection.count_documents({})
+
+    assert asyncio.run(scenario()) == 2
+
+
+def test_recent_keys_window_and_bound():
+    recent = RecentKeys(max_size=2, window=60)
+    assert recent.check_and_add("a", "id-1") is None
+    assert recent.check_and_add("a", "id-2") == "id-1"
+    recent.check_and_add("b")
+    recent.check_and_add("c")
+    assert len(recent) == 2
+    assert recent.check_and_add("a") is None
+
+
+def test_newsletter_signups_are_written_behind():
+    from config.database import newsletter_collection
+    from server import app
+
+    with TestClient(app) as client:
+        first = client.post("/api/newsletter", json={"email": "batch@example.com"})
+        again = client.post("/api/newsletter", json={"email": "batch@example.com"})
+        assert first.status_code == 200, first.text
+        assert again.status_code == 400
+
+    # Shutdown drains the queue
+    count = asyncio.run(newsletter_collection.count_documents({"email": "batch@example.com"}))
+    assert count == 1
+
+
+def test_contact_inquiries_are_deduplicated_and_throttled():
+    from config.database import contact_inquiries_collection
+    from server import app
+
+    inquiry = {"name": "Bot", "email": "bot@example.com", "message": "Buy  now"}
+    with TestClient(app) as client:
+        first = client.post("/api/contact", json=inquiry)
+        repeat = client.post("/api/contact", json={**inquiry, "message": "Buy now\n"})
+        assert first.status_code == 200, first.text
+        assert repeat.json()["id"] == first.json()["id"]
+
+        statuses = [
+            client.post("/api/contact", json={**inquiry, "message": f"spam {i}"}).status_code
+            for i in range(10)
+        ]
+        assert statuses.count(429) > 0
+        assert client.post("/api/contact", json=inquiry).headers.get("retry-after")
+
+    count = asyncio.run(contact_inquiries_collection.count_documents({"email": "bot@example.com"}))
+    assert count == statuses.count(200) + 1
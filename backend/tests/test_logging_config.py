@@ -0,0 +1,66 @@
+"""
+Tests for utils/logging_config.py.
+"""
+import io
+import json
+import logging
+import queue
+import sys
+
+from utils.logging_config import (
+    JsonFormatter,
+    LoggingPipeline,
+    NonBlockingQueueHandler,
+    RateSamplingFilter,
+)
+
+
+def _record(name="app", level=logging.INFO, msg="hello %s", args=("world",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_sampling_is_per_logger_and_spares_warnings():
+    sampler = RateSamplingFilter(rate=0.001, burst=2)
+    assert [sampler.filter(_record()) for _ in range(4)] == [True, True, False, False]
+    assert sampler.filter(_record(name="other"))
+
+    # The next record that gets through reports how many were dropped
+    warning = _record(level=logging.WARNING)
+    assert sampler.filter(warning)
+    assert warning.sampled_out == 2
+
+
+def test_queue_handler_never_blocks_and_formats_on_the_caller():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = _record(level=logging.ERROR)
+        record.exc_info = sys.exc_info()
+    handler.emit(record)
+    handler.emit(_record())  # queue full: dropped, not raised or waited on
+
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "hello world" and queued.args is None and queued.exc_info is None
+    entry = json.loads(JsonFormatter().format(queued))
+    assert entry["message"] == "hello world"
+    assert entry["level"] == "ERROR"
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_pipeline_writes_json_from_the_listener_thread():
+    stream = io.StringIO()
+    pipeline = LoggingPipeline()
+    root = logging.getLogger()
+    level = root.level
+    try:
+        pipeline.configure(level="INFO", fmt="json", stream=stream)
+        logging.getLogger("pipeline.test").info("order %s paid", "o-1")
+        logging.getLogger("pipeline.test").debug("not emitted")
+        pipeline.stop()
+    finally:
+        root.removeHandler(pipeline.handler)
+        root.setLevel(level)
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(line["logger"], line["message"]) for line in lines] == [("pipeline.test", "order o-1 paid")]
@@ -0,0 +1,47 @@
+"""
+Tests for utils/loop_watchdog.py.
+"""
+import asyncio
+import time
+
+from utils.loop_watchdog import LoopWatchdog
+
+
+def blocking_call():
+    time.sleep(0.3)
+
+
+def test_stall_is_attributed_to_the_blocking_call():
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.02, report_interval=3600)
+
+    async def handler():
+        blocking_call()
+
+    async def scenario():
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(handler(), name="checkout")
+        await asyncio.sleep(0.05)
+        watchdog.stop()
+
+    asyncio.run(scenario())
+    report = watchdog.report()
+
+    assert report["stalls"] == 1
+    site = report["call_sites"][0]
+    assert "blocking_call" in site["stack"]
+    assert site["task"] == "checkout test_stall_is_attributed_to_the_blocking_call.<locals>.handler"
+    assert 0.15 < site["max_s"] < 0.5
+
+
+def test_healthy_loop_reports_nothing():
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.02, report_interval=3600)
+
+    async def scenario():
+        watchdog.start()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        watchdog.stop()
+
+    asyncio.run(scenario())
+    assert watchdog.report()["stalls"] == 0
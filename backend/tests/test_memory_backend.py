@@ -0,0 +1,170 @@
+"""
+Tests for the in-memory MongoDB stand-in (config/memory_backend.py)
+and an in-process smoke test of the API running on top of it.
+"""
+import asyncio
+
+import pytest
+from pymongo import ReturnDocument, UpdateOne, InsertOne, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from config.memory_backend import MemoryClient
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def products():
+    return MemoryClient()["arar_test"].products
+
+
+# =============================================================================
+# COLLECTION OPERATIONS
+# =============================================================================
+class TestMemoryCollection:
+
+    def test_insert_and_find_with_projection(self, products):
+        async def scenario():
+            await products.insert_one({"id": "p1", "slug": "eclipse-noir", "status": "published"})
+            await products.insert_one({"id": "p2", "slug": "silent-vow", "status": "draft"})
+            published = await products.find({"status": "published"}, {"_id": 0}).to_list(100)
+            assert published == [{"id": "p1", "slug": "eclipse-noir", "status": "published"}]
+            only_slug = await products.find_one({"id": "p2"}, {"slug": 1, "_id": 0})
+            assert only_slug == {"slug": "silent-vow"}
+        run(scenario())
+
+    def test_sort_skip_limit(self, products):
+        async def scenario():
+            for i, created in enumerate(["2024-03-01", "2024-01-01", "2024-02-01"]):
+                await products.insert_one({"id": f"p{i}", "created_at": created})
+            newest_first = await products.find({}, {"_id": 0}).sort("created_at", -1).to_list(10)
+            assert [p["created_at"] for p in newest_first] == ["2024-03-01", "2024-02-01", "2024-01-01"]
+            page = await products.find({}).sort([("created_at", 1)]).skip(1).limit(1).to_list(10)
+            assert page[0]["created_at"] == "2024-02-01"
+        run(scenario())
+
+    def test_query_operators(self, products):
+        async def scenario():
+            await products.insert_many([
+                {"id": "a", "stock_quantity": 0, "notes_top": ["Saffron", "Oud"]},
+                {"id": "b", "stock_quantity": 5, "notes_top": ["Bergamot"]},
+                {"id": "c", "stock_quantity": 12},
+            ])
+            in_stock = await products.find({"stock_quantity": {"$gt": 0}}).to_list(10)
+            assert {p["id"] for p in in_stock} == {"b", "c"}
+            assert await products.count_documents({"notes_top": "Oud"}) == 1
+            assert await products.count_documents({"notes_top": {"$exists": False}}) == 1
+            assert await products.count_documents({"$or": [{"id": "a"}, {"stock_quantity": {"$gte": 12}}]}) == 2
+            assert await products.count_documents({"id": {"$in": ["a", "b"], "$ne": "a"}}) == 1
+        run(scenario())
+
+    def test_update_set_inc_and_upsert(self, products):
+        async def scenario():
+            await products.insert_one({"id": "p1", "stock_quantity": 2})
+            result = await products.update_one(
+                {"id": "p1", "stock_quantity": {"$gt": 0}},
+                {"$inc": {"stock_quantity": -1}, "$set": {"status": "published"}}
+            )
+            assert (result.matched_count, result.modified_count) == (1, 1)
+            assert (await products.find_one({"id": "p1"}))["stock_quantity"] == 1
+
+            missing = await products.update_one({"id": "nope"}, {"$set": {"x": 1}})
+            assert missing.matched_count == 0
+
+            upserted = await products.update_one({"id": "p2"}, {"$set": {"stock_quantity": 3}}, upsert=True)
+            assert upserted.upserted_id is not None
+            assert (await products.find_one({"id": "p2"}, {"_id": 0})) == {"id": "p2", "stock_quantity": 3}
+        run(scenario())
+
+    def test_find_one_and_update_returns_after(self, products):
+        async def scenario():
+            doc = await products.find_one_and_update(
+                {"sha256": "abc"}, {"$inc": {"refs": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+            assert doc["refs"] == 1
+            doc = await products.find_one_and_update(
+                {"sha256": "abc"}, {"$inc": {"refs": 1}}, return_document=ReturnDocument.AFTER
+            )
+            assert doc["refs"] == 2
+        run(scenario())
+
+    def test_delete(self, products):
+        async def scenario():
+            await products.insert_many([{"id": "a", "tag": "x"}, {"id": "b", "tag": "x"}, {"id": "c"}])
+            assert (await products.delete_one({"id": "a"})).deleted_count == 1
+            assert (await products.delete_many({"tag": "x"})).deleted_count == 1
+            assert (await products.delete_one({"id": "a"})).deleted_count == 0
+            assert await products.count_documents({}) == 1
+        run(scenario())
+
+    def test_unique_index_enforced(self, products):
+        async def scenario():
+            await products.create_index("slug", unique=True)
+            await products.insert_one({"slug": "iron-silk"})
+            with pytest.raises(DuplicateKeyError):
+                await products.insert_one({"slug": "iron-silk"})
+            await products.insert_one({"slug": "silent-vow"})
+            with pytest.raises(DuplicateKeyError):
+                await products.update_one({"slug": "silent-vow"}, {"$set": {"slug": "iron-silk"}})
+            assert "slug_1" in await products.index_information()
+        run(scenario())
+
+    def test_unordered_insert_many_skips_duplicates(self, products):
+        async def scenario():
+            await products.create_index("email", unique=True)
+            await products.insert_one({"email": "a@example.com"})
+            with pytest.raises(BulkWriteError) as excinfo:
+                await products.insert_many(
+                    [{"email": "a@example.com"}, {"email": "b@example.com"}, {"email": "c@example.com"}],
+                    ordered=False,
+                )
+            assert excinfo.value.details["nInserted"] == 2
+            assert len(excinfo.value.details["writeErrors"]) == 1
+            assert await products.count_documents({}) == 3
+        run(scenario())
+
+    def test_bulk_write(self, products):
+        async def scenario():
+            await products.insert_one({"id": "p1", "price": "$380"})
+            result = await products.bulk_write([
+                UpdateOne({"id": "p1"}, {"$set": {"price_amount": 38000}}),
+                InsertOne({"id": "p2"}),
+                DeleteOne({"id": "p2"}),
+                UpdateOne({"id": "p3"}, {"$set": {"price_amount": 1}}, upsert=True),
+            ])
+            assert (result.modified_count, result.inserted_count, result.deleted_count, result.upserted_count) == (1, 1, 1, 1)
+            assert (await products.find_one({"id": "p1"}))["price_amount"] == 38000
+        run(scenario())
+
+
+# =============================================================================
+# IN-PROCESS API SMOKE TEST
+# =============================================================================
+class TestInProcessApi:
+
+    def test_admin_product_flow(self):
+        from fastapi.testclient import TestClient
+        from server import app
+
+        with TestClient(app) as client:
+            login = client.post(
+                "/api/admin/login",
+                json={"email": "admin@arar-perfume.com", "password": "ArarAdmin2024!"}
+            )
+            assert login.status_code == 200, login.text
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            product = {
+                "name": "TEST Product", "slug": "test-in-process", "short_description": "s",
+                "long_description": "l", "price": "$99.00", "price_amount": 9900,
+                "stock_quantity": 3, "status": "published", "hero_image_url": "/uploads/products/a.jpg",
+            }
+            created = client.post("/api/admin/products", json=product, headers=headers)
+            assert created.status_code == 200, created.text
+
+            fragrance = client.get("/api/fragrances/test-in-process")
+            assert fragrance.status_code == 200
+            assert fragrance.json()["price_amount"] == 9900
+            assert client.get("/api/fragrances/unknown").status_code == 404
@@ -0,0 +1,54 @@
+"""
+Tests for services/metrics.py and the Prometheus /metrics endpoint.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from services.metrics import CounterFamily, HistogramFamily, MetricsRegistry, render_prometheus
+
+
+def test_prometheus_metrics_endpoint():
+    from server import app
+
+    with TestClient(app) as client:
+        assert client.get("/api/fragrances/unknown-slug").status_code == 404
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_requests_total{route="GET /api/fragrances/{slug}",status="404"}' in body
+    assert 'http_request_duration_seconds_bucket{route="GET /api/fragrances/{slug}",le="+Inf"}' in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    assert "# TYPE mongo_command_duration_seconds histogram" in body
+
+
+def test_exposition_format_and_duplicate_names():
+    registry = MetricsRegistry()
+    requests = CounterFamily("t_requests_total", "Requests", ("route",), registry=registry)
+    latency = HistogramFamily("t_latency_seconds", "Latency", buckets=(0.1, 1.0), registry=registry)
+    requests.inc('GET /a"b')
+    latency.observe(0.5)
+
+    text = render_prometheus(registry)
+
+    assert 't_requests_total{route="GET /a\\"b"} 1' in text
+    assert 't_latency_seconds_bucket{le="0.1"} 0' in text
+    assert 't_latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "t_latency_seconds_count 1" in text
+    with pytest.raises(ValueError):
+        CounterFamily("t_requests_total", "Again", registry=registry)
+
+
+def test_metrics_need_a_token_in_production(monkeypatch):
+    from server import app
+
+    monkeypatch.setenv("ENVIRONMENT", "production")
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 404
+
+        monkeypatch.setenv("METRICS_TOKEN", "s3cret")
+        assert client.get("/metrics").status_code == 401
+        authorized = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert authorized.status_code == 200
@@ -0,0 +1,205 @@
+"""
+Tests for the online data migrations (migrations/).
+"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from config.memory_backend import MemoryClient
+from migrations import MIGRATIONS
+from migrations.m0001_price_amount import BackfillPriceAmount, parse_price
+from migrations.m0002_iso_timestamps import normalize_timestamp
+from migrations.runner import Migration, MigrationLocked, MigrationRunner
+
+
+def _runner(db, migrations=MIGRATIONS, **kwargs):
+    return MigrationRunner(db, migrations, batch_size=kwargs.pop("batch_size", 2), pause_s=0, **kwargs)
+
+
+def test_parsers():
+    assert parse_price("$1,250.00") == 125000
+    assert parse_price("$380") == 38000
+    assert parse_price("on request") is None and parse_price(None) is None
+    assert normalize_timestamp(datetime(2025, 1, 31, 12, 0)) == "2025-01-31T12:00:00+00:00"
+    assert normalize_timestamp("2025-01-31T12:00:00.5") == "2025-01-31T12:00:00.500000+00:00"
+    assert normalize_timestamp("2025-01-31T14:00:00+02:00") == "2025-01-31T12:00:00+00:00"
+    assert normalize_timestamp("yesterday") is None
+
+
+def test_backfills_every_collection_and_is_idempotent():
+    db = MemoryClient()["arar_test"]
+
+    async def scenario():
+        await db.products.insert_many([
+            {"id": "p1", "price": "$380", "created_at": datetime(2025, 1, 1)},
+            {"id": "p2", "price": "$99.50", "price_amount": 9950, "created_at": "2025-01-02T00:00:00+00:00"},
+            {"id": "p3", "price": "on request"},
+        ])
+        await db.orders.insert_many([
+            {"id": "o1", "amount": 380.0, "created_at": "2025-01-03T10:00:00"},
+            {"id": "o2", "amount": 9950},
+            {"id": "o3", "amount": 12.5, "amount_cents": 1250},
+        ])
+        await db.admin_users.insert_one({"email": "a@example.com", "created_at": None})
+
+        reports = await _runner(db).run()
+        assert [r.status for r in reports] == ["complete"] * 3
+        assert reports[0].modified == 1 and reports[0].skipped == 1
+
+        products = {p["id"]: p for p in await db.products.find({}).to_list(None)}
+        assert products["p1"]["price_amount"] == 38000
+        assert products["p1"]["created_at"] == "2025-01-01T00:00:00+00:00"
+        assert "price_amount" not in products["p3"]
+
+        orders = {o["id"]: o for o in await db.orders.find({}).to_list(None)}
+        assert (orders["o1"]["amount_cents"], orders["o1"]["amount"]) == (38000, 380.0)
+        assert (orders["o2"]["amount_cents"], orders["o2"]["amount"]) == (9950, 99.5)
+        assert orders["o1"]["created_at"] == "2025-01-03T10:00:00+00:00"
+        assert (await db.admin_users.find_one({}))["created_at"] is None
+
+        again = await _runner(db).run()
+        assert all(r.scanned == 0 for r in again)
+        assert [s["status"] for s in await _runner(db).status()] == ["complete"] * 3
+
+    asyncio.run(scenario())
+
+
+def test_resumes_after_a_failed_batch():
+    db = MemoryClient()["arar_test"]
+
+    class Flaky(BackfillPriceAmount):
+        calls = 0
+
+        def transform(self, collection, doc):
+            Flaky.calls += 1
+            if Flaky.calls == 3:
+                raise RuntimeError("boom")
+            return super().transform(collection, doc)
+
+    async def scenario():
+        await db.products.insert_many([{"id": f"p{i}", "price": "$10"} for i in range(5)])
+        with pytest.raises(RuntimeError):
+            await _runner(db, [Flaky()]).run()
+        state = await db.migrations.find_one({"_id": 1})
+        assert state["status"] == "failed" and state["progress"]["products"]["scanned"] == 2
+
+        report = (await _runner(db, [Flaky()]).run())[0]
+        # Only the three remaining documents are read again
+        assert (report.status, report.collections["products"]["scanned"]) == ("complete", 5)
+        assert Flaky.calls == 6
+        assert await db.products.count_documents({"price_amount": 1000}) == 5
+
+    asyncio.run(scenario())
+
+
+def test_conflicting_documents_are_migrated_by_a_later_pass():
+    db = MemoryClient()["arar_test"]
+
+    class Racing(BackfillPriceAmount):
+        races = 1
+
+        def transform(self, collection, doc):
+            update = super().transform(collection, doc)
+            if Racing.races:
+                # The app edits the price after the runner read the document
+                Racing.races -= 1
+                next(iter(db.products._documents.values()))["price"] = "$20"
+            return update
+
+    async def scenario():
+        await db.products.insert_one({"id": "p1", "price": "$10"})
+        report = (await _runner(db, [Racing()]).run())[0]
+        assert (report.status, report.modified, report.conflicts) == ("complete", 1, 1)
+        assert (await db.products.find_one({"id": "p1"}))["price_amount"] == 2000
+
+    asyncio.run(scenario())
+
+
+def test_partial_migration_is_finished_by_the_next_run():
+    db = MemoryClient()["arar_test"]
+
+    class Racing(BackfillPriceAmount):
+        races = 2
+
+        def transform(self, collection, doc):
+            update = super().transform(collection, doc)
+            if Racing.races:
+                Racing.races -= 1
+                next(iter(db.products._documents.values()))["price"] = f"${20 + Racing.races}"
+            return update
+
+    async def scenario():
+        await db.products.insert_one({"id": "p1", "price": "$10"})
+        first = await _runner(db, [Racing()], max_passes=2).run()
+        assert [(r.status, r.conflicts) for r in first] == [("partial", 2)]
+        assert "price_amount" not in await db.products.find_one({"id": "p1"})
+        assert (await _runner(db, [Racing()]).status())[0]["status"] == "partial"
+
+        second = (await _runner(db, [Racing()]).run())[0]
+        assert (second.status, second.modified) == ("complete", 1)
+        assert (await db.products.find_one({"id": "p1"}))["price_amount"] == 2000
+
+    asyncio.run(scenario())
+
+
+def test_lease_blocks_a_second_runner():
+    db = MemoryClient()["arar_test"]
+
+    class Noop(Migration):
+        version, name, collections = 1, "noop", ()
+
+    async def scenario():
+        first = _runner(db, [Noop()])
+        await first._acquire(Noop())
+        with pytest.raises(MigrationLocked):
+            await _runner(db, [Noop()]).run()
+        assert (await first.run())[0].status == "complete"
+
+    asyncio.run(scenario())
+
+
+def test_memory_backend_type_and_not_operators():
+    db = MemoryClient()["arar_test"]
+
+    async def scenario():
+        await db.things.insert_many([
+            {"v": 1}, {"v": 1.5}, {"v": "1"}, {"v": True}, {"v": datetime.now(timezone.utc)}, {},
+        ])
+        assert await db.things.count_documents({"v": {"$type": "int"}}) == 1
+        assert await db.things.count_documents({"v": {"$type": ["double", "string"]}}) == 2
+        assert await db.things.count_documents({"v": {"$type": "date"}}) == 1
+        assert await db.things.count_documents({"v": {"$not": {"$type": "number"}}}) == 4
+        assert await db.things.count_documents({"v": {"$type": "string", "$not": {"$regex": "^1"}}}) == 0
+
+    asyncio.run(scenario())
+
+
+def test_gate_reports_required_versions_until_complete():
+    from migrations import MigrationGate
+
+    db = MemoryClient()["arar_test"]
+    gate = MigrationGate(required=(1,))
+
+    async def scenario():
+        assert await gate.pending(db) == [1]
+        await _runner(db, [BackfillPriceAmount()]).run()
+        assert await gate.pending(db) == []
+        assert gate.ready
+
+    asyncio.run(scenario())
+
+
+def test_health_is_not_ready_in_production_while_migrations_pend(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+    from migrations import MigrationGate
+
+    monkeypatch.setattr(server, "migration_gate", MigrationGate(required=(999,)))
+    monkeypatch.setattr(server, "IS_PRODUCTION", True)
+    with TestClient(server.app) as client:
+        response = client.get("/api/health")
+
+    assert response.status_code == 503
+    assert response.json()["detail"]["pending_migrations"] == [999]
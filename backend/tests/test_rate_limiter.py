@@ -0,0 +1,76 @@
+"""
+Tests for services/rate_limiter.py and the RateLimitMiddleware.
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from config.memory_backend import MemoryClient
+from middleware.rate_limit import RateLimitMiddleware
+from services.rate_limiter import (
+    MongoWindowLimiter,
+    RouteRateLimits,
+    ShardedTokenBucketLimiter,
+    parse_limits,
+)
+
+
+def test_sharded_buckets_are_per_key():
+    limiter = ShardedTokenBucketLimiter(rate=1, burst=2, shards=4)
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") == 0
+    assert limiter.acquire("a") > 0
+    # Another key has its own bucket, and per-call limits override the defaults
+    assert limiter.acquire("b") == 0
+    assert [limiter.acquire("c", rate=1, burst=3) for _ in range(4)].count(0.0) == 3
+    assert len(limiter) == 3
+
+
+def test_parse_limits():
+    assert parse_limits("post /api/contact=5/2; GET /api/x=30") == {
+        "POST /api/contact": (5.0, 2),
+        "GET /api/x": (30.0, 30),
+    }
+    with pytest.raises(ValueError):
+        parse_limits("/api/contact=5")
+
+
+def test_shared_window_counts_across_limiters():
+    database = MemoryClient()["arar_test"]
+    workers = [MongoWindowLimiter(database), MongoWindowLimiter(database)]
+
+    async def scenario():
+        # burst 3 at one request per second: 3 requests per 3-second window in total
+        return [await workers[i % 2].acquire("POST /x|1.2.3.4", rate=1, burst=3) for i in range(4)]
+
+    results = asyncio.run(scenario())
+    assert results[:3] == [0.0, 0.0, 0.0]
+    assert 0 < results[3] <= 3
+
+
+def test_middleware_rejects_before_the_endpoint_runs():
+    calls = []
+    app = FastAPI()
+
+    @app.post("/api/admin/login")
+    async def login():
+        calls.append(1)
+        return {"ok": True}
+
+    @app.get("/api/fragrances")
+    async def fragrances():
+        return []
+
+    limits = RouteRateLimits({"POST /api/admin/login": (60, 2)})
+    app.add_middleware(RateLimitMiddleware, limits=limits, enabled=True)
+
+    with TestClient(app) as client:
+        statuses = [client.post("/api/admin/login").status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        rejected = client.post("/api/admin/login")
+        assert rejected.headers["retry-after"] == "1"
+        assert rejected.json()["detail"]
+        assert all(client.get("/api/fragrances").status_code == 200 for _ in range(5))
+    assert len(calls) == 2
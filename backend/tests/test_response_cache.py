@@ -0,0 +1,168 @@
+"""
+Tests for services/response_cache.py on a minimal FastAPI app.
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from services.response_cache import ResponseCache, cached_response
+
+
+@pytest.fixture
+def app_and_calls():
+    cache = ResponseCache()
+    calls = {"items": 0, "item": 0}
+    status = {"1": "pending"}
+    app = FastAPI()
+
+    @app.get("/items")
+    @cached_response(ttl=0.2, stale_ttl=10, key=("path", "query"), tags=("items",), cache=cache)
+    async def list_items(limit: int = 10):
+        calls["items"] += 1
+        await asyncio.sleep(0.05)
+        return {"limit": limit, "version": calls["items"]}
+
+    @app.get("/items/{item_id}")
+    @cached_response(ttl=60, tags=("item:{item_id}",), cache_if=lambda item: item["status"] == "done", cache=cache)
+    async def get_item(item_id: str):
+        calls["item"] += 1
+        if item_id not in status:
+            raise HTTPException(status_code=404, detail="Not found")
+        return {"id": item_id, "status": status[item_id]}
+
+    return app, cache, calls, status
+
+
+def test_hit_miss_and_query_key(app_and_calls):
+    app, _cache, calls, _status = app_and_calls
+    with TestClient(app) as client:
+        first = client.get("/items")
+        second = client.get("/items")
+        other = client.get("/items", params={"limit": 5})
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert second.json() == first.json()
+    assert other.json()["limit"] == 5
+    assert calls["items"] == 2
+
+
+def test_stale_while_revalidate_refreshes_once(app_and_calls):
+    app, _cache, calls, _status = app_and_calls
+    with TestClient(app) as client:
+        client.get("/items")
+        time.sleep(0.25)
+        stale = [client.get("/items") for _ in range(5)]
+        assert {r.headers["x-cache"] for r in stale} == {"STALE"}
+        assert all(r.json()["version"] == 1 for r in stale)
+        time.sleep(0.1)
+        refreshed = client.get("/items")
+
+    assert calls["items"] == 2
+    assert refreshed.headers["x-cache"] == "HIT"
+    assert refreshed.json()["version"] == 2
+
+
+def test_concurrent_misses_share_one_call(app_and_calls):
+    import httpx
+
+    app, _cache, calls, _status = app_and_calls
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get("/items") for _ in range(10)))
+
+    responses = asyncio.run(scenario())
+    assert calls["items"] == 1
+    assert len({r.json()["version"] for r in responses}) == 1
+
+
+def test_cache_if_and_tag_invalidation(app_and_calls):
+    app, cache, calls, status = app_and_calls
+    with TestClient(app) as client:
+        client.get("/items/1")
+        client.get("/items/1")
+        assert calls["item"] == 2  # not terminal: never cached
+
+        status["1"] = "done"
+        client.get("/items/1")
+        assert client.get("/items/1").headers["x-cache"] == "HIT"
+
+        assert cache.invalidate_tags(["item:1"]) == 1
+        assert client.get("/items/1").headers["x-cache"] == "MISS"
+        assert client.get("/items/2").status_code == 404
+
+
+def test_invalidation_bus_is_local_only_on_memory_backend():
+    from config.memory_backend import MemoryClient
+    from services.cache_bus import InvalidationBus
+    from services.response_cache import _Entry
+
+    cache = ResponseCache()
+    database = MemoryClient()["arar_test"]
+    bus = InvalidationBus(database, cache)
+    cache.put(("orders",), _Entry(b"[]", {"orders"}, 60, 60), cache.generation)
+
+    asyncio.run(bus.publish("orders"))
+
+    assert not bus.distributed
+    assert len(cache) == 0
+    assert "cache_invalidations" not in asyncio.run(database.list_collection_names())
+
+
+def test_invalidation_bus_tails_in_server_order_not_id_order():
+    from bson import ObjectId
+
+    from services import cache_bus
+    from services.response_cache import _Entry
+
+    older_id, newer_id = ObjectId("000000010000000000000001"), ObjectId("000000020000000000000001")
+
+    class Cursor:
+        def __init__(self, events):
+            self.events, self.alive = events, True
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            if not self.events:
+                self.alive = False
+                raise StopAsyncIteration
+            return self.events.pop(0)
+
+        async def close(self):
+            pass
+
+    class CappedCollection:
+        """Natural order: our marker first, then another worker's event with a lower _id."""
+
+        def __init__(self):
+            self.events = [{"_id": newer_id, "tags": []}]
+
+        async def find_one(self, query, projection=None, sort=None):
+            matches = [e for e in self.events if e["_id"] == query.get("_id", e["_id"])]
+            return matches[-1] if matches else None
+
+        def find(self, query, **_kwargs):
+            assert query == {}
+            self.events.append({"_id": older_id, "tags": ["orders"], "origin": "other-worker"})
+            return Cursor(list(self.events))
+
+    cache = ResponseCache()
+    bus = cache_bus.InvalidationBus(object(), cache)
+    bus._collection = CappedCollection()
+    cache.put(("orders",), _Entry(b"[]", {"orders"}, 60, 60), cache.generation)
+
+    async def tail_once():
+        task = asyncio.create_task(bus._tail())
+        while len(cache):
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(asyncio.wait_for(tail_once(), 2))
+    assert len(cache) == 0
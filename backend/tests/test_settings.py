@@ -0,0 +1,32 @@
+"""
+Tests for config/settings.py.
+"""
+import pytest
+
+from config.settings import DatabaseSettings
+
+
+def test_from_env_parses_and_validates(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "50")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "5")
+    monkeypatch.setenv("MONGO_COMPRESSORS", "zlib")
+    monkeypatch.setenv("MONGO_CATALOG_READ_PREFERENCE", "secondary_preferred")
+    monkeypatch.setenv("MONGO_CATALOG_MAX_STALENESS_S", "120")
+
+    settings = DatabaseSettings.from_env()
+
+    assert (settings.max_pool_size, settings.min_pool_size) == (50, 5)
+    assert settings.client_options()["compressors"] == "zlib"
+    assert settings.catalog_read_preference_object.max_staleness == 120
+
+
+@pytest.mark.parametrize("name, value, message", [
+    ("MONGO_MAX_POOL_SIZE", "many", "MONGO_MAX_POOL_SIZE must be an integer"),
+    ("MONGO_CATALOG_MAX_STALENESS_S", "2m", "MONGO_CATALOG_MAX_STALENESS_S must be an integer"),
+    ("MONGO_CATALOG_MAX_STALENESS_S", "30", "at least 90 seconds"),
+    ("MONGO_CATALOG_READ_PREFERENCE", "fastest", "Unknown read preference"),
+])
+def test_invalid_values_name_the_variable(monkeypatch, name, value, message):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValueError, match=message):
+        DatabaseSettings.from_env()
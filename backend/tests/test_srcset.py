@@ -0,0 +1,29 @@
+"""
+Tests for services/srcset.py.
+"""
+from services.srcset import _local_srcset, build_srcset, parse_ladder, with_srcsets
+
+
+def test_cloudinary_srcset_replaces_existing_transformation():
+    url = "https://res.cloudinary.com/demo/image/upload/w_800,q_auto/v1712/arar/hero.jpg"
+    assert build_srcset(url, [640, 320], "80") == (
+        "https://res.cloudinary.com/demo/image/upload/w_320,q_80,f_auto/arar/hero.jpg 320w, "
+        "https://res.cloudinary.com/demo/image/upload/w_640,q_80,f_auto/arar/hero.jpg 640w"
+    )
+
+
+def test_local_srcset_snaps_to_derivative_widths():
+    assert build_srcset("/uploads/products/a.jpg", [300, 320, 5000], "auto") == (
+        "/api/media/derived/products/a.jpg?w=320&q=80 320w, "
+        "/api/media/derived/products/a.jpg?w=1920&q=80 1920w"
+    )
+
+
+def test_srcsets_are_memoized_and_unknown_hosts_skipped():
+    _local_srcset.cache_clear()
+    product = {"hero_image_url": "/uploads/products/b.jpg", "gallery_images": ["https://example.com/x.jpg"]}
+    with_srcsets(product, parse_ladder("640,320"))
+    with_srcsets(product, parse_ladder("320, 640"))
+
+    assert _local_srcset.cache_info().hits == 1
+    assert product["gallery_images_srcset"] == [None]
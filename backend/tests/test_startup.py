@@ -0,0 +1,66 @@
+"""
+Tests for deferred SDK imports (utils/lazy_import.py) and the startup
+profiler (utils/startup_profiler.py).
+"""
+import os
+import subprocess
+import sys
+
+from utils.lazy_import import lazy_import
+from utils.startup_profiler import StartupProfiler, startup_profiler
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_server_does_not_load_the_sdks():
+    # Other tests import stripe, so check in a fresh interpreter
+    code = (
+        "import sys, server; "
+        "print(sorted(m for m in ('stripe', 'cloudinary') if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env=dict(os.environ),
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+
+def test_first_attribute_access_loads_the_module(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe_sdk.py").write_text("api_key = 'default'\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_probe_sdk", raising=False)
+
+    sdk = lazy_import("lazy_probe_sdk")
+    assert "lazy_probe_sdk" not in sys.modules
+    assert "not loaded" in repr(sdk)
+
+    assert sdk.api_key == "default"
+    assert "lazy_probe_sdk" in sys.modules
+    sdk.api_key = "sk_test"
+    assert sys.modules["lazy_probe_sdk"].api_key == "sk_test"
+    assert any(
+        (e["kind"], e["name"]) == ("lazy-import", "lazy_probe_sdk")
+        for e in startup_profiler.report()["entries"]
+    )
+
+
+def test_profiler_records_per_module_import_timings():
+    profiler = StartupProfiler()
+    module = profiler.import_module("json")
+    with profiler.measure("init", "connect"):
+        pass
+    profiler.mark_complete()
+
+    assert module is sys.modules["json"]
+    report = profiler.report()
+    assert sorted((e["kind"], e["name"]) for e in report["entries"]) == [("import", "json"), ("init", "connect")]
+    assert all(e["ms"] >= 0 for e in report["entries"])
+    assert report["total_ms"] is not None
+
+
+def test_server_route_imports_are_profiled():
+    import server  # noqa: F401
+
+    imported = {e["name"] for e in startup_profiler.report()["entries"] if e["kind"] == "import"}
+    assert "routes.checkout_routes" in imported
@@ -0,0 +1,126 @@
+"""
+Tests for services/static_files.py (uploads serving).
+"""
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from services.static_files import FileDescriptorCache, parse_range, serve_static_file
+
+HASHED_NAME = "0123456789abcdef0123456789abcdef.jpg"
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    (tmp_path / "products").mkdir()
+    (tmp_path / "products" / "hero.jpg").write_bytes(bytes(range(256)) * 4)
+    (tmp_path / "products" / HASHED_NAME).write_bytes(b"immutable-bytes")
+    (tmp_path / "products" / ".upload-123.part").write_bytes(b"partial")
+    return tmp_path
+
+
+@pytest.fixture
+def cache():
+    cache = FileDescriptorCache(max_entries=2, stat_ttl=60)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def client(uploads, cache):
+    app = FastAPI()
+
+    @app.api_route("/uploads/{file_path:path}", methods=["GET", "HEAD"])
+    async def serve(file_path: str, request: Request):
+        return await serve_static_file(request, str(uploads), file_path, cache=cache)
+
+    return TestClient(app)
+
+
+class TestParseRange:
+
+    def test_ranges(self):
+        assert parse_range("bytes=0-99", 1000) == (0, 99)
+        assert parse_range("bytes=900-", 1000) == (900, 999)
+        assert parse_range("bytes=-100", 1000) == (900, 999)
+        assert parse_range("bytes=990-5000", 1000) == (990, 999)
+
+    def test_ignored_and_unsatisfiable(self):
+        assert parse_range("bytes=0-1,5-6", 1000) is None
+        assert parse_range("items=0-1", 1000) is None
+        with pytest.raises(ValueError):
+            parse_range("bytes=1000-", 1000)
+
+
+class TestServeStaticFile:
+
+    def test_full_response_headers(self, client):
+        response = client.get("/uploads/products/hero.jpg")
+        assert response.status_code == 200
+        assert len(response.content) == 1024
+        assert response.headers["content-type"] == "image/jpeg"
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["cache-control"] == "public, max-age=3600"
+        assert response.headers["etag"]
+
+    def test_content_addressed_is_immutable(self, client):
+        response = client.get(f"/uploads/products/{HASHED_NAME}")
+        assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+
+    def test_range_request(self, client):
+        response = client.get("/uploads/products/hero.jpg", headers={"Range": "bytes=10-19"})
+        assert response.status_code == 206
+        assert response.content == bytes(range(10, 20))
+        assert response.headers["content-range"] == "bytes 10-19/1024"
+        assert response.headers["content-length"] == "10"
+
+    def test_unsatisfiable_range(self, client):
+        response = client.get("/uploads/products/hero.jpg", headers={"Range": "bytes=5000-"})
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */1024"
+
+    def test_if_range_mismatch_serves_full_file(self, client):
+        response = client.get(
+            "/uploads/products/hero.jpg",
+            headers={"Range": "bytes=0-9", "If-Range": '"stale-etag"'}
+        )
+        assert response.status_code == 200
+        assert len(response.content) == 1024
+
+    def test_conditional_requests(self, client):
+        first = client.get("/uploads/products/hero.jpg")
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+        assert client.get("/uploads/products/hero.jpg", headers={"If-None-Match": etag}).status_code == 304
+        assert client.get("/uploads/products/hero.jpg", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+        assert client.get("/uploads/products/hero.jpg", headers={"If-Modified-Since": last_modified}).status_code == 304
+        assert client.get("/uploads/products/hero.jpg", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_head(self, client):
+        response = client.head("/uploads/products/hero.jpg")
+        assert response.status_code == 200
+        assert response.headers["content-length"] == "1024"
+        assert response.content == b""
+
+    def test_refuses_traversal_dotfiles_and_missing(self, client):
+        assert client.get("/uploads/products/missing.jpg").status_code == 404
+        assert client.get("/uploads/products/.upload-123.part").status_code == 404
+        assert client.get("/uploads/products/%2e%2e/%2e%2e/etc/passwd").status_code == 404
+        assert client.get("/uploads/products").status_code == 404
+
+    def test_descriptor_cache_is_bounded_and_reused(self, client, cache, uploads):
+        for name in ("hero.jpg", HASHED_NAME, "hero.jpg"):
+            assert client.get(f"/uploads/products/{name}").status_code == 200
+        assert len(cache._entries) == 2
+        fd = cache._entries[os.path.join(str(uploads), "products", "hero.jpg")].fd
+        client.get("/uploads/products/hero.jpg")
+        assert cache._entries[os.path.join(str(uploads), "products", "hero.jpg")].fd == fd
+
+    def test_changed_file_is_picked_up_after_ttl(self, client, cache, uploads):
+        cache.stat_ttl = 0
+        assert client.get("/uploads/products/hero.jpg").content[:1] == b"\x00"
+        path = uploads / "products" / "hero.jpg"
+        path.write_bytes(b"replaced")
+        os.utime(path, ns=(1, 1))
+        assert client.get("/uploads/products/hero.jpg").content == b"replaced"
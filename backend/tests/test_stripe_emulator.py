@@ -0,0 +1,104 @@
+"""
+Tests for the Stripe emulator and the webhook storm driver in benchmarks/.
+"""
+import asyncio
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+from stripe._encode import _api_encode
+
+from benchmarks import webhook_storm
+from benchmarks.fake_stripe import verify_signature
+from benchmarks.stripe_emulator import EmulatorConfig, StripeEmulator, create_app, parse_form
+from routes import checkout_routes
+from services.rate_limiter import route_rate_limits
+
+SESSION_PARAMS = {
+    "payment_method_types": ["card"],
+    "line_items": [{
+        "price_data": {"currency": "usd", "product_data": {"name": "N"}, "unit_amount": 1500},
+        "quantity": 2,
+    }],
+    "mode": "payment",
+    "metadata": {"product_id": "p1"},
+}
+
+
+def test_parses_the_sdk_form_encoding():
+    form = parse_qsl(urlencode(list(_api_encode(SESSION_PARAMS))))
+    assert parse_form(form) == {
+        "payment_method_types": ["card"],
+        "line_items": [{
+            "price_data": {"currency": "usd", "product_data": {"name": "N"}, "unit_amount": "1500"},
+            "quantity": "2",
+        }],
+        "mode": "payment",
+        "metadata": {"product_id": "p1"},
+    }
+
+
+def test_sessions_failures_and_signed_delivery():
+    received = []
+
+    async def webhook(scope, receive, send):
+        body = (await receive())["body"]
+        headers = dict(scope["headers"])
+        received.append(verify_signature(body, headers[b"stripe-signature"].decode(), "whsec_t"))
+        await send({"type": "http.response.start", "status": 200 if len(received) > 1 else 503, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def scenario():
+        hook_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=webhook), base_url="http://shop")
+        core = StripeEmulator(
+            EmulatorConfig(webhook_url="http://shop/api/webhook", webhook_secret="whsec_t", delivery_backoff_s=0),
+            webhook_client=hook_client,
+        )
+        transport = httpx.ASGITransport(app=create_app(core))
+        async with httpx.AsyncClient(transport=transport, base_url="http://stripe") as client:
+            created = await client.post(
+                "/v1/checkout/sessions",
+                content=urlencode(list(_api_encode(SESSION_PARAMS))),
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+            )
+            session = created.json()
+            assert session["amount_total"] == 3000
+            assert (await client.get(f"/v1/checkout/sessions/{session['id']}")).json()["status"] == "open"
+
+            completed = (await client.post(f"/_emulator/sessions/{session['id']}/complete")).json()
+            assert completed["delivery"]["status"] == 200
+            assert completed["delivery"]["attempts"] == 2
+
+            await client.put("/_emulator/config", json={"failure_rate": 1.0, "failure_status": 429})
+            failed = await client.get(f"/v1/checkout/sessions/{session['id']}")
+            assert failed.status_code == 429 and failed.json()["error"]["type"] == "api_error"
+        await core.close()
+
+    asyncio.run(scenario())
+    assert received == [True, True]
+
+
+def test_webhook_storm_finalizes_every_order(monkeypatch):
+    monkeypatch.setattr(checkout_routes, "stripe", checkout_routes.stripe)
+    route_rate_limits.clear()
+
+    report = asyncio.run(webhook_storm.run_storm(sessions=8, rate=0, duplicates=0.5, concurrency=4))
+
+    assert report["sessions"] == 8 and report["events"] == 12
+    assert report["delivery_failures"] == 0
+    assert report["orders_finalized"] == 8
+
+
+def test_stripe_api_base_is_ignored_in_production(monkeypatch):
+    from types import SimpleNamespace
+
+    sdk = SimpleNamespace(api_key=None, api_base="https://api.stripe.com")
+    monkeypatch.setattr(checkout_routes, "stripe", sdk)
+    monkeypatch.setattr(checkout_routes, "STRIPE_API_BASE", "http://localhost:12111")
+
+    monkeypatch.setattr(checkout_routes, "IS_PRODUCTION", True)
+    checkout_routes.configure_stripe()
+    assert sdk.api_base == "https://api.stripe.com"
+
+    monkeypatch.setattr(checkout_routes, "IS_PRODUCTION", False)
+    checkout_routes.configure_stripe()
+    assert sdk.api_base == "http://localhost:12111"
@@ -0,0 +1,74 @@
+"""
+Tests for services/tracing.py: Server-Timing headers, sampled traces and the
+database spans recorded by config/query_monitor.py.
+"""
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+import services.tracing as tracing
+from config.query_monitor import QueryMonitor
+from services.metrics import MetricsRegistry
+from services.tracing import Trace, current_trace
+
+
+def test_server_timing_and_sampled_traces(monkeypatch):
+    from server import app
+
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    tracing.trace_buffer.clear()
+    with TestClient(app) as client:
+        login = client.post(
+            "/api/admin/login",
+            json={"email": "admin@arar-perfume.com", "password": "ArarAdmin2024!"}
+        )
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        response = client.get("/api/admin/products", headers=headers)
+        timing = response.headers["server-timing"]
+        assert timing.startswith("auth;dur=")
+        assert "serialize;dur=" in timing and "total;dur=" in timing
+
+        traces = client.get(
+            "/api/admin/metrics/traces", params={"route": "GET /api/admin/products"}, headers=headers
+        ).json()
+
+    assert traces[0]["id"] == response.headers["x-trace-id"]
+    names = [s["name"] for s in traces[0]["spans"]]
+    assert names == ["get_current_admin", "json.render"]
+
+
+def test_mongo_commands_become_db_spans():
+    monitor = QueryMonitor(registry=MetricsRegistry())
+    trace = Trace("GET", "/api/fragrances")
+    token = current_trace.set(trace)
+    try:
+        monitor.started(SimpleNamespace(
+            command_name="find", command={"find": "products", "filter": {"status": "published"}},
+            connection_id=("localhost", 27017), request_id=1,
+        ))
+    finally:
+        current_trace.reset(token)
+    monitor.succeeded(SimpleNamespace(
+        command_name="find", connection_id=("localhost", 27017), request_id=1,
+        duration_micros=2500, reply={"cursor": {"firstBatch": [{}, {}]}},
+    ))
+
+    assert trace.breakdown() == {"db": (0.0025, 1)}
+    assert trace.as_dict()["spans"][0]["attributes"] == {"documents": 2}
+
+
+def test_server_timing_defaults_off_in_production():
+    assert tracing._server_timing_enabled({"ENVIRONMENT": "development"})
+    assert not tracing._server_timing_enabled({"ENVIRONMENT": "production"})
+    assert tracing._server_timing_enabled({"ENVIRONMENT": "production", "SERVER_TIMING_ENABLED": "1"})
+
+
+def test_disabled_server_timing_keeps_the_trace_id(monkeypatch):
+    from server import app
+
+    monkeypatch.setattr(tracing, "SERVER_TIMING_ENABLED", False)
+    with TestClient(app) as client:
+        response = client.get("/api/fragrances/unknown-slug")
+
+    assert "server-timing" not in response.headers
+    assert response.headers["x-trace-id"]
@@ -0,0 +1,84 @@
+"""
+BlurHash encoder (https://blurha.sh).
+
+Encodes a small RGB image into a compact string that clients decode into a
+blurred placeholder. Callers should downscale first (32x32 is plenty): the
+cost is O(width * height * components).
+"""
+
+import math
+from typing import List, Sequence, Tuple
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+_SRGB_TO_LINEAR = [
+    (v / 255) / 12.92 if v / 255 <= 0.04045 else (((v / 255) + 0.055) / 1.055) ** 2.4
+    for v in range(256)
+]
+
+
+def _base83(value: int, length: int) -> str:
+    return "".join(_BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _linear_to_srgb(value: float) -> int:
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value: float, exponent: float) -> float:
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def encode(pixels: Sequence[Tuple[int, int, int]], width: int, height: int,
+           x_components: int = 4, y_components: int = 3) -> str:
+    """
+    Encode row-major RGB `pixels` (e.g. PIL's `image.getdata()` of an RGB image).
+    """
+    if not (1 <= x_components <= 9 and 1 <= y_components <= 9):
+        raise ValueError("BlurHash components must be between 1 and 9")
+    if len(pixels) != width * height:
+        raise ValueError("Pixel count does not match dimensions")
+
+    linear = [(_SRGB_TO_LINEAR[r], _SRGB_TO_LINEAR[g], _SRGB_TO_LINEAR[b]) for r, g, b in pixels]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors: List[Tuple[float, float, float]] = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1.0 if i == 0 and j == 0 else 2.0
+            r = g = b = 0.0
+            for y in range(height):
+                row_basis = normalisation * cos_y[j][y]
+                offset = y * width
+                for x in range(width):
+                    basis = row_basis * cos_x[i][x]
+                    pr, pg, pb = linear[offset + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = 1.0 / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(channel) for factor in ac for channel in factor)
+        quantised_max = max(0, min(82, int(actual_max * 166 - 0.5)))
+        maximum = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        maximum = 1.0
+        result += _base83(0, 1)
+
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+
+    for factor in ac:
+        quantised = [max(0, min(18, int(_sign_pow(c / maximum, 0.5) * 9 + 9.5))) for c in factor]
+        result += _base83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+
+    return result
@@ -63,6 +63,15 @@ def validate_env():
             print(f"\nWARNING: {env_mode} mode detected but STRIPE_SECRET_KEY does not start with 'sk_test_'.")
         stripe_mode = "TEST"
 
+    # Stripe host guard: an emulator URL left over in production would receive the live key
+    if env_mode == "production" and os.environ.get("STRIPE_API_BASE"):
+        print("\nFATAL: STRIPE_API_BASE must not be set in production.")
+        sys.exit(1)
+
+    # /metrics is not served in production without a bearer token
+    if env_mode == "production" and not os.environ.get("METRICS_TOKEN"):
+        print("\nWARNING: METRICS_TOKEN is not set; /metrics is disabled in production.")
+
     # CORS Guard
     if env_mode == "production" and cors_origin == "*":
         print("\nFATAL: Wildcard CORS_ORIGIN ('*') is forbidden in production.")
@@ -82,4 +91,4 @@ def validate_env():
     print(f"Webhook Validation:      ACTIVE (STRIPE_WEBHOOK_SECRET present)")
     print("="*40 + "\n")
 
-    logger.info(f"Environment validation successful ({env_mode}).")
+    logger.info("Environment validation successful (%s).", env_mode)
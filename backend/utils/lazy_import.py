@@ -0,0 +1,47 @@
+"""
+Deferred module imports.
+
+`lazy_import("stripe")` returns a stand-in that imports the real module the
+first time one of its attributes is read or set. Heavy SDKs used by a handful
+of routes (Stripe, Cloudinary) are then only loaded by workers that actually
+serve those routes, keeping cold starts and per-worker memory down.
+"""
+
+import importlib
+import threading
+import time
+
+from utils.startup_profiler import startup_profiler
+
+
+class LazyModule:
+    def __init__(self, name: str):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_module", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _load(self):
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                module = self._lazy_module
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._lazy_name)
+                    startup_profiler.record("lazy-import", self._lazy_name, time.perf_counter() - start)
+                    object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __repr__(self):
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module '{self._lazy_name}' ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
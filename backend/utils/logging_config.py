@@ -0,0 +1,181 @@
+"""
+Non-blocking logging pipeline.
+
+Request handlers never write to stderr themselves: the root logger has a single
+`QueueHandler` that puts records on a bounded in-memory queue, and a
+`QueueListener` thread formats and writes them. If the queue is full the record
+is dropped (and counted) rather than stalling the event loop.
+
+Before a record is queued it is passed through `RateSamplingFilter`: each
+logger may emit LOG_SAMPLE_RATE records per second with bursts of
+LOG_SAMPLE_BURST; beyond that, records below WARNING are dropped and the number
+dropped is attached to the next record that gets through. A chatty debug
+statement in a hot loop therefore costs a dict lookup, not a write.
+
+The record's message, route and trace id are resolved on the calling thread
+(the context variables are not visible from the listener thread); JSON
+rendering happens on the listener thread.
+
+Configuration:
+    LOG_LEVEL          Root log level (default INFO)
+    LOG_FORMAT         "json" or "text" (default json in production, text otherwise)
+    LOG_QUEUE_SIZE     Records buffered for the writer thread (default 10000)
+    LOG_SAMPLE_RATE    Records per second each logger may emit below WARNING (default 50)
+    LOG_SAMPLE_BURST   Burst allowance for the above (default 100)
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from middleware.request_context import NO_ROUTE, current_route
+from services.metrics import CounterFamily
+from services.tracing import current_trace
+
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.environ.get(
+    "LOG_FORMAT",
+    "json" if os.environ.get("ENVIRONMENT", "development").lower() == "production" else "text",
+).lower()
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", "50"))
+LOG_SAMPLE_BURST = int(os.environ.get("LOG_SAMPLE_BURST", "100"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+LOG_RECORDS_DROPPED = CounterFamily(
+    "log_records_dropped_total",
+    "Log records dropped before reaching the writer thread",
+    ("reason",),
+)
+
+
+class RateSamplingFilter(logging.Filter):
+    """Per-logger token bucket; records at WARNING and above always pass."""
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE, burst: int = LOG_SAMPLE_BURST):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        # logger name -> [tokens, last_refill, dropped since last pass]
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [float(self.burst), now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1 and record.levelno < logging.WARNING:
+                bucket[2] += 1
+                LOG_RECORDS_DROPPED.inc("sampled")
+                return False
+            bucket[0] = max(0.0, bucket[0] - 1)
+            if bucket[2]:
+                record.sampled_out = bucket[2]
+                bucket[2] = 0
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records without ever waiting; resolves request context first."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        route = current_route()
+        if route != NO_ROUTE:
+            record.route = route
+        trace = current_trace.get()
+        if trace is not None:
+            record.trace_id = trace.id
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc("queue_full")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for attr in ("route", "trace_id", "sampled_out"):
+            value = getattr(record, attr, None)
+            if value is not None:
+                entry[attr] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LoggingPipeline:
+    def __init__(self):
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self._running = False
+
+    def configure(
+        self,
+        level: str = LOG_LEVEL,
+        fmt: str = LOG_FORMAT,
+        stream=None,
+        sampling: Optional[RateSamplingFilter] = None,
+    ):
+        """Route the root logger through the queue. Safe to call again (replaces the pipeline)."""
+        self.stop()
+        root = logging.getLogger()
+        if self.handler is not None:
+            root.removeHandler(self.handler)
+
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        self.handler = NonBlockingQueueHandler(self.queue)
+        self.handler.addFilter(sampling or RateSamplingFilter())
+        root.addHandler(self.handler)
+        root.setLevel(level)
+
+        self.listener = logging.handlers.QueueListener(self.queue, output, respect_handler_level=True)
+        self.start()
+
+    def start(self):
+        if self.listener is not None and not self._running:
+            self.listener.start()
+            self._running = True
+
+    def stop(self):
+        """Write out everything queued so far and stop the writer thread."""
+        if self.listener is not None and self._running:
+            self.listener.stop()
+            self._running = False
+
+
+logging_pipeline = LoggingPipeline()
+
+
+def configure_logging(**kwargs):
+    logging_pipeline.configure(**kwargs)
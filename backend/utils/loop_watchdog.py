@@ -0,0 +1,224 @@
+"""
+Event-loop stall detector.
+
+A heartbeat callback on the event loop stamps the time every
+LOOP_WATCHDOG_INTERVAL_S. A daemon thread checks the stamp; when it is older
+than LOOP_WATCHDOG_THRESHOLD_S the loop is blocked (a sync SDK call, bcrypt,
+file I/O, a CPU-bound loop...) and the thread captures the loop thread's stack
+with `sys._current_frames()` together with the task that was running.
+
+Stalls are aggregated by stack, so one slow call site shows up as a single
+entry with a count, total and max duration rather than a flood of log lines.
+A summary of the worst call sites is logged every LOOP_WATCHDOG_REPORT_S and
+`report()` returns the aggregate (served at /api/admin/metrics/loop-stalls).
+
+The watchdog only reads the loop's state; when the loop is healthy its cost is
+one callback per interval and one thread wake-up per half interval.
+
+Configuration:
+    LOOP_WATCHDOG_ENABLED       Run the watchdog (default 1)
+    LOOP_WATCHDOG_THRESHOLD_S   Stall threshold in seconds (default 0.25)
+    LOOP_WATCHDOG_INTERVAL_S    Heartbeat interval in seconds (default 0.05)
+    LOOP_WATCHDOG_REPORT_S      Seconds between logged summaries (default 60)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional, Tuple
+
+from services.metrics import CounterFamily, HistogramFamily
+
+logger = logging.getLogger(__name__)
+
+WATCHDOG_ENABLED = os.environ.get("LOOP_WATCHDOG_ENABLED", "1").lower() in ("1", "true", "yes")
+WATCHDOG_THRESHOLD_S = float(os.environ.get("LOOP_WATCHDOG_THRESHOLD_S", "0.25"))
+WATCHDOG_INTERVAL_S = float(os.environ.get("LOOP_WATCHDOG_INTERVAL_S", "0.05"))
+WATCHDOG_REPORT_S = float(os.environ.get("LOOP_WATCHDOG_REPORT_S", "60"))
+
+MAX_STACK_FRAMES = 30
+MAX_CALL_SITES = 200
+
+LOOP_STALLS = CounterFamily(
+    "event_loop_stalls_total",
+    "Event loop stalls longer than the watchdog threshold",
+)
+LOOP_STALL_DURATION = HistogramFamily(
+    "event_loop_stall_duration_seconds",
+    "Duration of event loop stalls longer than the watchdog threshold",
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# Frames from these files are the loop machinery, not the code that blocked it
+_INTERNAL_PATHS = (os.path.dirname(asyncio.__file__), threading.__file__)
+
+
+class _CallSite:
+    __slots__ = ("stack", "task", "count", "total", "max", "last_seen")
+
+    def __init__(self, stack: str, task: str):
+        self.stack = stack
+        self.task = task
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last_seen = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "task": self.task,
+            "count": self.count,
+            "total_s": round(self.total, 3),
+            "max_s": round(self.max, 3),
+            "last_seen": self.last_seen,
+            "stack": self.stack,
+        }
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        threshold: float = WATCHDOG_THRESHOLD_S,
+        interval: float = WATCHDOG_INTERVAL_S,
+        report_interval: float = WATCHDOG_REPORT_S,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.report_interval = report_interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._call_sites: Dict[Tuple, _CallSite] = {}
+        # Call site of the stall in progress, charged with its duration when it ends
+        self._current_stall: Optional[_CallSite] = None
+
+    # -- loop side ---------------------------------------------------------
+
+    def _beat(self):
+        now = time.monotonic()
+        gap = now - self._last_beat
+        self._last_beat = now
+        if gap > self.threshold + self.interval:
+            self._finish_stall(gap - self.interval)
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _finish_stall(self, duration: float):
+        with self._lock:
+            site, self._current_stall = self._current_stall, None
+            if site is not None:
+                site.total += duration
+                site.max = max(site.max, duration)
+        LOOP_STALL_DURATION.observe(duration)
+
+    def start(self):
+        """Start watching the running loop. Call from the loop's thread."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._handle = self._loop.call_later(self.interval, self._beat)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=1)
+        self._thread = None
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self.log_report()
+
+    # -- watchdog thread -----------------------------------------------------
+
+    def _watch(self):
+        next_report = time.monotonic() + self.report_interval
+        stalled = False
+        while not self._stop.wait(self.interval / 2):
+            now = time.monotonic()
+            # The next beat is due one interval after the last one
+            blocked_for = now - self._last_beat - self.interval
+            if blocked_for > self.threshold and not stalled:
+                stalled = True
+                self._capture(blocked_for)
+            elif blocked_for <= self.threshold:
+                stalled = False
+            if now >= next_report:
+                next_report = now + self.report_interval
+                self.log_report()
+
+    def _capture(self, blocked_for: float):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        frames = [
+            entry for entry in traceback.extract_stack(frame)
+            if not entry.filename.startswith(_INTERNAL_PATHS)
+        ][-MAX_STACK_FRAMES:]
+        key = tuple((entry.filename, entry.lineno, entry.name) for entry in frames)
+
+        task = None
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            pass
+        task_label = f"{task.get_name()} {task.get_coro().__qualname__}" if task is not None else "<callback>"
+
+        with self._lock:
+            site = self._call_sites.get(key)
+            if site is None:
+                if len(self._call_sites) >= MAX_CALL_SITES:
+                    # Keep the aggregate bounded: forget the least severe call site
+                    least = min(self._call_sites, key=lambda k: self._call_sites[k].total)
+                    del self._call_sites[least]
+                site = self._call_sites[key] = _CallSite("".join(traceback.format_list(frames)), task_label)
+            site.count += 1
+            site.last_seen = time.time()
+            self._current_stall = site
+        LOOP_STALLS.inc()
+        logger.warning(
+            "Event loop blocked for more than %.0f ms in %s at %s",
+            blocked_for * 1000, task_label, frames[-1].name if frames else "?",
+        )
+
+    # -- reporting -------------------------------------------------------------
+
+    def report(self, limit: int = 20) -> dict:
+        with self._lock:
+            sites = sorted(self._call_sites.values(), key=lambda s: s.total, reverse=True)
+            return {
+                "threshold_s": self.threshold,
+                "stalls": sum(site.count for site in sites),
+                "call_sites": [site.as_dict() for site in sites[:limit]],
+            }
+
+    def log_report(self, limit: int = 5):
+        report = self.report(limit)
+        if not report["call_sites"]:
+            return
+        lines = [f"Event loop stalls (> {self.threshold * 1000:.0f} ms): {report['stalls']} total"]
+        for site in report["call_sites"]:
+            lines.append(
+                f"  {site['count']}x, {site['total_s']}s total, {site['max_s']}s max in {site['task']}\n{site['stack']}"
+            )
+        logger.warning("\n".join(lines))
+
+    def reset(self):
+        with self._lock:
+            self._call_sites.clear()
+            self._current_stall = None
+
+
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,124 @@
+"""
+Query plan checker.
+
+Runs `explain()` for every query shape issued by the API routes and flags the
+ones the planner answers with a collection scan. Listings that intentionally
+read a whole collection are marked with `full_scan=True` and reported but not
+counted as failures.
+
+Usage (from the backend directory):
+    python -m utils.query_plan_checker
+
+Exits with status 1 when an unexpected COLLSCAN is found.
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+@dataclass
+class QueryShape:
+    route: str
+    collection: str
+    filter: dict
+    sort: Optional[list] = None
+    full_scan: bool = False
+    projection: dict = field(default_factory=lambda: {"_id": 0})
+
+
+# Placeholder values only need the right type; the planner ignores them.
+QUERY_SHAPES = [
+    # Public
+    QueryShape("GET /api/fragrances", "products", {"status": "published"}),
+    QueryShape("GET /api/fragrances/{slug}", "products", {"slug": "x", "status": "published"}),
+    QueryShape("POST /api/newsletter", "newsletter", {"email": "x@example.com"}),
+    # Checkout
+    QueryShape("POST /api/create-checkout-session", "products", {"slug": "x", "status": "published"}),
+    QueryShape("GET /api/checkout/status/{session_id}", "orders", {"session_id": "x"}),
+    QueryShape("POST /api/webhook", "orders", {"session_id": "x", "payment_status": {"$ne": "paid"}}),
+    QueryShape("POST /api/webhook (stock)", "products", {"id": "x", "stock_quantity": {"$gt": 0}}),
+    # Admin
+    QueryShape("auth: get_current_admin", "admin_users", {"email": "x@example.com"}),
+    QueryShape("GET /api/admin/products", "products", {}, full_scan=True),
+    QueryShape("GET /api/admin/products/{id}", "products", {"id": "x"}),
+    QueryShape("GET /api/admin/collections", "collections", {}, full_scan=True),
+    QueryShape("PUT /api/admin/collections/{id}", "collections", {"id": "x"}),
+    QueryShape("GET /api/admin/orders", "orders", {}, sort=[("created_at", -1)]),
+    QueryShape("GET /api/admin/orders?status=", "orders", {"status": "pending"}, sort=[("created_at", -1)]),
+    QueryShape("GET /api/admin/orders/{id}", "orders", {"id": "x"}),
+    # Image storage
+    QueryShape("ImageStorageService.upload", "image_assets", {"sha256": "x", "deleting": {"$ne": True}}),
+    QueryShape("ImageStorageService.delete", "image_assets", {"public_id": "x", "ref_count": {"$gt": 0}}),
+]
+
+
+def _plan_stages(plan: dict):
+    """Yield every stage name of a (possibly nested) winning plan."""
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        yield plan["stage"]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _plan_stages(child)
+
+
+def winning_plan_stages(explain_output: dict) -> list:
+    """Extract the stage names of the winning plan from explain() output."""
+    planner = explain_output.get("queryPlanner", {})
+    return list(_plan_stages(planner.get("winningPlan", {})))
+
+
+async def check_query_plans(db) -> list:
+    """
+    Explain every registered query shape against `db`.
+
+    Returns a list of result dicts with keys: route, collection, stages, collscan, expected.
+    """
+    results = []
+    for shape in QUERY_SHAPES:
+        cursor = db[shape.collection].find(shape.filter, shape.projection)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        explain_output = await cursor.explain()
+        stages = winning_plan_stages(explain_output)
+        results.append({
+            "route": shape.route,
+            "collection": shape.collection,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+            "expected": shape.full_scan,
+        })
+    return results
+
+
+async def main() -> int:
+    load_dotenv()
+    from config.database import db, initialize_database
+
+    await initialize_database()
+    results = await check_query_plans(db)
+
+    failures = 0
+    for result in results:
+        if not result["collscan"]:
+            label = "OK      "
+        elif result["expected"]:
+            label = "SCAN    "
+        else:
+            label = "COLLSCAN"
+            failures += 1
+        print(f"{label} {result['route']:<45} {result['collection']:<12} {' <- '.join(result['stages'])}")
+
+    print(f"\n{len(results)} query shape(s) checked, {failures} unexpected collection scan(s).")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
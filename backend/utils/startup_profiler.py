@@ -0,0 +1,85 @@
+"""
+Startup profiler.
+
+Records how long the application spends importing its modules and running each
+initialization step, and logs a report once startup completes. Lazily loaded
+SDKs (see utils.lazy_import) are recorded too, when they are first used.
+
+The report is always collected (the overhead is a perf_counter call per entry)
+and is served at GET /api/admin/metrics/startup. Set STARTUP_PROFILE=1 to also
+log it at INFO level on every start.
+
+For a full per-module import tree, run the server under `python -X importtime`.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.records = []
+        self.completed_in = None
+
+    def record(self, kind: str, name: str, seconds: float):
+        self.records.append({"kind": kind, "name": name, "ms": round(seconds * 1000, 2)})
+
+    @contextmanager
+    def measure(self, kind: str, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, time.perf_counter() - start)
+
+    def import_module(self, name: str):
+        """Import a module, recording the time it took (including not-yet-loaded dependencies)."""
+        with self.measure("import", name):
+            return importlib.import_module(name)
+
+    async def run_concurrently(self, steps: Dict[str, Callable[[], Awaitable]]):
+        """
+        Run independent init steps concurrently, timing each one.
+        The first failure is re-raised after all steps have finished.
+        """
+        async def timed(name, step):
+            with self.measure("init", name):
+                return await step()
+
+        results = await asyncio.gather(
+            *(timed(name, step) for name, step in steps.items()),
+            return_exceptions=True
+        )
+        for name, result in zip(steps, results):
+            if isinstance(result, Exception):
+                logger.error("Startup step '%s' failed: %s", name, result)
+        failures = [r for r in results if isinstance(r, Exception)]
+        if failures:
+            raise failures[0]
+
+    def mark_complete(self):
+        self.completed_in = time.perf_counter() - self.started_at
+        if os.environ.get("STARTUP_PROFILE", "").lower() in ("1", "true", "yes"):
+            self.log_report()
+
+    def report(self) -> dict:
+        return {
+            "total_ms": round(self.completed_in * 1000, 2) if self.completed_in is not None else None,
+            "entries": sorted(self.records, key=lambda r: r["ms"], reverse=True),
+        }
+
+    def log_report(self):
+        report = self.report()
+        lines = [f"  {e['ms']:>9.2f} ms  {e['kind']:<12} {e['name']}" for e in report["entries"]]
+        logger.info("Startup completed in %.2f ms:\n%s", report["total_ms"] or 0, "\n".join(lines))
+
+
+startup_profiler = StartupProfiler()